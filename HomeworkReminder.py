@@ -1,42 +1,128 @@
-from zxin_client import ZXinClient
+from zxin_client import NOT_MODIFIED, ZXinClient
 from course_manager import CourseManager
 import datetime
-from feishu import feishu
+import logging
+import os
+import time
+from notifier import NotificationDispatcher
+from outbox import Outbox, default_path
+from snapshot_diff import ChangeType, SnapshotDiffer
+from state_store import StateStore
+from deadline_index import DeadlineIndex, default_tiers, parse_tiers
+from streaming import StreamError, array_writer
+from models import BEIJING_TZ, Course, parse_time
+from score_archive import archive_dir, open_archive, score_record
+import metrics
+from log_config import LogSummary
 
 
 class HomeworkReminder(ZXinClient):
-    def __init__(self):
+    """
+    作业提醒器：扫描作业、检测变化并发送提醒
+
+    请求和 token 刷新继承自 ZXinClient，可以在多个线程中共享；扫描状态（已知作业、
+    快照比较器、截止时间索引）不是线程安全的，同一实例同时只应执行一次 scan_homework。
+    """
+
+    COURSE_ENDPOINT = "/stu/course/getJoinedCourse2"
+    HOMEWORK_LIST_ENDPOINT = "/stu/homework/getHomeworkList"
+
+    # 作业信息中随当前时间变化的字段，课程数据未变化时根据截止时间重新计算
+    TIME_FIELDS = ("days_remaining", "seconds_remaining", "remaining_time")
+
+    def __init__(
+        self,
+        username=None,
+        password=None,
+        output_dir="output",
+        notifier=None,
+        state_store=None,
+        export_json=None,
+        reminder_tiers=None,
+        transport=None,
+        score_archive=None,
+        storage=None,
+        token_cache=None,
+    ):
         """
         初始化作业提醒器
+
+        Args:
+            username: 账号，默认读取环境变量
+            password: 密码，默认读取环境变量
+            output_dir: 输出目录
+            notifier: 通知发送器，多个提醒器可共享同一个，默认新建，发件箱使用 ZXIN_OUTBOX_DB 或输出目录下的 outbox.db
+            state_store: 状态存储，多个提醒器可共享同一个，默认使用 ZXIN_STATE_DB 或输出目录下的 state.db
+            export_json: 是否额外导出 all_homework.json 等JSON文件，默认读取 ZXIN_EXPORT_JSON（默认导出）
+            reminder_tiers: 提醒档位，如 "5d,1d,2h" 或 ReminderTier 列表，默认读取 ZXIN_REMINDER_TIERS，
+                未配置时使用提前 days_threshold 天、1天、2小时三档
+            transport: HTTP传输层，默认按环境变量新建
+            score_archive: 成绩快照归档，默认使用 ZXIN_SCORE_ARCHIVE 或输出目录下的 score_archive
+            storage: 导出文件的存储，默认按环境变量在输出目录下新建
+            token_cache: token 缓存，多个提醒器可共享同一个，默认按 ZXIN_TOKEN_CACHE 新建
         """
-        super().__init__()
+        super().__init__(
+            username,
+            password,
+            output_dir,
+            transport=transport,
+            storage=storage,
+            token_cache=token_cache,
+        )
+        self.state = state_store or StateStore(
+            os.getenv("ZXIN_STATE_DB") or os.path.join(self.output_dir, "state.db")
+        )
+        if export_json is None:
+            export_json = os.getenv("ZXIN_EXPORT_JSON", "1") != "0"
+        self.export_json = export_json
+        reminder_tiers = reminder_tiers or os.getenv("ZXIN_REMINDER_TIERS")
+        if isinstance(reminder_tiers, str):
+            reminder_tiers = parse_tiers(reminder_tiers)
+        self.reminder_tiers = reminder_tiers
+        self.account = self.username or "default"
+        # 成绩快照归档，成绩有变化时才追加
+        # 归档实现了 __len__，空归档为假值，必须用 is None 判断，否则传入的空归档会被默认归档替换
+        if score_archive is None:
+            score_archive = open_archive(archive_dir(self.output_dir), self.account)
+        self.score_archive = score_archive
         # 初始化课程管理器
         self.course_manager = CourseManager(self)
+        # 扫描中的通知先收集，扫描结束后合并发送
+        self.notifier = notifier or NotificationDispatcher(
+            outbox=Outbox(default_path(self.output_dir))
+        )
+        self.notify_title = "作业提醒"
+        # 最近一次扫描中未提交且未过期作业的 (截止时间戳, 作业ID) 及其按截止时间排序的索引
+        self.pending_deadlines = []
+        self.deadline_index = DeadlineIndex()
         # 加载已知的作业ID
         self.known_homework_ids = self._load_known_homework_ids()
+        # 加载上次的课程快照，用于检测作业变化
+        self.differ = SnapshotDiffer(
+            self.state.load_snapshot(self.account)
+            or self.load_json("snapshot_state.json")
+        )
 
-    def _generate_homework_id(self, homework_item, course_name):
+    def _generate_homework_id(self, homework, course_name):
         """
-        为作业生成唯一ID。
-        优先使用作业数据中的 'id' 字段，如果不存在，则创建一个合成ID。
+        获取作业的唯一ID。
+        优先使用作业数据中的 'id' 字段，如果不存在，则使用解析时生成的合成ID。
         """
-        if "id" in homework_item and homework_item["id"]:
-            return str(homework_item["id"])
-        else:
-            # 如果没有直接的ID，则根据其他信息创建合成ID
-            # 注意：合成ID的稳定性取决于这些字段的不变性
-            title = homework_item.get("title", "untitled")
-            endtime = homework_item.get("endtime", "no_endtime")
+        if not homework.id:
+            # 注意：合成ID的稳定性取决于课程名、标题和截止时间的不变性
             self.logger.warning(
-                f"作业《{title}》(课程：{course_name})缺少 'id' 字段，将使用合成ID。"
+                f"作业《{homework.title}》(课程：{course_name})缺少 'id' 字段，将使用合成ID。"
             )
-            return f"{course_name}_{title}_{endtime}"
+        return homework.key
 
     def _load_known_homework_ids(self):
-        """从文件中加载已知的作业ID"""
+        """从状态存储加载已知的作业ID，存储为空时兼容读取旧的JSON文件"""
         self.logger.info("开始加载已知作业ID")
         try:
-            # 假设 ZXinClient 基类有 load_json 方法
+            known_ids = self.state.known_homework_ids(self.account)
+            if known_ids:
+                self.logger.info(f"成功加载 {len(known_ids)} 个已知作业ID")
+                return known_ids
             data = self.load_json("known_homework_ids.json")
             if data and "ids" in data:
                 self.logger.info(f"成功加载 {len(data['ids'])} 个已知作业ID")
@@ -49,23 +135,83 @@ class HomeworkReminder(ZXinClient):
         return set()
 
     def _save_known_homework_ids(self):
-        """将当前已知的作业ID保存到文件"""
+        """将当前已知的作业ID导出到JSON文件（状态存储中的作业随快照增量更新）"""
         self.logger.info(f"开始保存 {len(self.known_homework_ids)} 个作业ID")
         try:
-            # 假设 ZXinClient 基类有 save_json 方法
             self.save_json(
-                {"ids": list(self.known_homework_ids)}, "known_homework_ids.json"
+                {"ids": sorted(self.known_homework_ids)}, "known_homework_ids.json"
             )
             self.logger.info("作业ID保存成功")
         except Exception as e:
             self.logger.error(f"保存作业ID失败: {e}")
 
+    def _report_changes(self, changes, digest):
+        """记录课程快照的变化，成绩、截止时间变化和作业删除加入通知"""
+        for change in changes:
+            label = f"作业：《{change.title}》\n课程：{change.course_name}"
+            key = f"{self.account}:{change.homework_id}:{change.kind.value}:{change.new}"
+            if change.kind == ChangeType.SCORE_CHANGED:
+                self.logger.info(
+                    f"作业《{change.title}》成绩变化：{change.old} -> {change.new}"
+                )
+                digest.add("成绩变化", f"{label}\n成绩：{change.old} -> {change.new}", key)
+            elif change.kind == ChangeType.DEADLINE_MOVED:
+                self.logger.info(
+                    f"作业《{change.title}》截止时间变更：{change.old} -> {change.new}"
+                )
+                digest.add(
+                    "截止时间变更", f"{label}\n截止时间：{change.old} -> {change.new}", key
+                )
+            elif change.kind == ChangeType.DELETED_HOMEWORK:
+                self.logger.info(f"作业《{change.title}》已被删除")
+                digest.add("作业已删除", label, key)
+            elif change.kind == ChangeType.NEWLY_SUBMITTED:
+                self.logger.info(f"作业《{change.title}》已提交")
+            elif change.kind == ChangeType.PROGRESS_CHANGED:
+                self.logger.info(
+                    f"作业《{change.title}》作答次数变化：{change.old} -> {change.new}"
+                )
+
     def get_homework_data(self):
-        """获取作业数据"""
+        """获取作业数据（一次请求完整列表）"""
         self.logger.info("开始获取作业数据")
-        homework_data = self.api_request("/stu/homework/getHomeworkList")
-        self.logger.info("作业数据获取成功")
-        return homework_data
+        homework_data = self.api_request(self.HOMEWORK_LIST_ENDPOINT)
+        if homework_data and homework_data.get("code", 2000) == 2000:
+            self.logger.info("作业数据获取成功")
+            return homework_data
+        self.logger.error("作业数据获取失败")
+        return None
+
+    def iter_homework_list(self, since=None, until=None, page_size=50, prefetch=2):
+        """
+        逐页遍历作业列表，处理当前页时预取后续页
+
+        作业列表按截止时间从新到旧排列，遇到截止时间早于 since 的作业后不再请求后续页。
+
+        Args:
+            since: 截止时间下限（带时区的 datetime），为空时遍历全部
+            until: 截止时间上限，晚于该时间的作业被跳过
+            page_size: 每页条目数
+            prefetch: 同时在途的最多页数
+
+        Returns:
+            作业字典的生成器，读取失败时抛出 StreamError
+        """
+        pages = self.iter_pages(self.HOMEWORK_LIST_ENDPOINT, page_size, prefetch)
+        try:
+            for item in pages:
+                end_time = parse_time(item.get("endtime"))
+                if since is not None or until is not None:
+                    if end_time is None:
+                        continue
+                    if since is not None and end_time < since:
+                        self.logger.info(f"已超出时间范围，停止读取，共读取 {pages.pages} 页")
+                        return
+                    if until is not None and end_time > until:
+                        continue
+                yield item
+        finally:
+            pages.close()
 
     def fetch_course_data(self):
         """获取已加入的课程数据"""
@@ -103,91 +249,280 @@ class HomeworkReminder(ZXinClient):
 
         return "".join(parts)
 
-    def scan_homework(self, days_threshold=5):
+    def scan_homework(self, days_threshold=5, course_data=None, stream=False):
         """
         扫描快截止的作业，并发送提醒
 
         Args:
             days_threshold: 提前多少天提醒，默认5天
+            course_data: 已获取的课程数据，为空时自动请求
+            stream: 未传入 course_data 时是否流式解析课程数据，内存占用只与单门课程有关
         """
         self.logger.info("开始扫描作业")
-        course_data = self.fetch_course_data()
-        if not course_data:
-            self.logger.error("没有可处理的课程数据")
+        with metrics.stage("scan"):
+            return self._scan(days_threshold, course_data, stream)
+
+    def _scan(self, days_threshold, course_data, stream):
+        """
+        选择课程数据来源并处理其中的作业
+
+        自动请求时携带上次响应的指纹，课程数据未变化时跳过解析和导出，
+        只根据保存的未提交作业检查截止时间。
+        """
+        fingerprint = None
+        if course_data:
+            courses, meta = iter(course_data["data"]), course_data
+        elif stream:
+            previous = self.state.load_fingerprint(self.account, self.COURSE_ENDPOINT)
+            courses = self.stream_array(self.COURSE_ENDPOINT, previous=previous)
+            if courses is NOT_MODIFIED:
+                return self._scan_unchanged(days_threshold)
+            if courses is None:
+                self.logger.error("没有可处理的课程数据")
+                return
+            meta = courses.meta
+        else:
+            previous = self.state.load_fingerprint(self.account, self.COURSE_ENDPOINT)
+            with metrics.stage("fetch"):
+                response = self.fetch_if_changed(self.COURSE_ENDPOINT, previous)
+            if response.not_modified:
+                return self._scan_unchanged(days_threshold)
+            course_data = response.data
+            if not course_data or course_data.get("msg") != "成功":
+                self.logger.error("没有可处理的课程数据")
+                return
+            fingerprint = response.fingerprint
+            courses, meta = iter(course_data["data"]), course_data
+
+        try:
+            upcoming = self._scan_courses(courses, meta, days_threshold)
+        except StreamError as e:
+            self.logger.error(f"课程数据解析失败: {e}")
             return
 
-        # 定义北京时区
-        beijing_tz = datetime.timezone(datetime.timedelta(hours=8))
+        if stream and not course_data:
+            fingerprint = courses.fingerprint
+        if upcoming is not None and fingerprint:
+            # 全部处理并保存后才记录指纹，中途失败时下次会重新处理
+            self.state.save_fingerprint(self.account, self.COURSE_ENDPOINT, fingerprint)
+        return upcoming
+
+    def _time_fields(self, end_time_beijing, now):
+        """计算作业信息中随当前时间变化的字段"""
+        time_delta = end_time_beijing - now
+        return {
+            "days_remaining": time_delta.days,
+            "seconds_remaining": time_delta.total_seconds(),
+            "remaining_time": self.format_time_delta(time_delta),
+        }
+
+    @staticmethod
+    def _deadline_text(homework_info, end_time_text):
+        """即将截止作业的通知内容"""
+        return (
+            f"作业：《{homework_info['title']}》\n"
+            f"课程：{homework_info['course_name']}\n"
+            f"剩余时间：{homework_info['remaining_time']}\n"
+            f"截止时间：{end_time_text} (北京时间)"
+        )
+
+    def _scan_unchanged(self, days_threshold):
+        """
+        课程数据未变化时的扫描：不解析课程数据，只根据上次保存的未提交作业检查截止时间
+
+        Returns:
+            即将截止的作业列表
+        """
+        self.logger.info("课程数据未变化，跳过解析，只检查截止时间")
+        now = datetime.datetime.now(BEIJING_TZ)
+        now_ts = now.timestamp()
+        digest = self.notifier.digest(self.notify_title)
+        seconds_threshold = days_threshold * 86400
+
+        upcoming_homework = []
+        pending_deadlines = []
+        pending_info = {}
+        for homework_id, end_ts, info in self.state.load_pending(self.account, now_ts):
+            end_time_beijing = datetime.datetime.fromtimestamp(end_ts, BEIJING_TZ)
+            homework_info = dict(info, **self._time_fields(end_time_beijing, now))
+            end_time_text = end_time_beijing.strftime("%Y-%m-%d %H:%M:%S")
+            pending_deadlines.append((end_ts, homework_id))
+            pending_info[homework_id] = self._deadline_text(homework_info, end_time_text)
+            if homework_info["seconds_remaining"] <= seconds_threshold:
+                upcoming_homework.append(homework_info)
+
+        self.pending_deadlines = pending_deadlines
+        self.deadline_index = DeadlineIndex(pending_deadlines)
+        notified = self._remind_tiers(digest, now_ts, days_threshold, pending_info)
+        digest.flush()
+        self.state.record_notifications(self.account, notified)
+
+        self.logger.info(f"发现 {len(upcoming_homework)} 个即将截止的作业")
+        return upcoming_homework
+
+    def _iter_homework(self, courses, now, summary):
+        """
+        逐门课程、逐个作业生成 (课程, 作业, 作业ID, 北京时间截止时间, 作业信息)
+
+        课程和作业为 models 中解析后的对象，课程在生成完其下的作业后即不再被引用，
+        流式处理时可以及时释放。截止时间无法解析的作业仍会生成，截止时间和剩余时间字段为 None。
+        """
+        for raw_course in courses:
+            self.differ.feed(raw_course)
+            course = Course.from_dict(raw_course)
+            summary.item("课程", f"开始扫描课程：{course.name}")
+
+            for homework in course.homework:
+                metrics.HOMEWORK_PROCESSED.inc()
+                # 为作业生成唯一ID (使用原始 unparsed endtime)
+                homework_id = self._generate_homework_id(homework, course.name)
+
+                # 截止时间在解析时已转换为带时区的时间，这里转换为北京时间
+                end_time_beijing = homework.end_time_beijing
+                if end_time_beijing is None:
+                    # 仍然保留该作业，否则作业ID会从本次扫描中消失，被当作已删除、下次又当作新作业
+                    self.logger.warning(
+                        f"作业《{homework.title}》(课程：{course.name})截止时间无效"
+                        f"（{homework.endtime!r}），不参与截止提醒"
+                    )
+                    time_fields = dict.fromkeys(self.TIME_FIELDS)
+                else:
+                    time_fields = self._time_fields(end_time_beijing, now)
+
+                # 创建作业信息对象
+                homework_info = {
+                    "course_name": course.name,
+                    "teacher": course.teacher.nickname,
+                    "title": homework.title,
+                    "category": homework.category,
+                    "end_time_utc": homework.endtime,  # 保留原始UTC时间字符串
+                    # 存储北京时间ISO格式字符串
+                    "end_time_beijing": end_time_beijing and end_time_beijing.isoformat(),
+                    # 剩余时间基于北京时间计算
+                    **time_fields,
+                    "is_submitted": homework.submitted,
+                }
+                yield course, homework, homework_id, end_time_beijing, homework_info
+
+    def tiers(self, days_threshold):
+        """当前使用的提醒档位"""
+        return self.reminder_tiers or default_tiers(days_threshold)
+
+    def _remind_tiers(self, digest, now_ts, days_threshold, pending_info):
+        """
+        将进入新档位的作业加入通知
+
+        只查询提醒记录中尚未出现的 (作业ID, 档位)，作业跨过多个档位时只提醒最小的档位。
+
+        Returns:
+            加入通知的 [(作业ID, 档位类型), ...]
+        """
+        tiers = self.tiers(days_threshold)
+        assigned = self.deadline_index.assign_tiers(now_ts, tiers)
+        if not assigned:
+            return []
+        sent = self.state.notified_keys(self.account, {tier.kind for tier in tiers})
+        notified = []
+        for homework_id, tier in assigned.items():
+            if (homework_id, tier.kind) in sent:
+                continue
+            digest.add(
+                f"即将截止作业（{tier.label}内）",
+                pending_info[homework_id],
+                f"{self.account}:{homework_id}:{tier.kind}",
+            )
+            notified.append((homework_id, tier.kind))
+        self.logger.info(
+            f"{len(assigned)} 个作业处于提醒档位内，本次新提醒 {len(notified)} 个"
+        )
+        return notified
+
+    def _scan_courses(self, courses, meta, days_threshold):
+        """处理课程迭代器中的作业：检测新作业和即将截止作业，保存状态并发送通知"""
+        started_at = time.time()
+        digest = self.notifier.digest(self.notify_title)
+        # 汇总模式下逐项日志只在扫描结束时输出计数
+        summary = LogSummary(self.logger)
+
         # 获取北京时区的当前时间
-        now = datetime.datetime.now(beijing_tz)
+        now = datetime.datetime.now(BEIJING_TZ)
         upcoming_homework = []
-        all_homework = []
+        pending_deadlines = []  # 未提交且未过期作业的 (截止时间戳, 作业ID)
+        pending_info = {}  # 未提交且未过期作业的提醒内容
+        pending_items = []  # 未提交且未过期作业的 (作业ID, 截止时间戳, 不随时间变化的作业信息)
         current_homework_ids = set()  # 用于存储本次扫描到的所有作业ID
+        observations = []  # 本次扫描中每个作业的观测值
+        notified = []  # 本次扫描加入通知的 (作业ID, 类型)
+        scores = {}  # 本次扫描的成绩快照
 
         # 转换天数阈值为秒数
         seconds_threshold = days_threshold * 86400
 
-        for course in course_data["data"]:
-            self.logger.info(f"开始扫描课程：{course['course']['name']}")
+        # 所有作业按存储格式逐项写入导出文件，不在内存中累积（msgpack 格式除外）
+        all_writer = (
+            array_writer(self.storage, "all_homework.json", "all_homework")
+            if self.export_json
+            else None
+        )
 
-            for homework in course["homework"]:
-                # 为作业生成唯一ID (使用原始 unparsed endtime)
-                homework_id = self._generate_homework_id(
-                    homework, course["course"]["name"]
-                )
+        self.differ.begin()
+        try:
+            for course, homework, homework_id, end_time_beijing, homework_info in (
+                self._iter_homework(courses, now, summary)
+            ):
                 current_homework_ids.add(homework_id)
-
-                # 解析截止时间 (来自API，通常是UTC)
-                end_time_str_utc = homework["endtime"]
-                parsed_end_time_utc = datetime.datetime.fromisoformat(
-                    end_time_str_utc.replace("Z", "+00:00")
+                scores[homework_id] = score_record(course, homework)
+                course_name = homework_info["course_name"]
+                seconds_remaining = homework_info["seconds_remaining"]
+                remaining_time_str = homework_info["remaining_time"]
+                is_submitted = homework_info["is_submitted"]
+                end_time_text = (
+                    end_time_beijing.strftime("%Y-%m-%d %H:%M:%S")
+                    if end_time_beijing
+                    else "未知"
                 )
-                # 转换为北京时间
-                end_time_beijing = parsed_end_time_utc.astimezone(beijing_tz)
 
                 # 检测是否为新作业
                 if homework_id not in self.known_homework_ids:
-                    self.logger.info(
-                        f"发现新作业：《{homework['title']}》, "
-                        f"课程：{course['course']['name']}"
+                    summary.item(
+                        "新作业", f"发现新作业：《{homework.title}》, 课程：{course_name}"
                     )
-                    feishu(
-                        "发现新作业提醒",
-                        f"作业：《{homework['title']}》\n"
-                        f"课程：{course['course']['name']}\n"
-                        f"教师：{course['teacher']['user']['nickname']}\n"
-                        f"截止时间：{end_time_beijing.strftime('%Y-%m-%d %H:%M:%S')} (北京时间)",
+                    digest.add(
+                        "发现新作业",
+                        f"作业：《{homework.title}》\n"
+                        f"课程：{course_name}\n"
+                        f"教师：{homework_info['teacher']}\n"
+                        f"截止时间：{end_time_text} (北京时间)",
+                        f"{self.account}:{homework_id}:new",
+                    )
+                    notified.append((homework_id, "new"))
+
+                if all_writer:
+                    all_writer.write(homework_info)
+                observations.append((homework_id, seconds_remaining, is_submitted))
+                if seconds_remaining is None:
+                    # 截止时间无效，只记录作业和成绩，跳过截止提醒
+                    summary.item(
+                        "截止时间未知",
+                        f"作业：《{homework.title}》, 课程：{course_name}, 状态：截止时间未知",
+                    )
+                    continue
+                if seconds_remaining >= 0 and not is_submitted:
+                    pending_deadlines.append((homework.end_ts, homework_id))
+                    pending_info[homework_id] = self._deadline_text(
+                        homework_info, end_time_text
+                    )
+                    pending_items.append(
+                        (
+                            homework_id,
+                            homework.end_ts,
+                            {
+                                key: value
+                                for key, value in homework_info.items()
+                                if key not in self.TIME_FIELDS
+                            },
+                        )
                     )
-
-                # 计算时间差 (基于北京时间)
-                time_delta = end_time_beijing - now
-                days_remaining = time_delta.days
-                seconds_remaining = time_delta.total_seconds()
-
-                # 格式化剩余时间
-                remaining_time_str = self.format_time_delta(time_delta)
-
-                # 检查是否已提交
-                is_submitted = False
-                if homework["studenthomework"]:
-                    is_submitted = True
-
-                # 创建作业信息对象
-                homework_info = {
-                    "course_name": course["course"]["name"],
-                    "teacher": course["teacher"]["user"]["nickname"],
-                    "title": homework["title"],
-                    "category": homework["category"],
-                    "end_time_utc": end_time_str_utc,  # 保留原始UTC时间字符串
-                    "end_time_beijing": end_time_beijing.isoformat(),  # 存储北京时间ISO格式字符串
-                    "days_remaining": days_remaining,
-                    "seconds_remaining": seconds_remaining,
-                    "remaining_time": remaining_time_str,
-                    "is_submitted": is_submitted,
-                }
-
-                # 添加到所有作业列表
-                all_homework.append(homework_info)
 
                 # 如果快截止且未提交
                 if (
@@ -196,48 +531,99 @@ class HomeworkReminder(ZXinClient):
                     and not is_submitted
                 ):
                     upcoming_homework.append(homework_info)
-                    self.logger.warning(
-                        f"发现即将截止作业：《{homework['title']}》, "
-                        f"课程：{course['course']['name']}, "
+                    summary.item(
+                        "即将截止",
+                        f"发现即将截止作业：《{homework.title}》, "
+                        f"课程：{course_name}, "
                         f"剩余时间：{remaining_time_str}, "
-                        f"截止时间：{end_time_beijing.strftime('%Y-%m-%d %H:%M:%S')} (北京时间)"
-                    )
-                    # 发送飞书消息
-                    feishu(
-                        "发现即将截止作业",
-                        f"作业：《{homework['title']}》, "
-                        f"课程：{course['course']['name']}, "
-                        f"剩余时间：{remaining_time_str}, "
-                        f"截止时间：{end_time_beijing.strftime('%Y-%m-%d %H:%M:%S')} (北京时间)",
+                        f"截止时间：{end_time_text} (北京时间)",
+                        logging.WARNING,
                     )
                 else:
                     # 显示所有作业的状态
-                    status = ""
                     if seconds_remaining < 0:
-                        status = "已过期"
+                        category = status = "已过期"
                     elif is_submitted:
-                        status = "已提交"
+                        category = status = "已提交"
                     else:
-                        status = f"剩余时间：{remaining_time_str}"
+                        category, status = "未截止", f"剩余时间：{remaining_time_str}"
 
-                    self.logger.info(
-                        f"作业：《{homework['title']}》, "
-                        f"课程：{course['course']['name']}, "
-                        f"状态：{status}"
+                    summary.item(
+                        category,
+                        f"作业：《{homework.title}》, "
+                        f"课程：{course_name}, "
+                        f"状态：{status}",
                     )
+        except BaseException:
+            if all_writer:
+                all_writer.abort()
+            raise
+
+        if meta.get("msg", "成功") != "成功":
+            if all_writer:
+                all_writer.abort()
+            self.logger.error(f"课程数据获取失败: {meta.get('msg')}")
+            return
 
-        # 保存所有作业数据
-        self.save_json({"all_homework": all_homework}, "all_homework.json")
+        summary.flush("扫描汇总")
+
+        # 比较课程快照，只处理内容变化的课程
+        self.last_changes = self.differ.finish()
+        self.logger.info(
+            f"课程快照比较完成：{self.differ.courses_changed} 门课程有变化，"
+            f"{self.differ.courses_skipped} 门未变化，共 {len(self.last_changes)} 项变化"
+        )
+        self._report_changes(self.last_changes, digest)
+
+        # 按档位提醒即将截止的作业，每个作业在每个档位只提醒一次
+        self.pending_deadlines = pending_deadlines
+        self.deadline_index = DeadlineIndex(pending_deadlines)
+        notified += self._remind_tiers(
+            digest, now.timestamp(), days_threshold, pending_info
+        )
+
+        # 合并发送本次扫描的通知
+        digest.flush()
+
+        # 增量保存课程快照、本次扫描的观测值和已发送的通知
+        with metrics.stage("persist"):
+            self.state.save_snapshot(
+                self.account,
+                self.differ.courses,
+                self.differ.changed_keys,
+                self.differ.removed_keys,
+            )
+            self.state.record_scan(
+                self.account, started_at, observations, len(upcoming_homework)
+            )
+            self.state.record_notifications(self.account, notified)
+            self.state.save_pending(self.account, pending_items)
+            try:
+                if self.score_archive.append(scores, started_at):
+                    self.logger.info("成绩有变化，已追加到成绩归档")
+            except (OSError, ValueError) as e:
+                self.logger.error(f"成绩快照归档失败: {e}")
 
-        # 更新并保存已知的作业ID
         self.known_homework_ids = current_homework_ids
-        self._save_known_homework_ids()
 
-        # 保存即将截止的作业数据
+        # 导出JSON文件（可选）
+        if all_writer:
+            with metrics.stage("export"):
+                all_writer.close()
+                if all_writer.changed:
+                    self.logger.info(
+                        f"保存数据成功，数据已保存到 {all_writer.filepath} 文件中"
+                    )
+                else:
+                    self.logger.info(f"数据未变化，跳过写入 {all_writer.filepath}")
+                self._save_known_homework_ids()
+                if upcoming_homework:
+                    self.save_json(
+                        {"upcoming_homework": upcoming_homework},
+                        "upcoming_homework.json",
+                    )
+
         if upcoming_homework:
-            self.save_json(
-                {"upcoming_homework": upcoming_homework}, "upcoming_homework.json"
-            )
             self.logger.info(f"发现 {len(upcoming_homework)} 个即将截止的作业")
             return upcoming_homework
         else:
@@ -248,3 +634,5 @@ class HomeworkReminder(ZXinClient):
 if __name__ == "__main__":
     reminder = HomeworkReminder()
     reminder.scan_homework()
+    reminder.notifier.close()
+    metrics.export_run(reminder.output_dir)
@@ -0,0 +1 @@
+"""离线性能基准：本地模拟知新接口、合成数据生成器和基准测试"""
@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.payloads import (
+    generate_course_data,
+    generate_homework_list,
+    generate_user,
+    split_size,
+)
+
+TOKEN = "bench-token"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认的监听队列只有 5，并发压力测试时会触发 SYN 重传
+    request_queue_size = 128
+
+
+class MockZXinServer:
+    """
+    本地模拟的知新接口和飞书 webhook
+
+    支持 /auth/login、/auth/user、/stu/course/getJoinedCourse2、
+    /stu/homework/getHomeworkList 和 /feishu，可注入固定延迟和随机错误。
+    GET 接口返回 ETag，请求携带相同的 If-None-Match 时返回 304。
+    getHomeworkList 带 page/size 参数时按截止时间从新到旧分页返回，并附带 total。
+    revoke_tokens() 使已发放的 token 失效，之后携带旧 token 的请求返回 401。
+    """
+
+    def __init__(
+        self,
+        course_data=None,
+        latency=0.0,
+        error_rate=0.0,
+        error_status=502,
+        host="127.0.0.1",
+        port=0,
+        seed=0,
+    ):
+        """
+        Args:
+            course_data: getJoinedCourse2 的响应，默认生成 10 门课程各 10 个作业
+            latency: 每个请求的固定延迟（秒）
+            error_rate: 返回错误的概率（0~1）
+            error_status: 注入错误时的HTTP状态码
+            host: 监听地址
+            port: 监听端口，0 表示随机端口
+            seed: 错误注入的随机种子
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stats = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.token = TOKEN
+        self._token_version = 0
+        self.set_course_data(course_data or generate_course_data())
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def feishu_url(self):
+        return f"{self.url}/feishu"
+
+    def set_course_data(self, course_data):
+        """替换课程数据，响应体预先编码，避免序列化耗时计入客户端"""
+        self._homework_items = sorted(
+            generate_homework_list(course_data)["data"],
+            key=lambda item: item.get("endtime") or "",
+            reverse=True,
+        )
+        self._bodies = {
+            "/auth/user": _encode(generate_user()),
+            "/stu/course/getJoinedCourse2": _encode(course_data),
+            "/stu/homework/getHomeworkList": _encode(
+                generate_homework_list(course_data)
+            ),
+        }
+
+    def revoke_tokens(self):
+        """使已发放的 token 全部失效"""
+        with self._lock:
+            self._token_version += 1
+            self.token = f"{TOKEN}-{self._token_version}"
+
+    def _page(self, query):
+        page = int(query["page"][0])
+        size = int(query.get("size", ["20"])[0])
+        items = self._homework_items[(page - 1) * size : page * size]
+        return _encode(
+            {"code": 2000, "msg": "成功", "data": items, "total": len(self._homework_items)}
+        )
+
+    def _count(self, path, status):
+        with self._lock:
+            key = f"{path} {status}"
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _inject(self):
+        """按配置注入延迟，返回是否注入错误"""
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头和响应体分两次写入，关闭 Nagle 算法避免与延迟确认叠加产生 40ms 延迟
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="application/json", etag=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server._count(self.path.split("?")[0], status)
+
+            def _fail(self):
+                self._send(server.error_status, b"")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                path = urlsplit(self.path).path
+                if server._inject():
+                    return self._fail()
+                if path == "/auth/login":
+                    return self._send(
+                        200,
+                        _encode(
+                            {"code": 2000, "msg": "成功", "data": {"token": server.token}}
+                        ),
+                    )
+                if path == "/feishu":
+                    return self._send(200, _encode({"code": 0, "msg": "success"}))
+                self._send(404, _encode({"code": 404, "msg": "not found"}))
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if server._inject():
+                    return self._fail()
+                if self.headers.get("Authorization") != f"Bearer {server.token}":
+                    return self._send(401, _encode({"code": 401, "msg": "未登录"}))
+                query = parse_qs(urlsplit(self.path).query)
+                if path == "/stu/homework/getHomeworkList" and "page" in query:
+                    return self._send(200, server._page(query))
+                body = server._bodies.get(path)
+                if body is None:
+                    return self._send(404, _encode({"code": 404, "msg": "not found"}))
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, etag=etag)
+                self._send(200, body, etag=etag)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-zxin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _encode(obj):
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟知新接口")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--homework", type=int, default=100, help="作业总数")
+    parser.add_argument("--latency", type=float, default=0.0, help="固定延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="错误概率")
+    parser.add_argument("--error-status", type=int, default=502, help="错误状态码")
+    args = parser.parse_args()
+
+    courses, per_course = split_size(args.homework)
+    server = MockZXinServer(
+        generate_course_data(courses, per_course),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        port=args.port,
+    )
+    print(f"模拟接口已启动: {server.url}，飞书 webhook: {server.feishu_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import datetime
+import random
+
+CATEGORIES = ["作业", "测验", "实验报告", "讨论"]
+TEACHERS = ["张老师", "李老师", "王老师", "赵老师", "刘老师"]
+
+
+def _iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def generate_course_data(
+    courses=10, homework_per_course=10, submitted_ratio=0.5, seed=0, now=None
+):
+    """
+    生成 /stu/course/getJoinedCourse2 格式的合成响应
+
+    截止时间分布在过去 30 天到未来 30 天之间，部分作业已提交并带有成绩。
+
+    Args:
+        courses: 课程数
+        homework_per_course: 每门课程的作业数
+        submitted_ratio: 已提交作业的比例
+        seed: 随机种子，相同参数生成相同数据
+        now: 基准时间，默认当前UTC时间
+
+    Returns:
+        响应字典
+    """
+    rng = random.Random(seed)
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    data = []
+    next_id = 1
+    for course_index in range(courses):
+        homework = []
+        for homework_index in range(homework_per_course):
+            end = now + datetime.timedelta(minutes=rng.randint(-30 * 1440, 30 * 1440))
+            records = []
+            if rng.random() < submitted_ratio:
+                records.append(
+                    {
+                        "answerProgress": rng.randint(1, 3),
+                        "correctProgress": rng.randint(0, 3),
+                        "finalScore": rng.choice([0, 60, 75, 88, 95, 100]),
+                        "lastAnswerTime": _iso(end - datetime.timedelta(hours=rng.randint(1, 72))),
+                    }
+                )
+            homework.append(
+                {
+                    "id": next_id,
+                    "title": f"第{homework_index + 1}次{rng.choice(CATEGORIES)}",
+                    "category": rng.choice(CATEGORIES),
+                    "starttime": _iso(end - datetime.timedelta(days=7)),
+                    "endtime": _iso(end),
+                    "studenthomework": records,
+                }
+            )
+            next_id += 1
+        data.append(
+            {
+                "course": {"id": course_index + 1, "name": f"课程{course_index + 1}"},
+                "teacher": {"user": {"nickname": rng.choice(TEACHERS)}},
+                "homework": homework,
+            }
+        )
+    return {"code": 2000, "msg": "成功", "data": data}
+
+
+def generate_homework_list(course_data):
+    """由课程数据生成 /stu/homework/getHomeworkList 格式的响应"""
+    items = [
+        dict(homework, course_name=course["course"]["name"])
+        for course in course_data["data"]
+        for homework in course["homework"]
+    ]
+    return {"code": 2000, "msg": "成功", "data": items}
+
+
+def generate_user(username="bench"):
+    """生成 /auth/user 格式的响应"""
+    return {
+        "code": 2000,
+        "msg": "成功",
+        "data": {
+            "username": username,
+            "nickname": "基准测试",
+            "email": "bench@example.com",
+            "sex": 1,
+            "userType": "student",
+            "college": {"name": "测试学院"},
+            "location": {"addr": "测试地址", "city": "测试市", "district": "测试区"},
+            "dormitory": {"bname": "1号楼"},
+            "student": [{"grade": "2024", "joinedClassrooms": [{"name": "1班"}]}],
+        },
+    }
+
+
+def split_size(total):
+    """将作业总数拆分为 (课程数, 每门课程作业数)，每门课程最多 50 个作业"""
+    per_course = min(50, max(1, total))
+    return max(1, -(-total // per_course)), per_course
@@ -0,0 +1,251 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_server import MockZXinServer
+from benchmarks.payloads import generate_course_data, split_size
+
+DEFAULT_SIZES = (1, 100, 1000, 10000)
+
+
+def measure(func, repeat, warmup=1):
+    """运行 func 若干次，返回耗时统计（秒）"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+class BenchmarkSuite:
+    """基于本地模拟接口的基准测试集合"""
+
+    def __init__(self, server, workdir, repeat=5, days_threshold=5):
+        # 在导入项目模块前配置环境，避免读写真实的 token 缓存、状态库和飞书机器人
+        os.environ["ZXIN_TOKEN_CACHE"] = os.path.join(workdir, "token_cache.json")
+        os.environ["ZXIN_STATE_DB"] = os.path.join(workdir, "state.db")
+        os.environ["ZXIN_OUTBOX_DB"] = os.path.join(workdir, "outbox.db")
+        os.environ["ZXIN_CACHE_DIR"] = ""
+        os.environ["FEISHU_BOT_URL"] = server.feishu_url
+        os.environ["FEISHU_BOT_SECRET"] = "bench"
+
+        from zxin_client import ZXinClient
+
+        ZXinClient.BASE_URL = server.url
+        self.server = server
+        self.workdir = workdir
+        self.repeat = repeat
+        self.days_threshold = days_threshold
+        self.results = []
+
+    def _record(self, name, size, stats):
+        stats = dict(name=name, size=size, **stats)
+        self.results.append(stats)
+        label = name if size is None else f"{name}[{size}]"
+        print(
+            f"{label:<32} median {stats['median'] * 1000:10.3f} ms  "
+            f"min {stats['min'] * 1000:10.3f} ms  max {stats['max'] * 1000:10.3f} ms"
+        )
+
+    def _output_dir(self, name):
+        path = os.path.join(self.workdir, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def bench_login(self):
+        from zxin_client import ZXinClient
+
+        client = ZXinClient("bench", "bench", self._output_dir("login"))
+        self._record("login", None, measure(client.login, self.repeat))
+
+    def bench_notify(self, items=50):
+        from notifier import NotificationDispatcher
+
+        dispatcher = NotificationDispatcher(min_interval=0)
+        sections = {
+            "即将截止作业": [
+                f"作业：《第{i}次作业》\n课程：课程{i}\n剩余时间：1天\n截止时间：2024-01-01 00:00:00"
+                for i in range(items)
+            ]
+        }
+
+        def dispatch():
+            dispatcher.dispatch("基准测试", sections)
+            dispatcher.wait()
+
+        self._record("notify", items, measure(dispatch, self.repeat))
+        dispatcher.close()
+
+    def bench_size(self, size):
+        """对指定作业总数运行与数据量相关的基准"""
+        from course_manager import CourseManager
+        from HomeworkReminder import HomeworkReminder
+        from score_manager import ScoreManager
+
+        courses, per_course = split_size(size)
+        course_data = generate_course_data(courses, per_course)
+        self.server.set_course_data(course_data)
+
+        reminder = HomeworkReminder(
+            "bench",
+            "bench",
+            self._output_dir(f"scan_{size}"),
+            export_json=False,
+        )
+        reminder.ensure_token()
+        endpoint = "/stu/course/getJoinedCourse2"
+
+        def fetch():
+            reminder.refresh(endpoint)
+
+        def fetch_stream():
+            for _ in reminder.stream_array(endpoint):
+                pass
+
+        self._record("fetch", size, measure(fetch, self.repeat))
+        self._record("fetch_stream", size, measure(fetch_stream, self.repeat))
+        self._record(
+            "scan_homework",
+            size,
+            measure(
+                lambda: reminder.scan_homework(self.days_threshold, course_data),
+                self.repeat,
+            ),
+        )
+
+        def scan_stream():
+            # 清空响应指纹，每次都完整解析课程数据
+            reminder.state.save_fingerprint(reminder.account, endpoint, {})
+            reminder.scan_homework(self.days_threshold, stream=True)
+
+        self._record("scan_homework_stream", size, measure(scan_stream, self.repeat))
+        self._record(
+            "scan_homework_unchanged",
+            size,
+            measure(lambda: reminder.scan_homework(self.days_threshold), self.repeat),
+        )
+        reminder.notifier.close()
+
+        course_manager = CourseManager(reminder)
+        score_manager = ScoreManager(reminder)
+        self._record(
+            "format_course_data",
+            size,
+            measure(lambda: course_manager._format_course_data(course_data), self.repeat),
+        )
+        self._record(
+            "format_score_data",
+            size,
+            measure(lambda: score_manager._format_score_data(course_data), self.repeat),
+        )
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """与之前保存的结果比较中位数"""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {
+            (item["name"], item["size"]): item for item in json.load(file)["results"]
+        }
+    print(f"\n与 {baseline_path} 比较（中位数，<1 表示变快）：")
+    for item in results:
+        old = baseline.get((item["name"], item["size"]))
+        if not old or not old["median"]:
+            continue
+        ratio = item["median"] / old["median"]
+        label = item["name"] if item["size"] is None else f"{item['name']}[{item['size']}]"
+        print(f"{label:<32} {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知新工具离线基准测试")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help="作业总数列表，逗号分隔",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟接口的固定延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟接口的错误概率")
+    parser.add_argument("--output", default=None, help="结果文件，默认保存到 bench_results/")
+    parser.add_argument("--compare", default=None, help="与之前的结果文件比较")
+    parser.add_argument(
+        "--verbose", action="store_true", help="在控制台输出项目日志（默认只输出错误）"
+    )
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    if not args.verbose:
+        import logging
+
+        import log_config
+
+        log_config.configure(console_level=logging.ERROR)
+
+    started = datetime.datetime.now()
+    with tempfile.TemporaryDirectory(prefix="zxin_bench_") as workdir, MockZXinServer(
+        latency=args.latency, error_rate=args.error_rate
+    ) as server:
+        suite = BenchmarkSuite(server, workdir, repeat=args.repeat)
+        suite.bench_login()
+        suite.bench_notify()
+        for size in sizes:
+            suite.bench_size(size)
+        server_stats = dict(server.stats)
+
+    report = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "commit": _git_commit(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "server_stats": server_stats,
+        },
+        "results": suite.results,
+    }
+    output = args.output or os.path.join(
+        "bench_results", f"bench_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        compare(suite.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
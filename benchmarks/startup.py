@@ -0,0 +1,107 @@
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各子命令实际需要导入的模块
+MODULES = {
+    "cli": "cli",
+    "user": "zxin_client",
+    "courses": "course_manager",
+    "scores": "score_manager",
+    "export": "course_manager",
+    "scan": "HomeworkReminder",
+}
+
+
+def importtime(module):
+    """
+    用 -X importtime 测量导入模块的耗时
+
+    Returns:
+        (总耗时微秒, [(自身耗时微秒, 模块名), ...] 按自身耗时降序)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        entries.append((int(self_us), name.strip()))
+        if name.strip() == module:
+            total = int(cumulative_us)
+    entries.sort(reverse=True)
+    return total, entries
+
+
+def wall_time(argv, repeat):
+    """启动子进程运行命令的墙钟时间（秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *argv], cwd=ROOT, capture_output=True, check=False
+        )
+        samples.append(time.perf_counter() - start)
+    return {"median": statistics.median(samples), "min": min(samples), "max": max(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命令行启动和模块导入耗时基准")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数")
+    parser.add_argument("--top", type=int, default=10, help="记录自身耗时最多的模块数")
+    parser.add_argument("--output", default=None, help="结果文件，默认保存到 bench_results/")
+    args = parser.parse_args()
+
+    started = datetime.datetime.now()
+    report = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+        },
+        "interpreter": wall_time(["-c", "pass"], args.repeat),
+        "cli_help": wall_time(["cli.py", "--help"], args.repeat),
+        "imports": {},
+    }
+    print(f"{'空解释器':<12} {report['interpreter']['median'] * 1000:8.1f} ms")
+    print(f"{'cli --help':<12} {report['cli_help']['median'] * 1000:8.1f} ms")
+
+    for command, module in MODULES.items():
+        runs = [importtime(module) for _ in range(args.repeat)]
+        totals = [total for total, _ in runs]
+        report["imports"][command] = {
+            "module": module,
+            "median_us": statistics.median(totals),
+            "min_us": min(totals),
+            "top_self_us": [
+                {"module": name, "self_us": self_us}
+                for self_us, name in runs[0][1][: args.top]
+            ],
+        }
+        print(f"{command:<12} import {module:<20} {statistics.median(totals) / 1000:8.1f} ms")
+
+    output = args.output or os.path.join(
+        "bench_results", f"startup_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+    print(f"\n结果已保存到 {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.mock_server import MockZXinServer
+
+ENDPOINT = "/stu/homework/getHomeworkList"
+
+
+def _logins(server):
+    return server.stats.get("/auth/login 200", 0)
+
+
+def run_concurrently(threads, func):
+    """在 threads 个线程中同时调用 func，返回 (耗时, 异常列表)"""
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def worker():
+        barrier.wait()
+        try:
+            func()
+        except Exception as e:
+            errors.append(repr(e))
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, errors
+
+
+def stress(server, threads, requests_per_thread, per_thread_session):
+    """
+    多个线程共享一个客户端，检查以下场景各只登录一次：
+    - cold：没有 token 时并发请求
+    - expiring：token 即将过期时并发请求
+    - revoked：服务端使 token 失效后并发请求（全部收到 401）
+    """
+    from zxin_client import ZXinClient
+
+    client = ZXinClient(
+        "stress",
+        "stress",
+        tempfile.mkdtemp(prefix="zxin_stress_"),
+        workers=threads,
+        per_thread_session=per_thread_session,
+    )
+
+    def requests_ok():
+        for _ in range(requests_per_thread):
+            data = client.api_request(ENDPOINT)
+            if not data or data.get("code") != 2000:
+                raise RuntimeError(f"请求失败: {data}")
+
+    def expire():
+        client.token_expires_at = time.time()
+
+    scenarios = [
+        ("cold", None),
+        ("expiring", expire),
+        ("revoked", server.revoke_tokens),
+    ]
+    results = []
+    for name, prepare in scenarios:
+        if prepare:
+            prepare()
+        before = _logins(server)
+        elapsed, errors = run_concurrently(threads, requests_ok)
+        logins = _logins(server) - before
+        results.append(
+            {
+                "scenario": name,
+                "threads": threads,
+                "requests": threads * requests_per_thread,
+                "logins": logins,
+                "errors": errors[:5],
+                "error_count": len(errors),
+                "elapsed": round(elapsed, 3),
+                "ok": logins == 1 and not errors,
+            }
+        )
+        print(
+            f"{name:<10} 线程 {threads}  请求 {threads * requests_per_thread:<6} "
+            f"登录 {logins} 次  错误 {len(errors)}  耗时 {elapsed:.3f}s"
+        )
+    client.transport.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="共享客户端的并发登录压力测试")
+    parser.add_argument("--threads", type=int, default=64, help="并发线程数")
+    parser.add_argument("--requests", type=int, default=5, help="每个线程的请求数")
+    parser.add_argument("--latency", type=float, default=0.05, help="模拟接口的固定延迟（秒）")
+    parser.add_argument(
+        "--per-thread-session", action="store_true", help="每个线程使用独立的 Session"
+    )
+    parser.add_argument("--output", default=None, help="结果文件（JSON）")
+    parser.add_argument("--verbose", action="store_true", help="在控制台输出项目日志")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        import logging
+
+        import log_config
+
+        log_config.configure(console_level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory(prefix="zxin_stress_") as workdir, MockZXinServer(
+        latency=args.latency
+    ) as server:
+        # 在创建客户端前配置环境，避免读写真实的 token 缓存
+        os.environ["ZXIN_TOKEN_CACHE"] = os.path.join(workdir, "token_cache.json")
+        os.environ["ZXIN_CACHE_DIR"] = ""
+        from zxin_client import ZXinClient
+
+        ZXinClient.BASE_URL = server.url
+        results = stress(server, args.threads, args.requests, args.per_thread_session)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=4)
+    failed = [item["scenario"] for item in results if not item["ok"]]
+    if failed:
+        print(f"\n失败的场景: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n所有场景均只登录一次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import json
+import os
+import smtplib
+import time
+from email.message import EmailMessage
+from email.utils import formatdate
+
+import requests
+
+from feishu import REQUEST_TIMEOUT, feishu_config, gen_sign
+
+# 飞书限流时返回的业务错误码
+RATE_LIMIT_CODES = {9499, 11232}
+
+
+class DeliveryError(Exception):
+    """
+    单次发送失败
+
+    Args:
+        reason: 失败原因
+        retryable: 是否可以重试（限流、5xx、网络错误），为 False 时直接标记为失败
+        retry_after: 服务端要求的等待秒数
+    """
+
+    def __init__(self, reason, retryable=True, retry_after=None):
+        super().__init__(reason)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def message_text(message):
+    """将消息的富文本段落转换为纯文本"""
+    return "\n".join(
+        "".join(element.get("text", "") for element in paragraph)
+        for paragraph in message["content"]
+    )
+
+
+class Channel:
+    """
+    通知渠道
+
+    send() 只发送一次，失败时抛出 DeliveryError，重试由发件箱负责。
+    消息格式为 {"title": 标题, "content": 飞书 post 段落列表}。
+    """
+
+    name = None
+    # 两次发送之间的最小间隔（秒）
+    min_interval = 0.0
+
+    def send(self, message, key):
+        """
+        发送一条消息
+
+        Args:
+            message: 消息
+            key: 幂等键，同一条消息重试时不变，接收方可据此去重
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FeishuChannel(Channel):
+    """飞书自定义机器人（签名校验），机器人限制为 5 次/秒"""
+
+    name = "feishu"
+
+    def __init__(self, webhook_url, secret, min_interval=0.25):
+        self.webhook_url = webhook_url
+        self.secret = secret
+        self.min_interval = min_interval
+        self.session = requests.Session()
+
+    def send(self, message, key):
+        timestamp = str(int(time.time()))
+        payload = {
+            "timestamp": timestamp,
+            "sign": gen_sign(self.secret, timestamp),
+            "msg_type": "post",
+            "content": {
+                "post": {"zh_cn": {"title": message["title"], "content": message["content"]}}
+            },
+        }
+        try:
+            response = self.session.post(
+                self.webhook_url,
+                headers={"Content-Type": "application/json"},
+                data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                timeout=REQUEST_TIMEOUT,
+            )
+        except requests.exceptions.RequestException as e:
+            raise DeliveryError(str(e)) from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise DeliveryError(f"HTTP {response.status_code}", retry_after=_retry_after(response))
+        try:
+            result = response.json()
+        except ValueError as e:
+            raise DeliveryError(f"响应不是有效的JSON: HTTP {response.status_code}") from e
+        code = result.get("code", result.get("StatusCode", 0))
+        if code in RATE_LIMIT_CODES:
+            raise DeliveryError(f"限流 {result.get('msg')}")
+        if code != 0:
+            # 签名错误、消息格式错误等，重试也不会成功
+            raise DeliveryError(f"{result}", retryable=False)
+
+    def close(self):
+        self.session.close()
+
+
+class WebhookChannel(Channel):
+    """
+    通用 webhook：POST JSON {"idempotency_key", "title", "text", "content"}，
+    幂等键同时放在 Idempotency-Key 请求头中，2xx 视为成功
+    """
+
+    name = "webhook"
+
+    def __init__(self, url, min_interval=0.0):
+        self.url = url
+        self.min_interval = min_interval
+        self.session = requests.Session()
+
+    def send(self, message, key):
+        body = {
+            "idempotency_key": key,
+            "title": message["title"],
+            "text": message_text(message),
+            "content": message["content"],
+        }
+        try:
+            response = self.session.post(
+                self.url,
+                headers={"Content-Type": "application/json", "Idempotency-Key": key},
+                data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+                timeout=REQUEST_TIMEOUT,
+            )
+        except requests.exceptions.RequestException as e:
+            raise DeliveryError(str(e)) from e
+        if response.status_code == 429 or response.status_code >= 500:
+            raise DeliveryError(f"HTTP {response.status_code}", retry_after=_retry_after(response))
+        if not 200 <= response.status_code < 300:
+            raise DeliveryError(f"HTTP {response.status_code}", retryable=False)
+
+    def close(self):
+        self.session.close()
+
+
+class SmtpChannel(Channel):
+    """通过 SMTP（通常是本机的邮件中继）发送纯文本邮件，Message-ID 由幂等键生成"""
+
+    name = "smtp"
+
+    def __init__(self, host, port, sender, recipients, username=None, password=None, starttls=False):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    def send(self, message, key):
+        email = EmailMessage()
+        email["Subject"] = message["title"]
+        email["From"] = self.sender
+        email["To"] = ", ".join(self.recipients)
+        email["Date"] = formatdate(localtime=True)
+        email["Message-ID"] = f"<{key}@zxin>"
+        email.set_content(message_text(message))
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=REQUEST_TIMEOUT) as smtp:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password or "")
+                smtp.send_message(email)
+        except smtplib.SMTPRecipientsRefused as e:
+            raise DeliveryError(f"收件人被拒绝: {e.recipients}", retryable=False) from e
+        except smtplib.SMTPResponseException as e:
+            # 4xx 为临时错误，5xx 为永久错误
+            raise DeliveryError(
+                f"SMTP {e.smtp_code} {e.smtp_error!r}", retryable=e.smtp_code < 500
+            ) from e
+        except (smtplib.SMTPException, OSError) as e:
+            raise DeliveryError(str(e)) from e
+
+
+def channels_from_env(webhook_url=None, secret=None, min_interval=0.25):
+    """
+    按环境变量创建已配置的通知渠道
+
+    - 飞书：FEISHU_BOT_URL、FEISHU_BOT_SECRET（参数优先）
+    - 通用 webhook：ZXIN_WEBHOOK_URL
+    - 邮件：ZXIN_SMTP_HOST、ZXIN_SMTP_PORT（默认 25）、ZXIN_SMTP_FROM、ZXIN_SMTP_TO（逗号分隔），
+      可选 ZXIN_SMTP_USER、ZXIN_SMTP_PASSWORD、ZXIN_SMTP_STARTTLS=1
+
+    Returns:
+        渠道列表
+    """
+    env_url, env_secret = feishu_config()
+    channels = []
+    webhook_url = webhook_url or env_url
+    secret = secret or env_secret
+    if webhook_url and secret:
+        channels.append(FeishuChannel(webhook_url, secret, min_interval))
+    if os.getenv("ZXIN_WEBHOOK_URL"):
+        channels.append(WebhookChannel(os.getenv("ZXIN_WEBHOOK_URL")))
+    recipients = [
+        address.strip() for address in os.getenv("ZXIN_SMTP_TO", "").split(",") if address.strip()
+    ]
+    if os.getenv("ZXIN_SMTP_HOST") and recipients:
+        channels.append(
+            SmtpChannel(
+                os.getenv("ZXIN_SMTP_HOST"),
+                int(os.getenv("ZXIN_SMTP_PORT") or 25),
+                os.getenv("ZXIN_SMTP_FROM") or "zxin@localhost",
+                recipients,
+                username=os.getenv("ZXIN_SMTP_USER"),
+                password=os.getenv("ZXIN_SMTP_PASSWORD"),
+                starttls=os.getenv("ZXIN_SMTP_STARTTLS") == "1",
+            )
+        )
+    return channels
@@ -0,0 +1,340 @@
+import argparse
+import sys
+
+# 各子命令在执行时才导入所需模块，--help 和参数错误时不会加载 requests、数据库和导出模块
+
+DEFAULT_EXPORT_FORMATS = "text,csv,ndjson,markdown"
+
+
+def _storage(args):
+    """按命令行参数创建输出文件存储，未指定的参数读取环境变量（需在导入 zxin_client 加载 .env 之后调用）"""
+    import os
+
+    from storage import Storage
+
+    username = args.username or os.getenv("ZXIN_USERNAME")
+    return Storage.from_env(
+        args.output_dir,
+        username,
+        format=args.storage_format,
+        namespace=username if args.per_account else None,
+    )
+
+
+def _client(args):
+    """创建客户端并确保已登录，失败时返回 None"""
+    from zxin_client import ZXinClient
+
+    client = ZXinClient(args.username, args.password, args.output_dir, storage=_storage(args))
+    if not client.ensure_token():
+        client.logger.error("获取token失败")
+        return None
+    return client
+
+
+def cmd_user(args):
+    client = _client(args)
+    return bool(client and client.get_user_info())
+
+
+def cmd_courses(args):
+    from course_manager import CourseManager
+
+    client = _client(args)
+    return bool(client and CourseManager(client).process_course_data())
+
+
+def cmd_scores(args):
+    from score_manager import ScoreManager
+
+    client = _client(args)
+    return bool(client and ScoreManager(client).process_score_data())
+
+
+def cmd_export(args):
+    from course_manager import CourseManager
+
+    client = _client(args)
+    if not client:
+        return False
+    return CourseManager(client).export(formats=args.format) is not None
+
+
+def cmd_homework(args):
+    import datetime
+    import json
+
+    from HomeworkReminder import HomeworkReminder
+    from models import BEIJING_TZ
+    from streaming import StreamError
+
+    reminder = HomeworkReminder(
+        args.username, args.password, args.output_dir, storage=_storage(args)
+    )
+    since = _datetime(args.since)
+    if since is None and args.days is not None:
+        since = datetime.datetime.now(BEIJING_TZ) - datetime.timedelta(days=args.days)
+    try:
+        for item in reminder.iter_homework_list(
+            since, _datetime(args.until), args.page_size, args.prefetch
+        ):
+            print(json.dumps(item, ensure_ascii=False))
+    except StreamError as e:
+        reminder.logger.error(f"作业列表读取失败: {e}")
+        return False
+    finally:
+        reminder.notifier.close()
+    return True
+
+
+def cmd_scan(args):
+    from HomeworkReminder import HomeworkReminder
+
+    reminder = HomeworkReminder(
+        args.username,
+        args.password,
+        args.output_dir,
+        export_json=False if args.no_export_json else None,
+        reminder_tiers=args.tiers,
+        storage=_storage(args),
+    )
+    try:
+        return reminder.scan_homework(args.days, stream=args.stream) is not None
+    finally:
+        reminder.notifier.close()
+
+
+def _export_formats(value):
+    """解析逗号分隔的导出格式，不支持的格式作为参数错误报告"""
+    from exporters import WRITERS
+
+    formats = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in WRITERS]
+    if not formats:
+        raise argparse.ArgumentTypeError(f"至少指定一种导出格式，可选 {', '.join(WRITERS)}")
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"不支持的导出格式: {', '.join(unknown)}，可选 {', '.join(WRITERS)}"
+        )
+    return formats
+
+
+def _datetime(value):
+    """解析 ISO 格式时间，未指定时区时按北京时间"""
+    import datetime
+
+    from models import BEIJING_TZ
+
+    if value is None:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=BEIJING_TZ)
+    return parsed
+
+
+def _timestamp(value):
+    """将 ISO 格式时间（未指定时区时按北京时间）转换为时间戳"""
+    parsed = _datetime(value)
+    return None if parsed is None else parsed.timestamp()
+
+
+def _format_timestamp(timestamp):
+    import datetime
+
+    from models import BEIJING_TZ
+
+    return datetime.datetime.fromtimestamp(timestamp, BEIJING_TZ).isoformat(timespec="seconds")
+
+
+def cmd_history(args):
+    import json
+    import os
+
+    from score_archive import archive_dir, open_archive
+
+    archive = open_archive(
+        archive_dir(args.output_dir), args.username or os.getenv("ZXIN_USERNAME")
+    )
+    since, until = _timestamp(args.since), _timestamp(args.until)
+    if args.homework:
+        result = [
+            {"time": _format_timestamp(timestamp), "value": value}
+            for timestamp, value in archive.history(
+                args.homework, since, until, field=args.field or None
+            )
+        ]
+    elif args.at:
+        result = archive.state_at(_timestamp(args.at))
+    elif since is not None or until is not None:
+        result = [
+            {
+                "time": _format_timestamp(change.timestamp),
+                "homework_id": change.homework_id,
+                "kind": change.kind,
+                "old": change.old,
+                "new": change.new,
+            }
+            for change in archive.changes(since, until)
+        ]
+    else:
+        result = archive.stats()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result is not None
+
+
+def cmd_stats(args):
+    import json
+
+    from score_analytics import ScoreTable
+    from score_archive import archive_dir
+
+    table = ScoreTable.from_archives(archive_dir(args.output_dir), _timestamp(args.at))
+    report = {
+        "overview": table.overview(),
+        "courses": table.course_stats(
+            by_account=args.by_account, zero_as_ungraded=args.zero_as_ungraded
+        ).records(),
+        "ranking": table.account_ranking(
+            course=args.course, zero_as_ungraded=args.zero_as_ungraded
+        ).records(),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return len(table) > 0
+
+
+def cmd_outbox(args):
+    import json
+
+    from notifier import NotificationDispatcher
+    from outbox import Outbox, default_path
+
+    outbox = Outbox(default_path(args.output_dir))
+    if args.retry_failed:
+        count = outbox.requeue(args.channel)
+        print(f"已将 {count} 条失败的消息重新加入发送队列", file=sys.stderr)
+    if args.deliver:
+        # 创建发送器时会启动有待发送消息的渠道，关闭时等待发送完成
+        NotificationDispatcher(outbox=outbox, drain_timeout=args.timeout).close()
+    report = {"stats": outbox.stats()}
+    if args.list is not None:
+        report["deliveries"] = outbox.deliveries(args.list or None, args.limit)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return True
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="zxin", description="知新2.0命令行工具")
+    parser.add_argument("-o", "--output-dir", default="output", help="输出目录")
+    parser.add_argument("-u", "--username", default=None, help="账号，默认读取 ZXIN_USERNAME")
+    parser.add_argument("-p", "--password", default=None, help="密码，默认读取 ZXIN_PASSWORD")
+    parser.add_argument(
+        "--storage-format",
+        choices=("json", "pretty", "gzip", "msgpack"),
+        default=None,
+        help="JSON 数据文件的编码格式，默认读取 ZXIN_STORAGE_FORMAT（默认紧凑 json）",
+    )
+    parser.add_argument(
+        "--per-account", action="store_true", help="导出文件按账号保存在输出目录的子目录下"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("user", help="获取用户信息").set_defaults(func=cmd_user)
+    subparsers.add_parser("courses", help="获取课程数据并保存为 JSON 和文本").set_defaults(
+        func=cmd_courses
+    )
+    subparsers.add_parser("scores", help="获取成绩信息并保存为文本").set_defaults(
+        func=cmd_scores
+    )
+
+    export = subparsers.add_parser("export", help="一次遍历导出多种格式的课程数据")
+    export.add_argument(
+        "-f",
+        "--format",
+        type=_export_formats,
+        default=DEFAULT_EXPORT_FORMATS,
+        help="导出格式，逗号分隔，可选 text、score_text、csv、ndjson、markdown",
+    )
+    export.set_defaults(func=cmd_export)
+
+    history = subparsers.add_parser(
+        "history", help="查询成绩归档：作业成绩变化、时间段内的变化或某一时刻的成绩"
+    )
+    history.add_argument("--homework", default=None, help="作业ID，查询该作业的成绩变化")
+    history.add_argument(
+        "--field", default="final_score", help="查询作业时的字段，空字符串表示整条记录"
+    )
+    history.add_argument("--at", default=None, help="查询某一时刻的成绩快照")
+    history.add_argument("--since", default=None, help="起始时间，如 2024-03-01 或 2024-03-01T08:00")
+    history.add_argument("--until", default=None, help="结束时间")
+    history.set_defaults(func=cmd_history)
+
+    stats = subparsers.add_parser(
+        "stats", help="根据成绩归档统计各课程成绩并对账号排名（需要 numpy）"
+    )
+    stats.add_argument("--by-account", action="store_true", help="按账号和课程分组统计")
+    stats.add_argument("--course", default=None, help="只按该课程的成绩排名")
+    stats.add_argument("--at", default=None, help="使用某一时刻的成绩快照，默认最新")
+    stats.add_argument(
+        "--zero-as-ungraded", action="store_true", help="已提交的0分视为未评分，不计入平均值等统计"
+    )
+    stats.set_defaults(func=cmd_stats)
+
+    homework = subparsers.add_parser(
+        "homework", help="分页读取作业列表，按截止时间从新到旧逐行输出 JSON"
+    )
+    homework.add_argument("--since", default=None, help="截止时间下限，早于该时间后停止读取")
+    homework.add_argument("--until", default=None, help="截止时间上限")
+    homework.add_argument("--days", type=int, default=None, help="只读取截止时间在最近若干天内及之后的作业")
+    homework.add_argument("--page-size", type=int, default=50, help="每页条目数")
+    homework.add_argument("--prefetch", type=int, default=2, help="预取的最多页数")
+    homework.set_defaults(func=cmd_homework)
+
+    scan = subparsers.add_parser("scan", help="扫描作业并发送提醒")
+    scan.add_argument("-d", "--days", type=int, default=5, help="提前多少天提醒")
+    scan.add_argument("--tiers", default=None, help='提醒档位，如 "5d,1d,2h"')
+    scan.add_argument("--stream", action="store_true", help="流式解析课程数据")
+    scan.add_argument(
+        "--no-export-json", action="store_true", help="不导出 all_homework.json 等文件"
+    )
+    scan.set_defaults(func=cmd_scan)
+
+    outbox = subparsers.add_parser("outbox", help="查看通知发件箱的送达状态，重新发送失败的通知")
+    outbox.add_argument(
+        "--list",
+        nargs="?",
+        const="",
+        default=None,
+        choices=("", "pending", "sent", "failed"),
+        help="列出送达记录，可按状态筛选",
+    )
+    outbox.add_argument("--limit", type=int, default=50, help="列出的最多条数")
+    outbox.add_argument("--retry-failed", action="store_true", help="将失败的消息重新加入发送队列")
+    outbox.add_argument("--channel", default=None, help="只重新发送该渠道（feishu/webhook/smtp）")
+    outbox.add_argument("--deliver", action="store_true", help="立即发送发件箱中未送达的消息")
+    outbox.add_argument("--timeout", type=float, default=60, help="--deliver 时等待发送完成的最长秒数")
+    outbox.set_defaults(func=cmd_outbox)
+    return parser
+
+
+def main(argv=None):
+    import sqlite3
+
+    args = build_parser().parse_args(argv)
+    try:
+        ok = args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except (ValueError, OSError, ImportError, sqlite3.Error) as e:
+        # 参数值错误（如时间格式）、文件读写失败、缺少可选依赖等预期错误只输出一行说明
+        print(f"zxin {args.command}: 错误: {e}", file=sys.stderr)
+        return 1
+    finally:
+        import metrics
+
+        metrics.export_run(args.output_dir)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
+import io
 from zxin_client import ZXinClient
 from log_config import setup_logger
+from exporters import CourseTextWriter, export_files, export_rows, iter_rows
 
 
 class CourseManager:
@@ -36,9 +38,13 @@ class CourseManager:
         if course_data["msg"] == "成功":
             self.logger.info("即将开始解析课程数据")
 
-            formatted_data = self._format_course_data(course_data)
-
-            self.client.save_text(formatted_data, "course_data.txt")
+            filepath, changed = export_files(
+                course_data, self.client.storage.directory, {"text": "course_data.txt"}
+            )["text"]
+            if changed:
+                self.logger.info(f"保存文本成功，已保存到 {filepath} 文件中")
+            else:
+                self.logger.info(f"文本未变化，跳过写入 {filepath}")
 
             self.logger.info("课程数据解析完成")
             self.logger.info("课程数据程序运行结束")
@@ -48,30 +54,37 @@ class CourseManager:
             self.logger.error("课程数据获取失败")
             return False
 
+    def export(self, course_data=None, formats=("text", "csv", "ndjson", "markdown")):
+        """
+        一次遍历课程数据，同时导出多种格式
+
+        Args:
+            course_data: 课程数据，为空时自动获取
+            formats: 导出格式，可选值见 exporters.WRITERS
+
+        Returns:
+            {格式名: 文件路径}，没有数据时返回 None
+        """
+        if not course_data:
+            course_data = self.fetch_course_data()
+        if not course_data:
+            self.logger.error("没有可导出的课程数据")
+            return None
+
+        results = export_files(
+            course_data, self.client.storage.directory, {name: None for name in formats}
+        )
+        paths = {}
+        for name, (filepath, changed) in results.items():
+            if changed:
+                self.logger.info(f"导出 {name} 格式成功，已保存到 {filepath} 文件中")
+            else:
+                self.logger.info(f"{name} 格式内容未变化，跳过写入 {filepath}")
+            paths[name] = filepath
+        return paths
+
     def _format_course_data(self, course_data):
         """将课程数据格式化为文本格式"""
-        formatted_text = ""
-
-        for course in course_data["data"]:
-            for homework in course["homework"]:
-                formatted_text += f"课程名称: {course['course']['name']}\n"
-                formatted_text += f"课程老师: {course['teacher']['user']['nickname']}\n"
-                formatted_text += f"作业标题: {homework['title']}\n"
-                formatted_text += f"作业类型: {homework['category']}\n"
-                formatted_text += f"开始时间: {homework['starttime']}\n"
-                formatted_text += f"截止时间: {homework['endtime']}\n"
-
-                if homework["studenthomework"]:
-                    student_hw = homework["studenthomework"][0]
-                    formatted_text += f"作答次数: {student_hw['answerProgress']}\n"
-                    formatted_text += f"正确次数: {student_hw['correctProgress']}\n"
-                    formatted_text += f"最终得分: {student_hw['finalScore']} (若已提交显示0分可能是教师未评分)\n"
-                    formatted_text += f"最后作答时间: {student_hw['lastAnswerTime']}\n"
-                else:
-                    formatted_text += "暂未作答，无相关数据\n"
-
-                formatted_text += (
-                    "----------------------------------------------------------------\n"
-                )
-
-        return formatted_text
+        buffer = io.StringIO()
+        export_rows(iter_rows(course_data), [CourseTextWriter(buffer)])
+        return buffer.getvalue()
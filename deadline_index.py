@@ -0,0 +1,109 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+_UNITS = {"d": (86400, "天"), "h": (3600, "小时"), "m": (60, "分钟")}
+
+
+@dataclass(frozen=True)
+class ReminderTier:
+    """提醒档位：截止前 seconds 秒内提醒一次"""
+
+    seconds: int
+    label: str
+
+    @property
+    def kind(self):
+        """在提醒记录中使用的通知类型"""
+        return f"tier:{self.seconds}"
+
+
+def parse_tiers(spec):
+    """
+    解析提醒档位配置
+
+    Args:
+        spec: 逗号分隔的档位，如 "5d,1d,2h"，单位支持 d（天）、h（小时）、m（分钟）
+
+    Returns:
+        按时长从大到小排列的 ReminderTier 列表
+    """
+    tiers = {}  # {秒数: 档位}，时长相同的档位（如 1d 和 24h）只保留先出现的一个
+    for part in spec.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part[-1] not in _UNITS or not part[:-1].isdigit():
+            raise ValueError(f"无效的提醒档位: {part}")
+        seconds, unit_label = _UNITS[part[-1]]
+        amount = int(part[:-1])
+        tiers.setdefault(amount * seconds, ReminderTier(amount * seconds, f"{amount}{unit_label}"))
+    return sorted(tiers.values(), key=lambda tier: tier.seconds, reverse=True)
+
+
+def default_tiers(days_threshold):
+    """默认档位：提前 days_threshold 天、1天、2小时，超过 days_threshold 的档位不使用"""
+    tiers = parse_tiers(f"{days_threshold}d,1d,2h")
+    return [tier for tier in tiers if tier.seconds <= days_threshold * 86400]
+
+
+class DeadlineIndex:
+    """
+    按截止时间排序的作业索引
+
+    使用有序数组和二分查找，"某段时间内截止" 的查询为 O(log n + k)。
+    """
+
+    def __init__(self, items=()):
+        """
+        Args:
+            items: (截止时间戳, 作业ID) 的可迭代对象
+        """
+        self._items = sorted(items)
+        self._keys = [item[0] for item in self._items]
+
+    def __len__(self):
+        return len(self._items)
+
+    def due_within(self, now, seconds):
+        """返回在 [now, now + seconds] 内截止的 (截止时间戳, 作业ID)"""
+        lo = bisect_left(self._keys, now)
+        hi = bisect_right(self._keys, now + seconds)
+        return self._items[lo:hi]
+
+    def next_due(self, now):
+        """返回 now 之后最早截止的 (截止时间戳, 作业ID)，没有时返回 None"""
+        index = bisect_left(self._keys, now)
+        return self._items[index] if index < len(self._items) else None
+
+    def assign_tiers(self, now, tiers):
+        """
+        计算每个作业当前所处的最小档位
+
+        Args:
+            now: 当前时间戳
+            tiers: ReminderTier 列表
+
+        Returns:
+            {作业ID: ReminderTier}
+        """
+        result = {}
+        for tier in sorted(tiers, key=lambda t: t.seconds, reverse=True):
+            for _, homework_id in self.due_within(now, tier.seconds):
+                result[homework_id] = tier
+        return result
+
+    def next_crossing(self, now, tiers):
+        """
+        下一次有作业进入某个档位的时间戳
+
+        Returns:
+            时间戳，之后没有作业会再进入任何档位时返回 None
+        """
+        crossing = None
+        for tier in tiers:
+            index = bisect_right(self._keys, now + tier.seconds)
+            if index < len(self._keys):
+                candidate = self._keys[index] - tier.seconds
+                if crossing is None or candidate < crossing:
+                    crossing = candidate
+        return crossing
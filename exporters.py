@@ -0,0 +1,227 @@
+import csv
+import json
+import os
+
+from metrics import stage
+from storage import replace_if_changed, temp_file
+from models import parse_courses
+
+SEPARATOR = "----------------------------------------------------------------\n"
+
+# 导出行的字段，顺序即 CSV/Markdown 的列顺序
+FIELDS = [
+    "course_name",
+    "teacher",
+    "title",
+    "category",
+    "starttime",
+    "endtime",
+    "submitted",
+    "answerProgress",
+    "correctProgress",
+    "finalScore",
+    "lastAnswerTime",
+]
+
+# 已注册的导出格式：{格式名: (写入器类, 默认扩展名)}
+WRITERS = {}
+
+
+def register_writer(name, extension):
+    """注册导出格式的装饰器"""
+
+    def decorator(cls):
+        WRITERS[name] = (cls, extension)
+        cls.format_name = name
+        return cls
+
+    return decorator
+
+
+def iter_rows(course_data):
+    """遍历课程数据，每个作业生成一行扁平的导出数据"""
+    for course in parse_courses(course_data):
+        for homework in course.homework:
+            student = homework.student
+            yield {
+                "course_name": course.name,
+                "teacher": course.teacher.nickname,
+                "title": homework.title,
+                "category": homework.category,
+                "starttime": homework.starttime,
+                "endtime": homework.endtime,
+                "submitted": homework.submitted,
+                "answerProgress": student and student.answer_progress,
+                "correctProgress": student and student.correct_progress,
+                "finalScore": student and student.final_score,
+                "lastAnswerTime": student and student.last_answer_time,
+            }
+
+
+class ExportWriter:
+    """导出写入器基类，直接写入文件句柄"""
+
+    format_name = None
+
+    def __init__(self, file):
+        self.file = file
+
+    def begin(self):
+        """写入文件头"""
+
+    def write_row(self, row):
+        raise NotImplementedError
+
+    def end(self):
+        """写入文件尾"""
+
+
+@register_writer("text", "txt")
+class CourseTextWriter(ExportWriter):
+    """课程数据文本格式（course_data.txt）"""
+
+    def write_row(self, row):
+        lines = [
+            f"课程名称: {row['course_name']}\n",
+            f"课程老师: {row['teacher']}\n",
+            f"作业标题: {row['title']}\n",
+            f"作业类型: {row['category']}\n",
+            f"开始时间: {row['starttime']}\n",
+            f"截止时间: {row['endtime']}\n",
+        ]
+        if row["submitted"]:
+            lines += [
+                f"作答次数: {row['answerProgress']}\n",
+                f"正确次数: {row['correctProgress']}\n",
+                f"最终得分: {row['finalScore']} (若已提交显示0分可能是教师未评分)\n",
+                f"最后作答时间: {row['lastAnswerTime']}\n",
+            ]
+        else:
+            lines.append("暂未作答，无相关数据\n")
+        lines.append(SEPARATOR)
+        self.file.writelines(lines)
+
+
+@register_writer("score_text", "txt")
+class ScoreTextWriter(ExportWriter):
+    """成绩数据文本格式（score_info.txt）"""
+
+    def write_row(self, row):
+        lines = [
+            f"课程名称: {row['course_name']}\n",
+            f"作业标题: {row['title']}\n",
+            f"课程老师: {row['teacher']}\n",
+        ]
+        if row["submitted"]:
+            lines.append(
+                f"最终得分: {row['finalScore']}（若已提交显示0分可能是教师未评分）\n"
+            )
+        else:
+            lines.append("暂未作答，无相关成绩数据\n")
+        lines.append(SEPARATOR)
+        self.file.writelines(lines)
+
+
+@register_writer("csv", "csv")
+class CSVWriter(ExportWriter):
+    """CSV 格式，文件需以 newline="" 打开"""
+
+    def begin(self):
+        self._writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+        self._writer.writeheader()
+
+    def write_row(self, row):
+        self._writer.writerow(row)
+
+
+@register_writer("ndjson", "ndjson")
+class NDJSONExportWriter(ExportWriter):
+    """每行一个JSON对象"""
+
+    def write_row(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False))
+        self.file.write("\n")
+
+
+@register_writer("markdown", "md")
+class MarkdownWriter(ExportWriter):
+    """Markdown 表格"""
+
+    @staticmethod
+    def _cell(value):
+        text = "" if value is None else str(value)
+        return text.replace("|", "\\|").replace("\n", " ")
+
+    def begin(self):
+        self.file.write("| " + " | ".join(FIELDS) + " |\n")
+        self.file.write("|" + " --- |" * len(FIELDS) + "\n")
+
+    def write_row(self, row):
+        cells = (self._cell(row[field]) for field in FIELDS)
+        self.file.write("| " + " | ".join(cells) + " |\n")
+
+
+def export_rows(rows, writers):
+    """遍历一次数据行，同时写入所有写入器，返回写入的行数"""
+    for writer in writers:
+        writer.begin()
+    count = 0
+    for row in rows:
+        for writer in writers:
+            writer.write_row(row)
+        count += 1
+    for writer in writers:
+        writer.end()
+    return count
+
+
+def export_files(course_data, output_dir, targets):
+    """
+    一次遍历课程数据，将多种格式分别写入文件
+
+    Args:
+        course_data: getJoinedCourse2 接口的响应
+        output_dir: 输出目录
+        targets: {格式名: 文件名}，文件名为空时使用 course_data.<扩展名>
+
+    Returns:
+        {格式名: (文件路径, 是否实际写入)}
+
+    每个文件先写入同目录下唯一的临时文件，全部写完后再替换，内容与已有文件相同的不替换
+    """
+    paths, files, writers = {}, [], []
+    changed = {}
+    pending = []  # 尚未替换目标文件的临时文件，出错时全部删除
+    try:
+        for name, filename in targets.items():
+            if name not in WRITERS:
+                raise ValueError(f"不支持的导出格式: {name}")
+            writer_cls, extension = WRITERS[name]
+            filepath = os.path.join(output_dir, filename or f"course_data.{extension}")
+            fd, tmp_path = temp_file(filepath)
+            pending.append(tmp_path)
+            try:
+                file = open(fd, "w", encoding="utf-8", newline="")
+            except BaseException:
+                os.close(fd)
+                raise
+            files.append((name, file, tmp_path, filepath))
+            writers.append(writer_cls(file))
+            paths[name] = filepath
+        with stage("export"):
+            export_rows(iter_rows(course_data), writers)
+        for _, file, _, _ in files:
+            file.close()
+        for name, _, tmp_path, filepath in files:
+            changed[name] = replace_if_changed(tmp_path, filepath)
+            pending.remove(tmp_path)
+    except BaseException:
+        for _, file, _, _ in files:
+            file.close()
+        for tmp_path in pending:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
+    return {name: (filepath, changed[name]) for name, filepath in paths.items()}
@@ -10,6 +10,23 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# 单次请求超时时间（秒）
+REQUEST_TIMEOUT = 10
+
+
+def feishu_config():
+    """读取飞书机器人配置，返回 (webhook地址, 签名密钥)"""
+    return os.environ.get("FEISHU_BOT_URL"), os.environ.get("FEISHU_BOT_SECRET")
+
+
+def gen_sign(secret: str, timestamp: str) -> str:
+    """根据时间戳和密钥计算飞书签名"""
+    string_to_sign = f"{timestamp}\n{secret}"
+    hmac_code = hmac.new(
+        string_to_sign.encode("utf-8"), digestmod=hashlib.sha256
+    ).digest()
+    return base64.b64encode(hmac_code).decode("utf-8")
+
 
 def feishu(title: str, content: str) -> dict:
     """
@@ -25,8 +42,7 @@ def feishu(title: str, content: str) -> dict:
         dict: 接口返回结果
     """
     # 读取环境变量
-    FEISHU_BOT_URL = os.environ.get("FEISHU_BOT_URL")
-    FEISHU_BOT_SECRET = os.environ.get("FEISHU_BOT_SECRET")
+    FEISHU_BOT_URL, FEISHU_BOT_SECRET = feishu_config()
 
     if not FEISHU_BOT_URL or not FEISHU_BOT_SECRET:
         logging.error("飞书webhook未配置")
@@ -37,11 +53,7 @@ def feishu(title: str, content: str) -> dict:
     timestamp = str(int(time.time()))
 
     # 计算签名
-    string_to_sign = f"{timestamp}\n{feishu_secret}"
-    hmac_code = hmac.new(
-        string_to_sign.encode("utf-8"), digestmod=hashlib.sha256
-    ).digest()
-    sign = base64.b64encode(hmac_code).decode("utf-8")
+    sign = gen_sign(feishu_secret, timestamp)
 
     # 构建请求头
     headers = {"Content-Type": "application/json"}
@@ -66,7 +78,12 @@ def feishu(title: str, content: str) -> dict:
         if not isinstance(feishu_webhook, str):
             logging.error(f"飞书webhook未配置")
             return {"error": "飞书webhook未配置"}
-        response = requests.post(feishu_webhook, headers=headers, data=json.dumps(msg))
+        response = requests.post(
+            feishu_webhook,
+            headers=headers,
+            data=json.dumps(msg),
+            timeout=REQUEST_TIMEOUT,
+        )
         logging.info(f"飞书发送通知消息成功🎉\n{response.json()}")
         return response.json()
     except Exception as e:
@@ -0,0 +1,375 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from log_config import setup_logger
+from multi_account_scanner import load_accounts
+from score_archive import score_snapshot
+from score_manager import ScoreManager
+from storage import safe_name
+from token_cache import TokenCache
+from zxin_client import ZXinClient
+
+logger = setup_logger("Gateway")
+
+GATEWAY_REQUESTS = metrics.REGISTRY.counter(
+    "zxin_gateway_requests_total", "网关请求次数（按资源和缓存状态）", ("resource", "cache")
+)
+GATEWAY_UPSTREAM = metrics.REGISTRY.counter(
+    "zxin_gateway_upstream_total", "网关回源次数（按资源和结果）", ("resource", "result")
+)
+
+
+class UpstreamError(Exception):
+    """回源请求失败"""
+
+
+class SingleFlight:
+    """相同键的并发调用合并为一次，其余调用等待并共享结果或异常"""
+
+    class _Call:
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        执行 fn 并返回结果，同一时刻相同 key 只执行一次
+
+        Returns:
+            (结果, 是否为本次调用执行)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, False
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, True
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+
+class CacheEntry:
+    """缓存的资源，响应体预先编码"""
+
+    __slots__ = ("body", "etag", "fetched_at")
+
+    def __init__(self, value):
+        self.body = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+        self.fetched_at = time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class AccountSession:
+    """单个账号的客户端和成绩管理器，客户端由处理请求和后台刷新的线程共享"""
+
+    def __init__(self, username, password, output_dir, workers, token_cache=None):
+        self.client = ZXinClient(
+            username, password, output_dir, workers=workers, token_cache=token_cache
+        )
+        self.scores = ScoreManager(self.client)
+
+    def request(self, endpoint):
+        """跳过客户端缓存请求接口，失败时抛出 UpstreamError"""
+        data = self.client.refresh(endpoint)
+        if not data or data.get("code", 2000) != 2000:
+            message = (data or {}).get("msg") or "请求失败"
+            raise UpstreamError(f"{endpoint}: {message}")
+        return data
+
+
+class Gateway:
+    """
+    本地缓存网关
+
+    多个使用方通过网关读取同一账号的数据：
+    - 缓存未过期（ttl 内）时直接返回
+    - 过期但未超过 stale_ttl 时返回旧数据，同时在后台刷新（stale-while-revalidate）
+    - 没有缓存或超过 stale_ttl 时同步回源，并发的相同请求只回源一次（single-flight）
+
+    上游请求量只与账号数和刷新频率有关，与使用方数量无关。
+    """
+
+    RESOURCES = ("user", "courses", "scores", "homework")
+    ENDPOINTS = {
+        "user": "/auth/user",
+        "courses": "/stu/course/getJoinedCourse2",
+        "homework": "/stu/homework/getHomeworkList",
+    }
+
+    def __init__(self, accounts, output_root="output", ttl=60, stale_ttl=600, refresh_workers=4):
+        """
+        Args:
+            accounts: 账号列表，每项包含 username 和 password
+            output_root: 输出根目录，每个账号使用其下的子目录
+            ttl: 缓存新鲜时间（秒）
+            stale_ttl: 缓存最长可用时间（秒），超过 ttl 但未超过该时间时返回旧数据并后台刷新
+            refresh_workers: 后台刷新线程数
+        """
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        # 所有账号共享一个 token 缓存，同一缓存文件只有一个对象读写
+        token_cache = TokenCache()
+        self.sessions = {
+            account["username"]: AccountSession(
+                account["username"],
+                account["password"],
+                os.path.join(output_root, safe_name(account["username"])),
+                # 每个资源同一时刻最多一个回源请求
+                len(self.RESOURCES),
+                token_cache,
+            )
+            for account in accounts
+        }
+        self.default_account = next(iter(self.sessions), None)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refresher = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="gateway-refresh"
+        )
+
+    def close(self):
+        self._refresher.shutdown(wait=False)
+
+    def _load(self, account, resource):
+        """回源获取资源"""
+        session = self.sessions[account]
+        if resource == "scores":
+            # 成绩从课程数据中提取，与 /courses 共享缓存和回源
+            course_data, _ = self.get(account, "courses")
+            return score_snapshot(json.loads(course_data.body))
+        data = session.request(self.ENDPOINTS[resource])
+        if resource == "courses":
+            session.scores.archive_scores(data)
+        return data
+
+    def _fetch(self, account, resource):
+        """回源并更新缓存，相同资源的并发回源只执行一次"""
+
+        def load():
+            try:
+                entry = CacheEntry(self._load(account, resource))
+            except Exception:
+                GATEWAY_UPSTREAM.inc(resource=resource, result="error")
+                raise
+            GATEWAY_UPSTREAM.inc(resource=resource, result="ok")
+            with self._lock:
+                self._entries[(account, resource)] = entry
+            return entry
+
+        entry, _ = self._flight.do((account, resource), load)
+        return entry
+
+    def _refresh_in_background(self, account, resource):
+        if self._flight.in_flight((account, resource)):
+            return
+
+        def refresh():
+            try:
+                self._fetch(account, resource)
+            except Exception as e:
+                logger.warning(f"后台刷新 {account} 的 {resource} 失败: {e}")
+
+        self._refresher.submit(refresh)
+
+    def get(self, account, resource):
+        """
+        读取资源
+
+        Returns:
+            (CacheEntry, 缓存状态 HIT/STALE/MISS)
+
+        Raises:
+            KeyError: 账号或资源不存在
+            UpstreamError: 没有可用缓存且回源失败
+        """
+        if account not in self.sessions or resource not in self.RESOURCES:
+            raise KeyError(f"{account}/{resource}")
+        with self._lock:
+            entry = self._entries.get((account, resource))
+
+        if entry is not None:
+            age = entry.age
+            if age < self.ttl:
+                return entry, "HIT"
+            if age < self.stale_ttl:
+                self._refresh_in_background(account, resource)
+                return entry, "STALE"
+
+        try:
+            return self._fetch(account, resource), "MISS"
+        except Exception as e:
+            if entry is not None:
+                # 回源失败时，已超过 stale_ttl 的旧数据也比错误更有用
+                logger.warning(f"回源 {account} 的 {resource} 失败，返回旧数据: {e}")
+                return entry, "STALE"
+            if isinstance(e, UpstreamError):
+                raise
+            raise UpstreamError(str(e)) from e
+
+    def stats(self):
+        """缓存状态"""
+        with self._lock:
+            entries = {
+                f"{account}/{resource}": round(entry.age, 3)
+                for (account, resource), entry in self._entries.items()
+            }
+        return {
+            "accounts": list(self.sessions),
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "entries_age": entries,
+        }
+
+
+def make_handler(gateway):
+    """创建网关的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, headers=None, content_type="application/json; charset=utf-8"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status, value):
+            self._send(status, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            resource = url.path.strip("/")
+            if resource == "health":
+                return self._send_json(200, {"status": "ok"})
+            if resource == "stats":
+                return self._send_json(200, gateway.stats())
+            if resource == "metrics":
+                return self._send(
+                    200,
+                    metrics.REGISTRY.render().encode("utf-8"),
+                    content_type="text/plain; version=0.0.4; charset=utf-8",
+                )
+
+            account = parse_qs(url.query).get("account", [gateway.default_account])[0]
+            try:
+                entry, cache = gateway.get(account, resource)
+            except KeyError:
+                return self._send_json(404, {"code": 404, "msg": f"未知的账号或资源: {account}/{resource}"})
+            except UpstreamError as e:
+                GATEWAY_REQUESTS.inc(resource=resource, cache="ERROR")
+                return self._send_json(502, {"code": 502, "msg": str(e)})
+
+            GATEWAY_REQUESTS.inc(resource=resource, cache=cache)
+            headers = {
+                "X-Cache": cache,
+                "Age": str(int(entry.age)),
+                "ETag": entry.etag,
+                "Cache-Control": f"max-age={max(0, int(gateway.ttl - entry.age))}",
+            }
+            if self.headers.get("If-None-Match") == entry.etag:
+                return self._send(304, b"", headers)
+            self._send(200, entry.body, headers)
+
+    return Handler
+
+
+class GatewayServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 默认的监听队列只有 5，大量使用方同时连接时会触发 SYN 重传
+    request_queue_size = 128
+
+
+def serve(gateway, host="127.0.0.1", port=8780):
+    """
+    启动网关 HTTP 服务
+
+    Returns:
+        ThreadingHTTPServer，调用 serve_forever() 开始处理请求
+    """
+    return GatewayServer((host, port), make_handler(gateway))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知新本地缓存网关")
+    parser.add_argument(
+        "accounts", nargs="?", default=None, help="账号文件（JSON数组），默认使用 ZXIN_USERNAME/ZXIN_PASSWORD"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8780, help="监听端口")
+    parser.add_argument("--ttl", type=float, default=60, help="缓存新鲜时间（秒）")
+    parser.add_argument("--stale-ttl", type=float, default=600, help="旧数据最长可用时间（秒）")
+    parser.add_argument("--output", default="output", help="输出根目录")
+    args = parser.parse_args()
+
+    if args.accounts:
+        accounts = load_accounts(args.accounts)
+    else:
+        accounts = [
+            {"username": os.getenv("ZXIN_USERNAME"), "password": os.getenv("ZXIN_PASSWORD")}
+        ]
+    if not accounts or not accounts[0].get("username"):
+        logger.error("没有可用的账号")
+        return
+
+    gateway = Gateway(accounts, args.output, ttl=args.ttl, stale_ttl=args.stale_ttl)
+    server = serve(gateway, args.host, args.port)
+    host, port = server.server_address[:2]
+    logger.info(
+        f"网关已启动: http://{host}:{port}，账号 {len(gateway.sessions)} 个，"
+        f"资源 /user /courses /scores /homework?account=账号"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        gateway.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,17 @@
+import atexit
+import copy
+import glob
+import json
 import logging
+import logging.handlers
 import os
-import colorlog
+import queue
+import sys
+import threading
+import time
+from collections import Counter
 from datetime import datetime
 
-# 创建logs文件夹
-logs_dir = "logs"
-os.makedirs(logs_dir, exist_ok=True)
-
-# 获取当前日期作为日志文件名的一部分
-current_date = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-log_file = os.path.join(logs_dir, f"zxin_tools_{current_date}.log")
-
 # 日志颜色配置
 log_colors = {
     "DEBUG": "cyan",
@@ -20,36 +21,271 @@ log_colors = {
     "CRITICAL": "red,bg_white",
 }
 
-# 创建格式器
-file_formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-console_formatter = colorlog.ColoredFormatter(
-    "%(log_color)s%(levelname)s: %(message)s", log_colors=log_colors
-)
+# 默认配置，均可通过环境变量覆盖
+DEFAULTS = {
+    "log_dir": ("ZXIN_LOG_DIR", "logs"),
+    "level": ("ZXIN_LOG_LEVEL", "INFO"),
+    "log_format": ("ZXIN_LOG_FORMAT", "text"),  # text 或 json（只影响日志文件）
+    "summary": ("ZXIN_LOG_SUMMARY", "0"),  # 1 表示逐项日志只输出汇总
+    "max_bytes": ("ZXIN_LOG_MAX_BYTES", str(10 * 1024 * 1024)),
+    "backup_count": ("ZXIN_LOG_BACKUPS", "5"),
+    "max_age_days": ("ZXIN_LOG_MAX_AGE_DAYS", "14"),
+}
+
+# 每个进程写自己的日志文件：RotatingFileHandler 轮转时会重命名文件，多个进程共用一个文件会互相覆盖
+LOG_FILE_NAME = "zxin_tools.{program}.{pid}.log"
+
+_lock = threading.Lock()
+_queue = queue.SimpleQueue()
+_overrides = {}
+_listener = None
+_closed = False
+console_handler = None
+file_handler = None
+
+
+def _option(name):
+    if name in _overrides:
+        return _overrides[name]
+    env, default = DEFAULTS[name]
+    return os.getenv(env) or default
+
+
+def configure(**options):
+    """
+    修改日志配置，需在第一条日志输出前调用，未指定的项读取环境变量或默认值
+
+    Args:
+        log_dir: 日志目录
+        level: 日志级别
+        log_format: 日志文件格式，text 或 json
+        summary: 是否只输出逐项日志的汇总
+        max_bytes: 单个日志文件的最大字节数
+        backup_count: 保留的轮转文件数
+        max_age_days: 日志文件保留天数，同时每天轮转一次
+        console_level: 控制台的最低日志级别
+    """
+    unknown = set(options) - set(DEFAULTS) - {"console_level"}
+    if unknown:
+        raise ValueError(f"未知的日志配置: {sorted(unknown)}")
+    _overrides.update(options)
+    for logger in _managed_loggers():
+        logger.setLevel(_level())
+    if console_handler is not None and "console_level" in options:
+        console_handler.setLevel(options["console_level"])
+
+
+def _level():
+    level = _option("level")
+    return logging.getLevelName(level.upper()) if isinstance(level, str) else level
+
+
+def summary_mode():
+    """是否启用汇总模式"""
+    return str(_option("summary")).lower() in ("1", "true", "yes")
+
+
+class JSONFormatter(logging.Formatter):
+    """每条日志输出为一行JSON"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            # 经过队列的日志只保留格式化后的 exc_text，见 _LazyQueueHandler.prepare
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RotatingLogHandler(logging.handlers.RotatingFileHandler):
+    """按大小和时间轮转的日志文件，超过保留天数的轮转文件会被删除"""
+
+    def __init__(self, filename, max_bytes, backup_count, max_age_days):
+        self.max_age = max_age_days * 86400
+        super().__init__(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        self._opened_day = time.strftime("%Y-%m-%d")
+
+    def shouldRollover(self, record):
+        if time.strftime("%Y-%m-%d") != self._opened_day:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._opened_day = time.strftime("%Y-%m-%d")
+        self.prune()
+
+    def prune(self):
+        """删除超过保留天数的日志文件（包括旧版本按启动时间命名的日志）"""
+        directory = os.path.dirname(self.baseFilename)
+        cutoff = time.time() - self.max_age
+        for path in glob.glob(os.path.join(directory, "zxin_tools*.log*")):
+            if path == self.baseFilename:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
 
-# 创建日志处理器
-file_handler = logging.FileHandler(log_file, encoding="utf-8")
-file_handler.setFormatter(file_formatter)
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """将日志放入队列，第一次输出日志时才创建日志目录、文件和后台写入线程"""
 
-console_handler = colorlog.StreamHandler()
-console_handler.setFormatter(console_formatter)
+    def emit(self, record):
+        if _closed:
+            # shutdown() 之后不再重启后台线程，警告及以上级别直接输出到 stderr
+            if record.levelno >= logging.lastResort.level:
+                logging.lastResort.handle(record)
+            return
+        if _listener is None:
+            _start()
+        super().emit(record)
+
+    def prepare(self, record):
+        """
+        合并日志参数后放入队列
+
+        默认实现会把异常堆栈拼进 msg 并清空 exc_info，JSON 格式的日志文件就没有单独的 exc_info 字段；
+        这里只把异常格式化为 exc_text，由文件和控制台的格式化器各自输出。
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            # 与默认实现一样清空 exc_info，队列中不持有 traceback 及其引用的栈帧
+            record.exc_info = None
+        return record
+
+
+def log_file_name():
+    """当前进程的日志文件名，如 zxin_tools.main.12345.log"""
+    argv0 = sys.argv[0] if sys.argv else ""
+    program = os.path.splitext(os.path.basename(argv0))[0].lstrip("-")
+    return LOG_FILE_NAME.format(program=program or "python", pid=os.getpid())
+
+
+def _start():
+    global _listener, console_handler, file_handler
+    import colorlog
+
+    with _lock:
+        if _listener is not None or _closed:
+            return
+        log_dir = _option("log_dir")
+        os.makedirs(log_dir, exist_ok=True)
+        file_handler = RotatingLogHandler(
+            os.path.join(log_dir, log_file_name()),
+            int(_option("max_bytes")),
+            int(_option("backup_count")),
+            float(_option("max_age_days")),
+        )
+        if _option("log_format") == "json":
+            file_handler.setFormatter(JSONFormatter())
+        else:
+            file_handler.setFormatter(
+                logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+            )
+        file_handler.prune()
+
+        console_handler = colorlog.StreamHandler()
+        console_handler.setFormatter(
+            colorlog.ColoredFormatter(
+                "%(log_color)s%(levelname)s: %(message)s", log_colors=log_colors
+            )
+        )
+        if "console_level" in _overrides:
+            console_handler.setLevel(_overrides["console_level"])
+
+        listener = logging.handlers.QueueListener(
+            _queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(shutdown)
+        _listener = listener
+
+
+def shutdown():
+    """写出队列中剩余的日志并关闭日志文件，之后的日志不再写入文件"""
+    global _listener, _closed
+    with _lock:
+        listener, _listener = _listener, None
+        _closed = True
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+_exception_formatter = logging.Formatter()
+_queue_handler = _LazyQueueHandler(_queue)
+
+
+def _managed_loggers():
+    manager = logging.Logger.manager
+    return [
+        logger
+        for logger in list(manager.loggerDict.values())
+        if isinstance(logger, logging.Logger) and _queue_handler in logger.handlers
+    ]
 
 
 # 配置根日志器
 def setup_logger(name):
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(_level())
 
-    # 清除此记录器上所有现有的处理程序
-    # 以防止多次调用setup_logger或ZXinClient等其他代码已向此记录器添加处理程序时重复添加我们的处理程序。
-    if logger.hasHandlers():
+    # 所有记录器共享同一个队列处理器，重复调用时不再添加
+    if _queue_handler not in logger.handlers:
         logger.handlers.clear()
-
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)  # 这是彩色的控制台处理器
+        logger.addHandler(_queue_handler)
 
     # 防止消息传递给父记录器（例如根记录器）的处理程序
     # 如果无色重复消息来自根记录器的控制台处理程序，这将阻止它们。
     logger.propagate = False
     return logger
+
+
+class LogSummary:
+    """
+    逐项日志的汇总
+
+    汇总模式下逐项日志只按类别计数，结束时输出一行汇总；否则照常逐条输出。
+    """
+
+    def __init__(self, logger, enabled=None):
+        self.logger = logger
+        self.enabled = summary_mode() if enabled is None else enabled
+        self.counts = Counter()
+
+    def item(self, category, message, level=logging.INFO):
+        """
+        记录一条逐项日志
+
+        Args:
+            category: 汇总时使用的类别
+            message: 日志内容，汇总模式下不输出
+            level: 日志级别
+        """
+        if self.enabled:
+            self.counts[category] += 1
+        else:
+            self.logger.log(level, message)
+
+    def flush(self, title):
+        """汇总模式下输出汇总并清空计数"""
+        if self.enabled and self.counts:
+            parts = "，".join(f"{category} {count} 项" for category, count in self.counts.items())
+            self.logger.info(f"{title}：{parts}")
+        self.counts.clear()
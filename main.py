@@ -1,11 +1,38 @@
+import time
+
 from zxin_client import ZXinClient
 from course_manager import CourseManager
 from score_manager import ScoreManager
 from log_config import setup_logger
+import metrics
 
 # 创建日志记录器
 logger = setup_logger("main")
 
+# 菜单启动时预取的接口（SNAPSHOT_ENDPOINTS 中的名称），作业列表菜单用不到，不预取
+PREFETCH_ENDPOINTS = ("user", "courses")
+
+
+def fresh_courses(client, snapshot):
+    """
+    获取预取的课程数据，超过响应缓存的有效期时丢弃
+
+    Args:
+        client: 客户端
+        snapshot: 预取的快照，为空时返回 None
+
+    Returns:
+        课程数据，没有预取、预取失败或已过期时返回 None（由调用方重新获取）
+    """
+    if snapshot is None:
+        return None
+    endpoint = ZXinClient.SNAPSHOT_ENDPOINTS["courses"]
+    age = time.time() - snapshot.started_at
+    if age >= client.cache.ttl_for(endpoint):
+        logger.info(f"预取的课程数据已过期（{age:.0f} 秒前获取），重新获取")
+        return None
+    return snapshot.get("courses")
+
 
 def print_banner():
     """打印程序banner"""
@@ -22,10 +49,18 @@ def main():
 
         # 创建客户端并获取token
         client = ZXinClient()
-        if not client.login():
+        if not client.ensure_token():
             logger.error("程序退出: 获取token失败")
             return
 
+        # 登录后在后台并发获取菜单用到的用户信息和课程数据。用户信息缓存 5 分钟，选项 1 直接命中缓存；
+        # 课程数据只缓存 60 秒，通常等不到用户选择，因此预取结果由第一次选择 2 或 3 直接使用，之后重新获取；
+        # 预取结果的有效期与响应缓存相同，第一次选择时已过期则同样重新获取
+        prefetch = client.prefetch(
+            {name: ZXinClient.SNAPSHOT_ENDPOINTS[name] for name in PREFETCH_ENDPOINTS}
+        )
+        snapshot = None
+
         while True:
             logger.info("\n请选择要执行的操作:")
             logger.info("1. 获取用户信息")
@@ -36,15 +71,26 @@ def main():
             choice = input("请输入选项 [0-3]: \n")
             logger.info("--------------------------------")
 
+            if choice in ("1", "2", "3") and prefetch is not None:
+                snapshot = prefetch.result()
+                prefetch = None
+
             if choice == "1":
                 client.get_user_info()
             elif choice == "2":
                 course_mgr = CourseManager(client)
-                course_mgr.process_course_data()
+                course_mgr.process_course_data(fresh_courses(client, snapshot))
+                snapshot = None
             elif choice == "3":
                 score_mgr = ScoreManager(client)
-                score_mgr.process_score_data()
+                score_mgr.process_score_data(fresh_courses(client, snapshot))
+                snapshot = None
             elif choice == "0":
+                stats = client.cache_stats()
+                logger.info(
+                    f"缓存命中 {stats['hits']} 次，未命中 {stats['misses']} 次"
+                )
+                metrics.export_run(client.output_dir)
                 logger.info("程序已退出")
                 break
             else:
@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from log_config import setup_logger
+
+logger = setup_logger("Metrics")
+
+# 延迟直方图的默认分桶上限（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _label_key(labelnames, labels):
+    missing = set(labelnames) - set(labels)
+    if missing or len(labels) != len(labelnames):
+        raise ValueError(f"标签应为 {labelnames}，实际为 {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def summary(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return {",".join(key) or "total": value for key, value in items}
+
+
+class Histogram:
+    """固定分桶的直方图，记录次数、总和与各分桶的累计次数"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # {标签: [各分桶次数..., +Inf 次数, 总和, 最大值]}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0.0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] = max(state[-1], value)
+
+    @contextmanager
+    def time(self, **labels):
+        """记录代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = _format_labels(self.labelnames, key, [("le", le)])
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, state[-2]
+            yield f"{self.name}_count", labels, cumulative
+
+    def _quantile(self, counts, total, q):
+        """按分桶估算分位数（取所在分桶的上限）"""
+        rank = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def summary(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        result = {}
+        for key, state in items:
+            counts = state[: len(self.buckets) + 1]
+            total = sum(counts)
+            result[",".join(key) or "total"] = {
+                "count": total,
+                "sum": round(state[-2], 6),
+                "avg": round(state[-2] / total, 6) if total else 0,
+                "max": round(state[-1], 6),
+                "p50": self._quantile(counts, total, 0.5),
+                "p95": self._quantile(counts, total, 0.95),
+            }
+        return result
+
+
+class MetricsRegistry:
+    """指标注册表，可导出为 Prometheus 文本格式或JSON汇总"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"指标 {name} 已注册为其他类型")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self):
+        """生成 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """生成JSON汇总"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "started_at": self.started_at,
+            "generated_at": time.time(),
+            "metrics": {metric.name: metric.summary() for metric in metrics},
+        }
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "zxin_request_duration_seconds", "API请求耗时", ("endpoint", "method")
+)
+REQUESTS = REGISTRY.counter(
+    "zxin_requests_total", "API请求次数（按状态码）", ("endpoint", "method", "status")
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "zxin_stage_duration_seconds", "各处理阶段耗时", ("stage",)
+)
+HOMEWORK_PROCESSED = REGISTRY.counter("zxin_homework_processed_total", "处理的作业数")
+NOTIFICATIONS = REGISTRY.counter(
+    "zxin_notifications_total", "通知发送结果（sent/retry/failed，按渠道）", ("channel", "result")
+)
+NOTIFY_LATENCY = REGISTRY.histogram(
+    "zxin_notification_duration_seconds", "通知单次发送耗时（按渠道）", ("channel",)
+)
+
+
+def stage(name):
+    """记录处理阶段耗时的上下文管理器"""
+    return STAGE_LATENCY.time(stage=name)
+
+
+def _atomic_write(path, text):
+    # storage 导入了 metrics，这里在调用时再导入；唯一的临时文件，多个进程同时导出不会互相覆盖。
+    # 文件供 node_exporter 等其他用户读取，权限为 0644
+    from storage import write_atomic
+
+    write_atomic(path, text.encode("utf-8"), mode=0o644)
+
+
+def write_textfile(path, registry=REGISTRY):
+    """原子写入 Prometheus 文本文件，供 node_exporter textfile collector 读取"""
+    _atomic_write(path, registry.render())
+    return path
+
+
+def write_summary(path, registry=REGISTRY):
+    """原子写入JSON汇总"""
+    _atomic_write(path, json.dumps(registry.summary(), ensure_ascii=False, indent=4))
+    return path
+
+
+def export_run(output_dir, registry=REGISTRY):
+    """
+    运行结束时导出指标：JSON汇总写入输出目录下的 metrics_summary.json，
+    设置了 ZXIN_METRICS_FILE 时同时写入 Prometheus 文本文件
+    """
+    try:
+        write_summary(os.path.join(output_dir, "metrics_summary.json"), registry)
+        textfile = os.getenv("ZXIN_METRICS_FILE")
+        if textfile:
+            write_textfile(textfile, registry)
+    except OSError as e:
+        logger.error(f"导出指标失败: {e}")
+
+
+def serve(port, host="127.0.0.1", registry=REGISTRY):
+    """
+    在后台线程中启动 /metrics HTTP 端点
+
+    Returns:
+        HTTP 服务器，调用 shutdown() 停止
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"指标端点已启动: http://{host}:{server.server_port}/metrics")
+    return server
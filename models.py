@@ -0,0 +1,128 @@
+import datetime
+from dataclasses import dataclass, field
+
+# 北京时区
+BEIJING_TZ = datetime.timezone(datetime.timedelta(hours=8))
+
+
+def parse_time(value):
+    """将接口返回的ISO时间字符串（通常为UTC，以Z结尾）解析为带时区的datetime，无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def default_homework_id(homework, course_name):
+    """作业ID：优先使用 'id' 字段，否则使用课程名、标题和截止时间拼接的合成ID"""
+    if homework.get("id"):
+        return str(homework["id"])
+    title = homework.get("title", "untitled")
+    endtime = homework.get("endtime", "no_endtime")
+    return f"{course_name}_{title}_{endtime}"
+
+
+@dataclass(slots=True)
+class Teacher:
+    """课程教师"""
+
+    nickname: str = ""
+
+    @classmethod
+    def from_dict(cls, data):
+        user = (data or {}).get("user") or {}
+        return cls(nickname=user.get("nickname") or "")
+
+
+@dataclass(slots=True)
+class StudentHomework:
+    """学生的作答记录"""
+
+    answer_progress: object = None
+    correct_progress: object = None
+    final_score: object = None
+    last_answer_time: str = None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            answer_progress=data.get("answerProgress"),
+            correct_progress=data.get("correctProgress"),
+            final_score=data.get("finalScore"),
+            last_answer_time=data.get("lastAnswerTime"),
+        )
+
+
+@dataclass(slots=True)
+class Homework:
+    """作业，截止时间在解析时转换一次"""
+
+    key: str
+    id: str = None
+    title: str = ""
+    category: str = ""
+    starttime: str = None
+    endtime: str = None
+    end_time: datetime.datetime = None
+    end_ts: int = None
+    student: StudentHomework = None
+
+    @classmethod
+    def from_dict(cls, data, course_name):
+        end_time = parse_time(data.get("endtime"))
+        records = data.get("studenthomework") or []
+        return cls(
+            key=default_homework_id(data, course_name),
+            id=str(data["id"]) if data.get("id") else None,
+            title=data.get("title") or "",
+            category=data.get("category") or "",
+            starttime=data.get("starttime"),
+            endtime=data.get("endtime"),
+            end_time=end_time,
+            end_ts=int(end_time.timestamp()) if end_time else None,
+            student=StudentHomework.from_dict(records[0]) if records else None,
+        )
+
+    @property
+    def submitted(self):
+        return self.student is not None
+
+    @property
+    def end_time_beijing(self):
+        return self.end_time.astimezone(BEIJING_TZ) if self.end_time else None
+
+
+@dataclass(slots=True)
+class Course:
+    """已加入的课程及其作业"""
+
+    id: str = None
+    name: str = ""
+    teacher: Teacher = field(default_factory=Teacher)
+    homework: list = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data):
+        info = data.get("course") or {}
+        name = info.get("name") or ""
+        return cls(
+            id=str(info["id"]) if info.get("id") else None,
+            name=name,
+            teacher=Teacher.from_dict(data.get("teacher")),
+            homework=[Homework.from_dict(hw, name) for hw in data.get("homework") or []],
+        )
+
+
+def parse_courses(course_data):
+    """逐门解析 getJoinedCourse2 响应（或课程字典的迭代器）中的课程"""
+    if isinstance(course_data, dict):
+        courses = course_data.get("data") or []
+    else:
+        courses = course_data
+    for course in courses:
+        yield Course.from_dict(course)
@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from HomeworkReminder import HomeworkReminder
+from log_config import setup_logger
+import metrics
+from notifier import NotificationDispatcher
+from outbox import Outbox, default_path
+from score_archive import archive_dir, open_archive
+from state_store import StateStore
+from storage import safe_name
+from token_cache import TokenCache
+from transport import CircuitBreaker, Transport
+
+logger = setup_logger("MultiAccountScanner")
+
+
+class TokenBucket:
+    """异步令牌桶，限制全局请求速率"""
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数），默认与 rate 相同
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        """获取一个令牌，令牌不足时等待"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class AccountResult:
+    """单个账号的扫描结果"""
+
+    username: str
+    ok: bool = False
+    upcoming_count: int = 0
+    error: str = ""
+    elapsed: float = 0.0
+
+
+@dataclass
+class SweepReport:
+    """一轮多账号扫描的汇总"""
+
+    results: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self):
+        return sum(1 for r in self.results if r.ok)
+
+    @property
+    def failed(self):
+        return len(self.results) - self.succeeded
+
+    @property
+    def throughput(self):
+        """吞吐量（账号/秒）"""
+        return len(self.results) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            "elapsed": round(self.elapsed, 3),
+            "accounts": len(self.results),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "throughput": round(self.throughput, 3),
+            "results": [asdict(r) for r in self.results],
+        }
+
+
+def load_accounts(filepath):
+    """
+    从账号文件加载账号列表
+
+    文件为JSON数组，每项包含 username 和 password 字段
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        accounts = json.load(file)
+    valid = []
+    for index, account in enumerate(accounts):
+        if not account.get("username") or not account.get("password"):
+            logger.warning(f"账号文件第 {index + 1} 项缺少 username 或 password，已跳过")
+            continue
+        valid.append(account)
+    logger.info(f"从 {filepath} 加载 {len(valid)} 个账号")
+    return valid
+
+
+class MultiAccountScanner:
+    """多账号并发作业扫描器，基于 asyncio 调度 ZXinClient 的阻塞请求"""
+
+    def __init__(
+        self,
+        accounts,
+        concurrency=8,
+        rate=5.0,
+        burst=None,
+        days_threshold=5,
+        output_root="output",
+    ):
+        """
+        Args:
+            accounts: 账号列表，每项包含 username 和 password
+            concurrency: 同时进行的登录/课程请求数上限
+            rate: 全局每秒请求数上限
+            burst: 令牌桶容量，默认与 rate 相同
+            days_threshold: 提前多少天提醒
+            output_root: 输出根目录，每个账号保存在其下的子目录
+        """
+        self.accounts = accounts
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = burst
+        self.days_threshold = days_threshold
+        self.output_root = output_root
+        # 所有账号的成绩归档放在同一根目录下，便于生成成绩报告
+        self.archive_root = archive_dir(output_root)
+
+    async def _scan_account(
+        self,
+        account,
+        loop,
+        executor,
+        semaphore,
+        bucket,
+        notifier,
+        state_store,
+        breaker,
+        token_cache,
+    ):
+        """扫描单个账号：登录、获取课程数据、处理作业"""
+        username = account["username"]
+        result = AccountResult(username=username)
+        start = time.perf_counter()
+        try:
+            reminder = await loop.run_in_executor(
+                executor,
+                lambda: HomeworkReminder(
+                    username,
+                    account["password"],
+                    os.path.join(self.output_root, safe_name(username)),
+                    notifier=notifier,
+                    state_store=state_store,
+                    transport=Transport.from_env(breaker=breaker),
+                    score_archive=open_archive(self.archive_root, username),
+                    token_cache=token_cache,
+                ),
+            )
+            reminder.notify_title = f"作业提醒（{username}）"
+
+            async with semaphore:
+                await bucket.acquire()
+                token = await loop.run_in_executor(executor, reminder.ensure_token)
+            if not token:
+                result.error = "登录失败"
+                return result
+
+            async with semaphore:
+                await bucket.acquire()
+                course_data = await loop.run_in_executor(
+                    executor, reminder.fetch_course_data
+                )
+            if not course_data:
+                result.error = "课程数据获取失败"
+                return result
+
+            upcoming = await loop.run_in_executor(
+                executor, reminder.scan_homework, self.days_threshold, course_data
+            )
+            result.ok = True
+            result.upcoming_count = len(upcoming or [])
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.elapsed = time.perf_counter() - start
+            if result.ok:
+                logger.info(
+                    f"账号 {username} 扫描完成，即将截止作业 {result.upcoming_count} 个，"
+                    f"耗时 {result.elapsed:.2f} 秒"
+                )
+            else:
+                logger.error(f"账号 {username} 扫描失败: {result.error}")
+        return result
+
+    async def run(self):
+        """执行一轮扫描并返回汇总"""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(self.rate, self.burst)
+        # 所有账号共享一个通知发送器，避免每个账号各开一个连接和线程
+        notifier = NotificationDispatcher(outbox=Outbox(default_path(self.output_root)))
+        # 所有账号共享一个状态数据库，按账号区分
+        state_store = StateStore(os.path.join(self.output_root, "state.db"))
+        # 所有账号共享一个熔断器，上游不可用时其余账号直接失败
+        breaker = CircuitBreaker()
+        # 所有账号共享一个 token 缓存
+        token_cache = TokenCache()
+        report = SweepReport()
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            tasks = [
+                self._scan_account(
+                    account,
+                    loop,
+                    executor,
+                    semaphore,
+                    bucket,
+                    notifier,
+                    state_store,
+                    breaker,
+                    token_cache,
+                )
+                for account in self.accounts
+            ]
+            report.results = await asyncio.gather(*tasks)
+        await loop.run_in_executor(None, notifier.close)
+        state_store.close()
+
+        report.elapsed = time.perf_counter() - start
+        logger.info("--------------------------------")
+        logger.info(
+            f"本轮扫描 {len(report.results)} 个账号，成功 {report.succeeded} 个，"
+            f"失败 {report.failed} 个，耗时 {report.elapsed:.2f} 秒，"
+            f"吞吐量 {report.throughput:.2f} 账号/秒"
+        )
+        return report
+
+    def save_report(self, report, filename="multi_account_report.json"):
+        """保存本轮扫描汇总"""
+        os.makedirs(self.output_root, exist_ok=True)
+        filepath = os.path.join(self.output_root, filename)
+        with open(filepath, "w", encoding="utf-8") as file:
+            json.dump(report.to_dict(), file, ensure_ascii=False, indent=4)
+        logger.info(f"扫描汇总已保存到 {filepath} 文件中")
+        return filepath
+
+    def save_score_report(self, filename="score_report.json"):
+        """根据各账号最新的成绩快照生成成绩报告（需要安装 numpy）"""
+        from score_analytics import ScoreTable
+
+        table = ScoreTable.from_archives(self.archive_root)
+        report = {
+            "overview": table.overview(),
+            "courses": table.course_stats().records(),
+            "courses_by_account": table.course_stats(by_account=True).records(),
+            "ranking": table.account_ranking().records(),
+        }
+        filepath = os.path.join(self.output_root, filename)
+        with open(filepath, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=4)
+        logger.info(f"成绩报告已保存到 {filepath} 文件中")
+        return filepath
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多账号并发作业扫描")
+    parser.add_argument("accounts", help="账号文件（JSON数组）")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发请求数上限")
+    parser.add_argument("--rate", type=float, default=5.0, help="全局每秒请求数上限")
+    parser.add_argument("--burst", type=int, default=None, help="令牌桶容量")
+    parser.add_argument("--days", type=int, default=5, help="提前多少天提醒")
+    parser.add_argument("--output", default="output", help="输出根目录")
+    parser.add_argument(
+        "--score-report", action="store_true", help="扫描后生成各课程成绩统计和账号排名"
+    )
+    args = parser.parse_args()
+
+    scanner = MultiAccountScanner(
+        load_accounts(args.accounts),
+        concurrency=args.concurrency,
+        rate=args.rate,
+        burst=args.burst,
+        days_threshold=args.days,
+        output_root=args.output,
+    )
+    report = asyncio.run(scanner.run())
+    scanner.save_report(report)
+    if args.score_report:
+        scanner.save_score_report()
+    metrics.export_run(args.output)
+
+
+if __name__ == "__main__":
+    main()
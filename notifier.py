@@ -0,0 +1,242 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+from channels import channels_from_env
+from log_config import setup_logger
+from outbox import ChannelWorker, Outbox, default_path
+
+# 飞书自定义机器人请求体上限为 20KB，预留签名等字段的空间
+MAX_MESSAGE_BYTES = 18 * 1024
+
+
+class Digest:
+    """一次扫描的通知摘要，按分组收集事件"""
+
+    def __init__(self, dispatcher, title):
+        self.dispatcher = dispatcher
+        self.title = title
+        self.sections = {}
+        self.keys = []
+
+    def add(self, section, text, key=None):
+        """
+        收集一条通知事件
+
+        Args:
+            section: 分组标题，如"发现新作业"
+            text: 事件内容，可包含多行
+            key: 事件的幂等键，如 "账号:作业ID:new"；摘要中所有事件都有键时，
+                相同事件组成的摘要只发送一次（进程在写入状态前崩溃、重新扫描时不会重复提醒）
+        """
+        self.sections.setdefault(section, []).append(text)
+        self.keys.append(key)
+
+    def __len__(self):
+        return sum(len(items) for items in self.sections.values())
+
+    def flush(self):
+        """将收集的事件写入发件箱，返回生成的消息条数"""
+        sections, self.sections = self.sections, {}
+        keys, self.keys = self.keys, []
+        return self.dispatcher.dispatch(self.title, sections, keys)
+
+
+class NotificationDispatcher:
+    """
+    通知合并发送器
+
+    一次扫描中的事件先收集到 Digest 中，flush() 时按分组合并为一条或多条富文本消息，
+    在一个事务中写入持久化的发件箱后立即返回；每个渠道（飞书、通用 webhook、邮件）由独立的
+    后台线程发送，失败时按指数退避重试。扫描线程不会阻塞在任何渠道上，慢或不可用的渠道也
+    不会影响其他渠道。未送达的消息保存在发件箱中，进程重启后继续发送。多个扫描可共享同一个发送器。
+    """
+
+    def __init__(
+        self,
+        webhook_url=None,
+        secret=None,
+        max_bytes=MAX_MESSAGE_BYTES,
+        max_retries=10,
+        min_interval=0.25,
+        outbox=None,
+        channels=None,
+        drain_timeout=30,
+    ):
+        """
+        Args:
+            webhook_url: 飞书 webhook 地址，默认读取 FEISHU_BOT_URL
+            secret: 签名密钥，默认读取 FEISHU_BOT_SECRET
+            max_bytes: 单条消息内容的最大字节数，超出后拆分为多条
+            max_retries: 每个渠道的最大重试次数，超过后标记为失败
+            min_interval: 飞书两次发送之间的最小间隔（秒），飞书机器人限制为 5 次/秒
+            outbox: 发件箱，默认使用 ZXIN_OUTBOX_DB 或 output/outbox.db
+            channels: 通知渠道列表，默认按环境变量创建（见 channels.channels_from_env）
+            drain_timeout: close() 时等待到期消息发送完成的最长秒数
+        """
+        self.max_bytes = max_bytes
+        self.drain_timeout = drain_timeout
+        self.logger = setup_logger(self.__class__.__name__)
+        self.outbox = outbox or Outbox(default_path())
+        if channels is None:
+            channels = channels_from_env(webhook_url, secret, min_interval)
+        self.channels = channels
+        # 各渠道线程每次发送结束时通知，wait()/close() 据此等待
+        self._progress = threading.Condition()
+        self.workers = [
+            ChannelWorker(self.outbox, channel, max_retries=max_retries, progress=self._progress)
+            for channel in channels
+        ]
+        self._lock = threading.Lock()
+        self._started = False
+        if not channels:
+            self.logger.error(
+                "没有配置通知渠道（飞书、ZXIN_WEBHOOK_URL 或 ZXIN_SMTP_HOST），"
+                "通知会保存在发件箱中，配置渠道后补发"
+            )
+            return
+        adopted = self.outbox.adopt_orphans(self.channel_names)
+        if adopted:
+            self.logger.info(f"发件箱中有 {adopted} 条未配置渠道时写入的消息，将通过已配置的渠道补发")
+        if self.outbox.pending_count(self.channel_names):
+            # 上次运行未送达的消息
+            self._ensure_workers()
+
+    @property
+    def channel_names(self):
+        return [channel.name for channel in self.channels]
+
+    @property
+    def sent(self):
+        return sum(worker.sent for worker in self.workers)
+
+    @property
+    def failed(self):
+        return sum(worker.failed for worker in self.workers)
+
+    def digest(self, title="作业提醒"):
+        """创建一个通知摘要，用于收集一次扫描中的事件"""
+        return Digest(self, title)
+
+    def dispatch(self, title, sections, keys=None):
+        """
+        将分组事件合并为消息并写入发件箱，由后台线程发送
+
+        Args:
+            title: 消息标题
+            sections: {分组标题: [事件内容, ...]}，按插入顺序排列
+            keys: 各事件的幂等键，全部不为空时由事件键生成消息的幂等键，
+                否则每次调用都生成新的幂等键
+
+        Returns:
+            本次生成的消息条数（包括之前已写入、被幂等键忽略的消息）
+        """
+        sections = {k: v for k, v in sections.items() if v}
+        if not sections:
+            return 0
+
+        messages = self._build_messages(sections)
+        total = len(messages)
+        base_key = self._message_key(title, keys)
+        entries = []
+        for index, content in enumerate(messages, start=1):
+            message_title = title if total == 1 else f"{title} ({index}/{total})"
+            entries.append(
+                (f"{base_key}-{index}of{total}", {"title": message_title, "content": content})
+            )
+        # 没有配置渠道时消息仍写入发件箱（没有送达记录），配置渠道后补发，不会丢失
+        added = self.outbox.enqueue(entries, self.channel_names)
+        if not self.channels:
+            self.logger.error(f"没有配置通知渠道，{added} 条消息已保存在发件箱中，配置渠道后补发")
+        else:
+            self._ensure_workers()
+            for worker in self.workers:
+                worker.wakeup()
+        events = sum(len(v) for v in sections.values())
+        if added < total:
+            self.logger.info(f"{total - added} 条消息此前已写入发件箱，已忽略")
+        self.logger.info(f"已合并 {events} 条通知为 {total} 条消息")
+        return total
+
+    @staticmethod
+    def _message_key(title, keys):
+        """由事件键生成消息的幂等键，事件键不完整时使用随机键"""
+        if not keys or any(key is None for key in keys):
+            return uuid.uuid4().hex
+        payload = json.dumps([title, sorted(keys)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def _paragraph_size(paragraph):
+        return len(json.dumps(paragraph, ensure_ascii=False).encode("utf-8"))
+
+    def _build_messages(self, sections):
+        """按分组生成飞书 post 段落，超出大小上限时拆分为多条消息"""
+        messages = []
+        current, size = [], 0
+        for section, items in sections.items():
+            header = [{"tag": "text", "text": f"【{section}】共 {len(items)} 项"}]
+            paragraphs = [header] + [[{"tag": "text", "text": item}] for item in items]
+            for paragraph in paragraphs:
+                paragraph_size = self._paragraph_size(paragraph)
+                if current and size + paragraph_size > self.max_bytes:
+                    messages.append(current)
+                    current, size = [], 0
+                current.append(paragraph)
+                size += paragraph_size
+        if current:
+            messages.append(current)
+        return messages
+
+    def _ensure_workers(self):
+        with self._lock:
+            for worker in self.workers:
+                worker.start()
+            self._started = True
+
+    def _idle(self, due_only):
+        if any(worker.busy for worker in self.workers):
+            return False
+        return self.outbox.pending_count(self.channel_names, due_only=due_only) == 0
+
+    def wait(self, timeout=None):
+        """
+        等待到期的消息都已尝试发送（成功、失败或进入退避等待）
+
+        Returns:
+            超时前是否已完成
+        """
+        return self._wait(True, timeout)
+
+    def _wait(self, due_only, timeout):
+        if not self._started:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._progress:
+            while not self._idle(due_only):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # 渠道线程在每次发送结束时通知，超时只是兜底
+                self._progress.wait(1.0 if remaining is None else min(remaining, 1.0))
+        return True
+
+    def close(self):
+        """
+        在 drain_timeout 内等待到期的消息尝试发送，然后停止后台线程
+
+        处于退避等待中的消息已保存在发件箱中，不等待，下次运行时继续重试，
+        渠道不可用时定时任务不会因此阻塞。
+        """
+        if self._started:
+            self._wait(True, self.drain_timeout)
+            for worker in self.workers:
+                worker.stop()
+            self._started = False
+        remaining = self.outbox.pending_count(self.channel_names) + self.outbox.orphan_count()
+        if remaining:
+            self.logger.warning(f"还有 {remaining} 条通知未送达，已保存在发件箱中，下次运行时继续发送")
+        for channel in self.channels:
+            channel.close()
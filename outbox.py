@@ -0,0 +1,411 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from channels import DeliveryError
+from log_config import setup_logger
+from metrics import NOTIFICATIONS, NOTIFY_LATENCY
+
+logger = setup_logger("Outbox")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    title TEXT,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    message_id INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    updated_at REAL,
+    sent_at REAL,
+    PRIMARY KEY (message_id, channel)
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_due
+    ON deliveries (channel, status, next_attempt_at);
+"""
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+
+def default_path(output_dir="output"):
+    """发件箱数据库路径，默认读取 ZXIN_OUTBOX_DB，否则为输出目录下的 outbox.db"""
+    return os.getenv("ZXIN_OUTBOX_DB") or os.path.join(output_dir, "outbox.db")
+
+
+class Outbox:
+    """
+    基于 SQLite 的通知发件箱
+
+    消息先在一个事务中写入 messages，并为每个渠道生成一条 deliveries 记录，之后由各渠道的
+    后台线程认领发送。认领时把 next_attempt_at 推后一个租约时间，进程在发送中途崩溃时，
+    租约到期后消息会被重新认领，因此每条消息至少送达一次。
+    幂等键唯一，同一个键重复写入会被忽略，接收方也可以按幂等键去重。
+    写入时没有配置任何渠道的消息没有送达记录，配置渠道后由 adopt_orphans() 补上。
+    """
+
+    def __init__(self, path, retention_days=30):
+        """
+        Args:
+            path: 数据库文件路径
+            retention_days: 全部渠道都已送达的消息保留天数，在此期间相同幂等键的消息不会重复发送
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 写入后即使断电也不丢失，通知量很小，FULL 的开销可以忽略
+        self._conn.execute("PRAGMA synchronous=FULL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self.prune(time.time() - retention_days * 86400)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, messages, channels):
+        """
+        在一个事务中写入多条消息
+
+        Args:
+            messages: [(幂等键, 消息), ...]，消息格式为 {"title", "content"}
+            channels: 需要送达的渠道名
+
+        Returns:
+            新写入的消息数（幂等键已存在的消息被忽略）
+        """
+        now = time.time()
+        added = 0
+        with self._lock, self._conn:
+            for key, message in messages:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO messages (idempotency_key, title, payload, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, message["title"], json.dumps(message, ensure_ascii=False), now),
+                )
+                if not cursor.rowcount:
+                    continue
+                added += 1
+                self._conn.executemany(
+                    "INSERT INTO deliveries (message_id, channel, next_attempt_at, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(cursor.lastrowid, channel, now, now) for channel in channels],
+                )
+        return added
+
+    def adopt_orphans(self, channels):
+        """
+        为没有任何送达记录的消息（写入时没有配置渠道）添加指定渠道的送达记录
+
+        Returns:
+            补上送达记录的消息数
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            orphans = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT message_id FROM messages m WHERE NOT EXISTS ("
+                    "SELECT 1 FROM deliveries d WHERE d.message_id = m.message_id)"
+                ).fetchall()
+            ]
+            self._conn.executemany(
+                "INSERT INTO deliveries (message_id, channel, next_attempt_at, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(message_id, channel, now, now) for message_id in orphans for channel in channels],
+            )
+        return len(orphans) if channels else 0
+
+    def orphan_count(self):
+        """没有任何送达记录、等待配置渠道的消息数"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM messages m WHERE NOT EXISTS ("
+                "SELECT 1 FROM deliveries d WHERE d.message_id = m.message_id)"
+            ).fetchone()
+        return row[0]
+
+    def claim(self, channel, lease):
+        """
+        认领一条到期的待发送消息
+
+        Args:
+            channel: 渠道名
+            lease: 租约秒数，到期前其他线程和进程不会认领同一条消息
+
+        Returns:
+            (消息ID, 幂等键, 消息, 已尝试次数)，没有到期的消息时返回 None
+        """
+        while True:
+            now = time.time()
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT d.message_id, m.idempotency_key, m.payload, d.attempts "
+                    "FROM deliveries d JOIN messages m ON m.message_id = d.message_id "
+                    "WHERE d.channel = ? AND d.status = ? AND d.next_attempt_at <= ? "
+                    "ORDER BY d.next_attempt_at, d.message_id LIMIT 1",
+                    (channel, PENDING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                message_id, key, payload, attempts = row
+                # 条件更新：多个进程共享数据库时，只有一个进程能认领同一条消息
+                claimed = self._conn.execute(
+                    "UPDATE deliveries SET attempts = attempts + 1, next_attempt_at = ?, "
+                    "updated_at = ? WHERE message_id = ? AND channel = ? AND status = ? "
+                    "AND attempts = ? AND next_attempt_at <= ?",
+                    (now + lease, now, message_id, channel, PENDING, attempts, now),
+                ).rowcount
+            if claimed:
+                return message_id, key, json.loads(payload), attempts + 1
+
+    def _update(self, message_id, channel, status, next_attempt_at=None, error=None):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE deliveries SET status = ?, next_attempt_at = COALESCE(?, next_attempt_at), "
+                "last_error = ?, updated_at = ?, sent_at = CASE WHEN ? = 'sent' THEN ? END "
+                "WHERE message_id = ? AND channel = ?",
+                (status, next_attempt_at, error, now, status, now, message_id, channel),
+            )
+
+    def mark_sent(self, message_id, channel):
+        self._update(message_id, channel, SENT)
+
+    def mark_retry(self, message_id, channel, delay, error):
+        self._update(message_id, channel, PENDING, time.time() + delay, error)
+
+    def mark_failed(self, message_id, channel, error):
+        self._update(message_id, channel, FAILED, error=error)
+
+    def next_due(self, channel):
+        """渠道下一条待发送消息的时间，没有待发送消息时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM deliveries WHERE channel = ? AND status = ?",
+                (channel, PENDING),
+            ).fetchone()
+        return row[0]
+
+    def pending_count(self, channels, due_only=False):
+        """
+        待发送的消息数
+
+        Args:
+            channels: 渠道名
+            due_only: 只统计已到期（不在租约或退避等待中）的消息
+        """
+        channels = list(channels)
+        if not channels:
+            return 0
+        placeholders = ",".join("?" * len(channels))
+        condition = "AND next_attempt_at <= ?" if due_only else ""
+        params = (PENDING, *channels) + ((time.time(),) if due_only else ())
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COUNT(*) FROM deliveries WHERE status = ? AND channel IN ({placeholders}) "
+                f"{condition}",
+                params,
+            ).fetchone()
+        return row[0]
+
+    def stats(self):
+        """
+        各渠道的送达状态
+
+        Returns:
+            {渠道名: {状态: 消息数}}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT channel, status, COUNT(*) FROM deliveries GROUP BY channel, status"
+            ).fetchall()
+        result = {}
+        for channel, status, count in rows:
+            result.setdefault(channel, {})[status] = count
+        return result
+
+    def deliveries(self, status=None, limit=50):
+        """
+        列出送达记录，按更新时间倒序
+
+        Returns:
+            [{"message_id", "idempotency_key", "title", "channel", "status", "attempts",
+              "next_attempt_at", "last_error", "created_at", "sent_at"}, ...]
+        """
+        condition = "WHERE d.status = ?" if status else ""
+        params = ((status,) if status else ()) + (limit,)
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT d.message_id, m.idempotency_key, m.title, d.channel, d.status, d.attempts, "
+                "d.next_attempt_at, d.last_error, m.created_at, d.sent_at "
+                "FROM deliveries d JOIN messages m ON m.message_id = d.message_id "
+                f"{condition} ORDER BY d.updated_at DESC LIMIT ?",
+                params,
+            )
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def requeue(self, channel=None):
+        """
+        将失败的消息重新加入发送队列
+
+        Returns:
+            重新加入的消息数
+        """
+        now = time.time()
+        condition = "AND channel = ?" if channel else ""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? "
+                f"WHERE status = ? {condition}",
+                (PENDING, now, now, FAILED) + ((channel,) if channel else ()),
+            )
+        return cursor.rowcount
+
+    def prune(self, before):
+        """删除 before 之前创建、且所有渠道都已送达的消息（没有送达记录的消息不删除）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE created_at < ? AND EXISTS ("
+                "SELECT 1 FROM deliveries d WHERE d.message_id = messages.message_id) "
+                "AND NOT EXISTS (SELECT 1 FROM deliveries d "
+                "WHERE d.message_id = messages.message_id AND d.status != ?)",
+                (before, SENT),
+            )
+            self._conn.execute(
+                "DELETE FROM deliveries WHERE message_id NOT IN (SELECT message_id FROM messages)"
+            )
+
+
+class ChannelWorker:
+    """
+    单个渠道的发送线程
+
+    每个渠道使用独立的线程，慢或不可用的渠道不会阻塞其他渠道和扫描线程。
+    失败时按指数退避把下次尝试时间写入发件箱，进程重启后继续按计划重试。
+    """
+
+    def __init__(
+        self,
+        outbox,
+        channel,
+        max_retries=10,
+        backoff_max=600,
+        lease=120,
+        poll_interval=5,
+        progress=None,
+    ):
+        """
+        Args:
+            outbox: 发件箱
+            channel: 通知渠道
+            max_retries: 最大重试次数，超过后标记为失败，可通过 Outbox.requeue() 重新发送
+            backoff_max: 两次重试之间的最长等待（秒）
+            lease: 认领消息的租约（秒），应大于单次发送的超时时间
+            poll_interval: 没有到期消息时检查发件箱的最长间隔（秒），用于发现其他进程写入的消息
+            progress: 每次发送结束和进入等待时通知的条件变量，供发送器等待发送完成
+        """
+        self.outbox = outbox
+        self.channel = channel
+        self.max_retries = max_retries
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.sent = 0
+        self.failed = 0
+        self.busy = False
+        self.progress = progress or threading.Condition()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._last_sent = 0.0
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"outbox-{self.channel.name}", daemon=True
+            )
+            self._thread.start()
+
+    def wakeup(self):
+        """有新消息写入时唤醒线程"""
+        self._wakeup.set()
+
+    def stop(self):
+        """停止线程，正在发送的消息会发送完"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            self.busy = True
+            try:
+                job = self.outbox.claim(self.channel.name, self.lease)
+                if job is not None:
+                    self._deliver(*job)
+                    continue
+            except Exception as e:
+                # 数据库错误等不应终止线程，稍后重试
+                logger.error(f"{self.channel.name} 发送线程出错: {e}")
+            finally:
+                self.busy = False
+                with self.progress:
+                    self.progress.notify_all()
+            due = self.outbox.next_due(self.channel.name)
+            timeout = self.poll_interval if due is None else due - time.time()
+            self._wakeup.wait(min(max(timeout, 0.0), self.poll_interval))
+
+    def _backoff(self, attempts, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return min(self.backoff_max, 2 ** (attempts - 1)) * (0.5 + random.random() / 2)
+
+    def _deliver(self, message_id, key, message, attempts):
+        """发送一条已认领的消息并记录结果"""
+        name = self.channel.name
+        wait = self.channel.min_interval - (time.monotonic() - self._last_sent)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            with NOTIFY_LATENCY.time(channel=name):
+                self.channel.send(message, key)
+        except Exception as e:
+            error = e if isinstance(e, DeliveryError) else DeliveryError(repr(e))
+            if error.retryable and attempts <= self.max_retries:
+                delay = self._backoff(attempts, error.retry_after)
+                self.outbox.mark_retry(message_id, name, delay, str(error))
+                NOTIFICATIONS.inc(channel=name, result="retry")
+                logger.warning(f"{name} 发送《{message['title']}》失败（{error}），{delay:.1f} 秒后重试")
+            else:
+                self.outbox.mark_failed(message_id, name, str(error))
+                NOTIFICATIONS.inc(channel=name, result="failed")
+                self.failed += 1
+                logger.error(f"{name} 发送《{message['title']}》失败😞（{error}），已标记为失败")
+            return False
+        finally:
+            self._last_sent = time.monotonic()
+        self.outbox.mark_sent(message_id, name)
+        NOTIFICATIONS.inc(channel=name, result="sent")
+        self.sent += 1
+        logger.info(f"{name} 发送《{message['title']}》成功🎉")
+        return True
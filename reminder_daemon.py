@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import random
+import signal
+import threading
+import time
+
+from HomeworkReminder import HomeworkReminder
+from log_config import setup_logger
+import metrics
+from storage import write_atomic
+
+logger = setup_logger("ReminderDaemon")
+
+
+class ReminderDaemon:
+    """
+    常驻的作业提醒守护进程
+
+    保持客户端、会话和 token 常驻，按即将到来的截止时间决定下次扫描时间：
+    没有临近的截止时间时低频轮询，作业进入提醒窗口或越接近截止时轮询越频繁。
+    """
+
+    def __init__(
+        self,
+        reminder=None,
+        days_threshold=5,
+        min_interval=300,
+        max_interval=6 * 3600,
+        jitter=0.1,
+        status_file="reminder_status.json",
+    ):
+        """
+        Args:
+            reminder: 作业提醒器，默认新建
+            days_threshold: 提前多少天提醒
+            min_interval: 两次扫描的最短间隔（秒）
+            max_interval: 两次扫描的最长间隔（秒），用于发现新作业
+            jitter: 随机抖动比例，避免多个进程同时请求
+            status_file: 状态文件名，保存在输出目录下
+        """
+        self.reminder = reminder or HomeworkReminder()
+        self.days_threshold = days_threshold
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.status_path = os.path.join(self.reminder.output_dir, status_file)
+        self._stop = threading.Event()
+        self.status = {
+            "pid": os.getpid(),
+            "started_at": time.time(),
+            "state": "starting",
+            "scans": 0,
+            "errors": 0,
+            "last_scan_at": None,
+            "last_scan_ok": None,
+            "last_error": None,
+            "upcoming_count": 0,
+            "next_scan_at": None,
+        }
+
+    def stop(self, *_):
+        """请求停止，当前扫描结束后退出"""
+        logger.info("收到停止信号，准备退出")
+        self._stop.set()
+
+    def next_interval(self, now=None):
+        """
+        根据截止时间计算下次扫描前的等待秒数
+
+        - 在下一个作业进入任一提醒档位的时刻唤醒
+        - 最早截止的作业已在提醒窗口内时，按其剩余时间的 1/8 轮询，越接近截止越频繁
+        - 加入随机抖动后再限制在 [min_interval, max_interval] 内，抖动不会越过上下限
+        """
+        now = now or time.time()
+        index = self.reminder.deadline_index
+        tiers = self.reminder.tiers(self.days_threshold)
+        interval = self.max_interval
+
+        crossing = index.next_crossing(now, tiers)
+        if crossing is not None:
+            interval = min(interval, crossing - now)
+        nearest = index.next_due(now)
+        if nearest and tiers and nearest[0] - now <= max(t.seconds for t in tiers):
+            interval = min(interval, (nearest[0] - now) / 8)
+
+        if self.jitter:
+            interval *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _write_status(self):
+        """原子写入状态文件（唯一的临时文件，多个守护进程或命令行同时写入不会互相覆盖）"""
+        try:
+            write_atomic(
+                self.status_path,
+                json.dumps(self.status, ensure_ascii=False, indent=4).encode("utf-8"),
+                mode=0o644,
+            )
+        except OSError as e:
+            logger.error(f"写入状态文件失败: {e}")
+
+    def scan_once(self):
+        """执行一次扫描，出错时记录错误而不退出"""
+        self.status["state"] = "scanning"
+        self._write_status()
+        # 守护进程自行控制轮询频率，流式请求不经过响应缓存，每次都获取最新数据
+        try:
+            upcoming = self.reminder.scan_homework(self.days_threshold, stream=True)
+            self.status["last_scan_ok"] = upcoming is not None
+            self.status["upcoming_count"] = len(upcoming or [])
+            if upcoming is None:
+                self.status["errors"] += 1
+                self.status["last_error"] = "没有可处理的课程数据"
+        except Exception as e:
+            logger.error(f"扫描作业失败: {e}")
+            self.status["last_scan_ok"] = False
+            self.status["errors"] += 1
+            self.status["last_error"] = str(e)
+        self.status["scans"] += 1
+        self.status["last_scan_at"] = time.time()
+
+    def run(self):
+        """主循环，直到收到 SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info("作业提醒守护进程已启动")
+
+        try:
+            while not self._stop.is_set():
+                self.scan_once()
+                interval = self.next_interval()
+                self.status["state"] = "sleeping"
+                self.status["next_scan_at"] = time.time() + interval
+                self._write_status()
+                metrics.export_run(self.reminder.output_dir)
+                logger.info(f"下次扫描将在 {interval / 60:.1f} 分钟后进行")
+                self._stop.wait(interval)
+        finally:
+            self.reminder.notifier.close()
+            self.status["state"] = "stopped"
+            self.status["next_scan_at"] = None
+            self._write_status()
+            logger.info("作业提醒守护进程已退出")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="作业提醒守护进程")
+    parser.add_argument("--days", type=int, default=5, help="提前多少天提醒")
+    parser.add_argument(
+        "--min-interval", type=int, default=300, help="最短扫描间隔（秒）"
+    )
+    parser.add_argument(
+        "--max-interval", type=int, default=6 * 3600, help="最长扫描间隔（秒）"
+    )
+    parser.add_argument("--jitter", type=float, default=0.1, help="随机抖动比例")
+    parser.add_argument(
+        "--metrics-port", type=int, default=None, help="在本地端口提供 /metrics 端点"
+    )
+    args = parser.parse_args()
+
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+
+    ReminderDaemon(
+        days_threshold=args.days,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+        jitter=args.jitter,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
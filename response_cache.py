@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from storage import write_atomic
+
+
+class ResponseCache:
+    """API响应缓存：内存LRU + 可选的磁盘层，按接口配置过期时间"""
+
+    def __init__(self, ttls=None, default_ttl=0, max_entries=128, disk_dir=None):
+        """
+        Args:
+            ttls: 各接口的过期时间（秒），如 {"/auth/user": 300}
+            default_ttl: 未在 ttls 中配置的接口的过期时间，0 表示不缓存
+            max_entries: 内存中最多保存的条目数，超出后淘汰最久未使用的条目
+            disk_dir: 磁盘缓存目录，为空时只使用内存缓存
+        """
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def ttl_for(self, endpoint):
+        """获取接口的过期时间"""
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    @staticmethod
+    def make_key(endpoint, method="GET", data=None, scope=None):
+        """根据接口、请求方法和请求体生成缓存键，scope 用于区分账号"""
+        raw = json.dumps(
+            [scope, method.upper(), endpoint, data],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _endpoint_prefix(endpoint):
+        return hashlib.sha1(endpoint.encode("utf-8")).hexdigest()[:8]
+
+    def _disk_path(self, key, endpoint):
+        return os.path.join(self.disk_dir, f"{self._endpoint_prefix(endpoint)}_{key}.json")
+
+    def get(self, key, endpoint):
+        """读取缓存，未命中或已过期时返回 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                expires_at, _, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.disk_dir:
+            value, expires_at = self._read_disk(key, endpoint, now)
+            if value is not None:
+                with self._lock:
+                    self._store(key, endpoint, value, expires_at)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, endpoint, value):
+        """写入缓存，接口未配置过期时间时忽略"""
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store(key, endpoint, value, expires_at)
+        if self.disk_dir:
+            self._write_disk(key, endpoint, value, expires_at)
+
+    def _store(self, key, endpoint, value, expires_at):
+        self._entries[key] = (expires_at, endpoint, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key, endpoint, now):
+        filepath = self._disk_path(key, endpoint)
+        try:
+            with open(filepath, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None, 0
+        if entry.get("expires_at", 0) <= now:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+            return None, 0
+        return entry.get("value"), entry["expires_at"]
+
+    def _write_disk(self, key, endpoint, value, expires_at):
+        # 唯一的临时文件，权限 0600（缓存中有用户信息等个人数据），写入失败时删除临时文件
+        entry = {"endpoint": endpoint, "expires_at": expires_at, "value": value}
+        try:
+            write_atomic(
+                self._disk_path(key, endpoint),
+                json.dumps(entry, ensure_ascii=False).encode("utf-8"),
+            )
+        except OSError:
+            pass
+
+    def invalidate(self, endpoint=None):
+        """使缓存失效，endpoint 为空时清空全部缓存"""
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                for key in [k for k, v in self._entries.items() if v[1] == endpoint]:
+                    del self._entries[key]
+
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            prefix = None if endpoint is None else self._endpoint_prefix(endpoint) + "_"
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json") and (prefix is None or name.startswith(prefix)):
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self):
+        """缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,296 @@
+import os
+
+import numpy as np
+
+from score_archive import open_archive, score_snapshot
+
+
+def _to_float(value):
+    """将 finalScore 转换为浮点数，没有成绩或无法解析时为 NaN"""
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class Columns:
+    """按列存储的结果表，每列为等长的 NumPy 数组"""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def records(self):
+        """转换为字典列表，NaN 转换为 None，便于输出JSON"""
+        names = list(self.columns)
+        values = [self.columns[name].tolist() for name in names]
+        return [
+            {
+                name: None if isinstance(value, float) and value != value else value
+                for name, value in zip(names, row)
+            }
+            for row in zip(*values)
+        ]
+
+    def to_dataframe(self):
+        """转换为 pandas DataFrame（需要安装 pandas）"""
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("导出 DataFrame 需要安装 pandas") from e
+        return pd.DataFrame(self.columns)
+
+
+def _group_stats(codes, values, valid, size):
+    """
+    按分组编号计算有效取值的个数、平均值、中位数、最小值和最大值
+
+    Args:
+        codes: 每行的分组编号
+        values: 每行的取值
+        valid: 参与统计的行
+        size: 分组数
+    """
+    group_codes = codes[valid]
+    group_values = values[valid]
+    # 先按分组、再按取值排序，每组的取值连续且有序
+    order = np.lexsort((group_values, group_codes))
+    sorted_values = group_values[order]
+    counts = np.bincount(group_codes, minlength=size)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+
+    sums = np.bincount(group_codes, weights=group_values, minlength=size)
+    mean = np.full(size, np.nan)
+    median = np.full(size, np.nan)
+    minimum = np.full(size, np.nan)
+    maximum = np.full(size, np.nan)
+    mean[has] = sums[has] / counts[has]
+    minimum[has] = sorted_values[starts[has]]
+    maximum[has] = sorted_values[starts[has] + counts[has] - 1]
+    low = starts[has] + (counts[has] - 1) // 2
+    high = starts[has] + counts[has] // 2
+    median[has] = (sorted_values[low] + sorted_values[high]) / 2
+    return counts, mean, median, minimum, maximum
+
+
+def _rank_desc(values):
+    """按取值从高到低排名（并列取相同名次），NaN 的名次为 0"""
+    valid = ~np.isnan(values)
+    ascending = np.sort(values[valid])
+    ranks = np.zeros(len(values), dtype=np.int64)
+    ranks[valid] = len(ascending) - np.searchsorted(ascending, values[valid], side="right") + 1
+    return ranks
+
+
+class ScoreTable:
+    """
+    按列存储的成绩数据
+
+    账号和课程以整数编号存储，名称分别保存在 accounts 和 courses 中，
+    统计时用 bincount、lexsort 等向量化操作按编号分组。
+    """
+
+    def __init__(self, account, course, homework_id, title, submitted, score, accounts, courses):
+        self.account = account
+        self.course = course
+        self.homework_id = homework_id
+        self.title = title
+        self.submitted = submitted
+        self.score = score
+        self.accounts = accounts
+        self.courses = courses
+
+    def __len__(self):
+        return len(self.score)
+
+    @classmethod
+    def from_snapshots(cls, snapshots):
+        """
+        从各账号的成绩快照创建
+
+        Args:
+            snapshots: {账号: {作业ID: 成绩记录}}，成绩记录格式见 score_archive.score_record
+        """
+        account_index = {}
+        course_index = {}
+        account, course, homework_id, title, submitted, score = [], [], [], [], [], []
+        for name, snapshot in snapshots.items():
+            code = account_index.setdefault(name, len(account_index))
+            for key, record in snapshot.items():
+                account.append(code)
+                course.append(course_index.setdefault(record["course_name"], len(course_index)))
+                homework_id.append(key)
+                title.append(record["title"])
+                submitted.append(bool(record["submitted"]))
+                score.append(_to_float(record["final_score"]))
+        return cls(
+            np.array(account, dtype=np.int32),
+            np.array(course, dtype=np.int32),
+            np.array(homework_id, dtype=object),
+            np.array(title, dtype=object),
+            np.array(submitted, dtype=bool),
+            np.array(score, dtype=np.float64),
+            np.array(list(account_index), dtype=object),
+            np.array(list(course_index), dtype=object),
+        )
+
+    @classmethod
+    def from_course_data(cls, course_data, account="default"):
+        """从单个账号的课程数据（getJoinedCourse2 响应）创建"""
+        return cls.from_snapshots({account: score_snapshot(course_data)})
+
+    @classmethod
+    def from_archives(cls, root, at=None):
+        """
+        从成绩归档根目录下所有账号的快照创建
+
+        Args:
+            root: 归档根目录，每个子目录为一个账号
+            at: 时间戳，默认使用各账号的最新快照
+        """
+        snapshots = {}
+        if os.path.isdir(root):
+            for name in sorted(os.listdir(root)):
+                if not os.path.isdir(os.path.join(root, name)):
+                    continue
+                archive = open_archive(root, name)
+                snapshot = archive.latest() if at is None else archive.state_at(at)
+                if snapshot:
+                    snapshots[name] = snapshot
+        return cls.from_snapshots(snapshots)
+
+    def to_columns(self):
+        """每个作业一行的明细表"""
+        return Columns(
+            {
+                "account": self.accounts[self.account],
+                "course": self.courses[self.course],
+                "homework_id": self.homework_id,
+                "title": self.title,
+                "submitted": self.submitted,
+                "final_score": self.score,
+            }
+        )
+
+    def _scored(self, zero_as_ungraded):
+        """参与成绩统计的行：已提交且有成绩，zero_as_ungraded 时排除0分"""
+        scored = self.submitted & ~np.isnan(self.score)
+        if zero_as_ungraded:
+            scored &= self.score != 0
+        return scored
+
+    def course_stats(self, by_account=False, zero_as_ungraded=False):
+        """
+        按课程统计
+
+        Args:
+            by_account: 是否按 (账号, 课程) 分组，默认所有账号合并按课程分组
+            zero_as_ungraded: 是否将已提交的0分视为未评分，不计入平均值等统计
+
+        Returns:
+            Columns，包含作业数、提交数、完成率、未提交数、已提交0分数，
+            以及成绩的平均值、中位数、最小值和最大值
+        """
+        n_courses = len(self.courses)
+        if by_account:
+            codes = self.account.astype(np.int64) * n_courses + self.course
+            size = len(self.accounts) * n_courses
+        else:
+            codes = self.course.astype(np.int64)
+            size = n_courses
+
+        total = np.bincount(codes, minlength=size)
+        submitted = np.bincount(codes, weights=self.submitted, minlength=size).astype(np.int64)
+        zero = np.bincount(
+            codes, weights=self.submitted & (self.score == 0), minlength=size
+        ).astype(np.int64)
+        scored, mean, median, minimum, maximum = _group_stats(
+            codes, self.score, self._scored(zero_as_ungraded), size
+        )
+
+        present = total > 0
+        columns = {}
+        if by_account:
+            columns["account"] = self.accounts[np.arange(size) // n_courses][present]
+            columns["course"] = self.courses[np.arange(size) % n_courses][present]
+        else:
+            columns["course"] = self.courses[present]
+        columns.update(
+            {
+                "homework": total[present],
+                "submitted": submitted[present],
+                "completion_rate": submitted[present] / total[present],
+                "unsubmitted": (total - submitted)[present],
+                "zero_score": zero[present],
+                "scored": scored[present],
+                "mean": mean[present],
+                "median": median[present],
+                "min": minimum[present],
+                "max": maximum[present],
+            }
+        )
+        return Columns(columns)
+
+    def account_ranking(self, course=None, zero_as_ungraded=False):
+        """
+        按平均成绩对账号排名
+
+        Args:
+            course: 课程名，默认统计所有课程
+            zero_as_ungraded: 是否将已提交的0分视为未评分
+
+        Returns:
+            Columns，按名次排序，没有成绩的账号名次为 0 并排在最后
+        """
+        rows = np.ones(len(self), dtype=bool)
+        if course is not None:
+            matches = np.flatnonzero(self.courses == course)
+            rows = np.isin(self.course, matches)
+        size = len(self.accounts)
+        codes = self.account[rows]
+        total = np.bincount(codes, minlength=size)
+        submitted = np.bincount(codes, weights=self.submitted[rows], minlength=size)
+        scored, mean, median, _, _ = _group_stats(
+            self.account, self.score, self._scored(zero_as_ungraded) & rows, size
+        )
+        rank = _rank_desc(mean)
+        completion = np.divide(
+            submitted, total, out=np.full(size, np.nan), where=total > 0
+        )
+
+        present = total > 0
+        order = np.lexsort(
+            (self.accounts[present].astype(str), rank[present], rank[present] == 0)
+        )
+        return Columns(
+            {
+                "rank": rank[present][order],
+                "account": self.accounts[present][order],
+                "homework": total[present][order],
+                "completion_rate": completion[present][order],
+                "scored": scored[present][order],
+                "mean": mean[present][order],
+                "median": median[present][order],
+            }
+        )
+
+    def overview(self):
+        """总体统计"""
+        scored = self._scored(False)
+        return {
+            "accounts": len(self.accounts),
+            "courses": len(self.courses),
+            "homework": len(self),
+            "submitted": int(self.submitted.sum()),
+            "unsubmitted": int((~self.submitted).sum()),
+            "zero_score": int((self.submitted & (self.score == 0)).sum()),
+            "mean": float(self.score[scored].mean()) if scored.any() else None,
+        }
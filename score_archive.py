@@ -0,0 +1,430 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只做进程内加锁
+    fcntl = None
+
+from log_config import setup_logger
+from models import parse_courses
+from storage import safe_name
+
+logger = setup_logger("ScoreArchive")
+
+INDEX_FILE = "index.bin"
+BLOB_FILE = "snapshots.zlib"
+LOCK_FILE = "archive.lock"
+INDEX_MAGIC = b"ZXSCORE1"
+# 索引记录：时间戳(double)、快照在数据文件中的偏移(uint64)、长度(uint32)、SHA-256
+RECORD = struct.Struct("<dQI32s")
+
+
+def score_record(course, homework):
+    """成绩快照中单个作业的记录"""
+    student = homework.student
+    return {
+        "course_name": course.name,
+        "title": homework.title,
+        "submitted": homework.submitted,
+        "final_score": student and student.final_score,
+        "correct_progress": student and student.correct_progress,
+    }
+
+
+def score_snapshot(course_data):
+    """
+    从课程数据生成成绩快照
+
+    Returns:
+        {作业ID: 成绩记录}
+    """
+    return {
+        homework.key: score_record(course, homework)
+        for course in parse_courses(course_data)
+        for homework in course.homework
+    }
+
+
+@dataclass(slots=True)
+class ScoreChange:
+    """两个快照之间单个作业的变化，old/new 为 None 表示作业新增/消失"""
+
+    timestamp: float
+    homework_id: str
+    old: dict = None
+    new: dict = None
+
+    @property
+    def kind(self):
+        if self.old is None:
+            return "added"
+        if self.new is None:
+            return "removed"
+        return "changed"
+
+
+class _Timestamps:
+    """索引中时间戳的只读序列视图，供 bisect 直接在内存映射上查找"""
+
+    def __init__(self, view, count):
+        self._view = view
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        return RECORD.unpack_from(self._view, len(INDEX_MAGIC) + i * RECORD.size)[0]
+
+
+class ScoreArchive:
+    """
+    单个账号的成绩快照归档
+
+    只追加的两个文件：
+    - snapshots.zlib：压缩后的快照，内容相同的快照只保存一份
+    - index.bin：定长索引记录，按时间排序，查询时内存映射后二分查找
+
+    只有内容与上一条记录不同时才追加索引，因此索引中的每条记录都是一个变化点。
+
+    定时任务、守护进程、网关和命令行可能在不同进程中写同一个归档：追加和恢复时持有文件锁
+    （fcntl.flock），并在锁内先读入其他进程追加的索引记录，再做去重和时间顺序检查。
+    """
+
+    def __init__(self, directory, cache_size=32):
+        """
+        Args:
+            directory: 归档目录
+            cache_size: 解压后快照的缓存个数
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.blob_path = os.path.join(directory, BLOB_FILE)
+        self.lock_path = os.path.join(directory, LOCK_FILE)
+        self.cache_size = cache_size
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()
+        self._blobs = {}  # {SHA-256: (偏移, 长度)}
+        self._mmap = None
+        self._mapped_count = 0
+        os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            self._recover()
+
+    @contextmanager
+    def _locked(self):
+        """持有进程内锁和跨进程的文件锁"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+
+    def _recover(self):
+        """打开归档，截断写入中断时残留的不完整索引记录（需持有文件锁）"""
+        if not os.path.exists(self.index_path) or os.path.getsize(self.index_path) == 0:
+            with open(self.index_path, "wb") as file:
+                file.write(INDEX_MAGIC)
+        blob_size = os.path.getsize(self.blob_path) if os.path.exists(self.blob_path) else 0
+
+        with open(self.index_path, "rb") as file:
+            if file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"不是成绩归档索引文件: {self.index_path}")
+            data = file.read()
+
+        count = len(data) // RECORD.size
+        self._last = None
+        valid = 0
+        for i in range(count):
+            timestamp, offset, length, digest = RECORD.unpack_from(data, i * RECORD.size)
+            if offset + length > blob_size:
+                break
+            self._blobs.setdefault(digest, (offset, length))
+            self._last = (timestamp, digest)
+            valid += 1
+        if valid * RECORD.size != len(data):
+            logger.warning(f"成绩归档索引不完整，已截断到 {valid} 条记录: {self.index_path}")
+            with open(self.index_path, "r+b") as file:
+                file.truncate(len(INDEX_MAGIC) + valid * RECORD.size)
+        self._count = valid
+
+    def _refresh(self):
+        """读入其他进程追加的完整索引记录（需持有 self._lock）"""
+        count = max(0, os.path.getsize(self.index_path) - len(INDEX_MAGIC)) // RECORD.size
+        if count <= self._count:
+            return
+        with open(self.index_path, "rb") as file:
+            file.seek(len(INDEX_MAGIC) + self._count * RECORD.size)
+            data = file.read((count - self._count) * RECORD.size)
+        # 快照数据在索引记录之前写入并同步，完整的索引记录引用的快照一定已写完
+        for i in range(len(data) // RECORD.size):
+            timestamp, offset, length, digest = RECORD.unpack_from(data, i * RECORD.size)
+            self._blobs.setdefault(digest, (offset, length))
+            self._last = (timestamp, digest)
+            self._count += 1
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    def append(self, snapshot, timestamp=None):
+        """
+        追加一个快照
+
+        Args:
+            snapshot: {作业ID: 成绩记录}
+            timestamp: 快照时间，默认当前时间，不能早于最后一条记录
+
+        Returns:
+            是否追加了新记录（与上一条内容相同时返回 False）
+        """
+        payload = json.dumps(
+            snapshot, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+        ).encode("utf-8")
+        digest = hashlib.sha256(payload).digest()
+
+        with self._locked():
+            self._refresh()
+            if timestamp is None:
+                # 在锁内取当前时间，多个进程依次追加时时间戳保持有序
+                timestamp = max(time.time(), self._last[0] if self._last else 0.0)
+            timestamp = float(timestamp)
+            if self._last is not None:
+                last_timestamp, last_digest = self._last
+                if digest == last_digest:
+                    return False
+                if timestamp < last_timestamp:
+                    raise ValueError("快照时间早于归档中的最后一条记录")
+
+            location = self._blobs.get(digest)
+            if location is None:
+                compressed = zlib.compress(payload, 9)
+                with open(self.blob_path, "ab") as file:
+                    offset = file.seek(0, os.SEEK_END)
+                    file.write(compressed)
+                    file.flush()
+                    os.fsync(file.fileno())
+                location = self._blobs[digest] = (offset, len(compressed))
+
+            # 先写快照再写索引，中断时只会留下未被引用的快照数据
+            with open(self.index_path, "ab") as file:
+                file.write(RECORD.pack(timestamp, *location, digest))
+                file.flush()
+                os.fsync(file.fileno())
+            self._last = (timestamp, digest)
+            self._count += 1
+        return True
+
+    def append_course_data(self, course_data, timestamp=None):
+        """从课程数据生成并追加成绩快照"""
+        return self.append(score_snapshot(course_data), timestamp)
+
+    def _view(self):
+        """返回索引的内存映射和记录数，索引文件增长（包括其他进程追加）后重新映射"""
+        self._refresh()
+        if self._count == 0:
+            return None, 0
+        if self._mmap is None or self._mapped_count != self._count:
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.index_path, "rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_count = self._count
+        return self._mmap, self._count
+
+    def _record(self, view, i):
+        return RECORD.unpack_from(view, len(INDEX_MAGIC) + i * RECORD.size)
+
+    def _cache_put(self, offset, snapshot):
+        self._cache[offset] = snapshot
+        self._cache.move_to_end(offset)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load(self, offset, length):
+        snapshot = self._cache.get(offset)
+        if snapshot is None:
+            with open(self.blob_path, "rb") as file:
+                file.seek(offset)
+                snapshot = json.loads(zlib.decompress(file.read(length)))
+            self._cache_put(offset, snapshot)
+        else:
+            self._cache.move_to_end(offset)
+        return snapshot
+
+    def _range(self, view, count, since, until):
+        """索引中时间在 (since, until] 内的记录下标范围"""
+        timestamps = _Timestamps(view, count)
+        start = 0 if since is None else bisect_right(timestamps, since)
+        stop = count if until is None else bisect_right(timestamps, until)
+        return range(start, stop)
+
+    def entries(self, since=None, until=None):
+        """
+        列出时间在 (since, until] 内的变化点
+
+        Returns:
+            [(时间戳, SHA-256十六进制), ...]
+        """
+        with self._lock:
+            view, count = self._view()
+            if not count:
+                return []
+            return [
+                (timestamp, digest.hex())
+                for timestamp, _, _, digest in (
+                    self._record(view, i) for i in self._range(view, count, since, until)
+                )
+            ]
+
+    def state_at(self, timestamp):
+        """
+        查询某一时刻的成绩快照
+
+        Returns:
+            {作业ID: 成绩记录}（与缓存共享，不要修改），该时刻之前没有记录时返回 None
+        """
+        with self._lock:
+            view, count = self._view()
+            if not count:
+                return None
+            i = bisect_right(_Timestamps(view, count), timestamp) - 1
+            if i < 0:
+                return None
+            _, offset, length, _ = self._record(view, i)
+            return self._load(offset, length)
+
+    def latest(self):
+        """最新的成绩快照，没有记录时返回 None"""
+        with self._lock:
+            self._refresh()
+            return self.state_at(self._last[0]) if self._last else None
+
+    def changes(self, since=None, until=None):
+        """
+        列出时间在 (since, until] 内的所有变化
+
+        Returns:
+            按时间排序的 ScoreChange 列表
+        """
+        result = []
+        with self._lock:
+            view, count = self._view()
+            if not count:
+                return result
+            indices = self._range(view, count, since, until)
+            previous = (self.state_at(since) if since is not None else None) or {}
+            for i in indices:
+                timestamp, offset, length, _ = self._record(view, i)
+                current = self._load(offset, length)
+                for homework_id in previous.keys() | current.keys():
+                    old = previous.get(homework_id)
+                    new = current.get(homework_id)
+                    if old != new:
+                        result.append(ScoreChange(timestamp, homework_id, old, new))
+                previous = current
+        result.sort(key=lambda change: (change.timestamp, change.homework_id))
+        return result
+
+    def history(self, homework_id, since=None, until=None, field="final_score"):
+        """
+        查询单个作业某一字段随时间的变化
+
+        Args:
+            homework_id: 作业ID
+            since: 起始时间，包含该时刻的取值
+            until: 结束时间
+            field: 成绩记录中的字段，None 表示整条记录
+
+        Returns:
+            [(时间戳, 取值), ...]，从作业第一次出现开始，只包含取值发生变化的时刻，
+            作业消失时取值为 None
+        """
+        result = []
+        missing = object()
+        previous = missing
+        with self._lock:
+            view, count = self._view()
+            if not count:
+                return result
+            points = []
+            if since is not None:
+                state = self.state_at(since)
+                if state is not None:
+                    points.append((float(since), state))
+            for i in self._range(view, count, since, until):
+                timestamp, offset, length, _ = self._record(view, i)
+                points.append((timestamp, self._load(offset, length)))
+
+            for timestamp, state in points:
+                record = state.get(homework_id)
+                if record is None and previous is missing:
+                    # 作业出现之前的记录没有意义
+                    continue
+                value = record if field is None or record is None else record.get(field)
+                if value != previous:
+                    result.append((timestamp, value))
+                    previous = value
+        return result
+
+    def stats(self):
+        """归档大小和去重情况"""
+        with self._lock:
+            self._refresh()
+            return {
+                "entries": self._count,
+                "unique_snapshots": len(self._blobs),
+                "index_bytes": os.path.getsize(self.index_path),
+                "blob_bytes": (
+                    os.path.getsize(self.blob_path) if os.path.exists(self.blob_path) else 0
+                ),
+            }
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def archive_dir(output_dir):
+    """归档根目录，默认读取 ZXIN_SCORE_ARCHIVE，否则为输出目录下的 score_archive"""
+    return os.getenv("ZXIN_SCORE_ARCHIVE") or os.path.join(output_dir, "score_archive")
+
+
+def open_archive(root, account):
+    """
+    打开账号的成绩归档，同一进程中相同目录共享一个实例
+
+    Args:
+        root: 归档根目录，每个账号使用其下的独立子目录
+        account: 账号
+    """
+    name = safe_name(account or "default")
+    directory = os.path.abspath(os.path.join(root, name))
+    with _archives_lock:
+        archive = _archives.get(directory)
+        if archive is None:
+            archive = _archives[directory] = ScoreArchive(directory)
+        return archive
@@ -1,14 +1,27 @@
+import io
 from zxin_client import ZXinClient
 from log_config import setup_logger
+from exporters import ScoreTextWriter, export_files, export_rows, iter_rows
+from score_archive import archive_dir, open_archive
 
 
 class ScoreManager:
     """知新2.0成绩管理类，处理成绩数据相关功能"""
 
-    def __init__(self, client: ZXinClient):
-        """初始化成绩管理器"""
+    def __init__(self, client: ZXinClient, archive=None):
+        """
+        初始化成绩管理器
+
+        Args:
+            client: 知新客户端
+            archive: 成绩快照归档，默认使用 ZXIN_SCORE_ARCHIVE 或输出目录下的 score_archive
+        """
         self.client = client
         self.logger = setup_logger(self.__class__.__name__)
+        # 归档实现了 __len__，空归档为假值，必须用 is None 判断，否则传入的空归档会被默认归档替换
+        if archive is None:
+            archive = open_archive(archive_dir(client.output_dir), client.username)
+        self.archive = archive
 
     def fetch_score_data(self):
         """获取成绩数据（使用与课程数据相同的API）"""
@@ -34,11 +47,15 @@ class ScoreManager:
         if score_data["msg"] == "成功":
             self.logger.info("即将开始解析成绩数据")
 
-            # 格式化成绩数据
-            formatted_data = self._format_score_data(score_data)
-
-            # 保存格式化的文本数据
-            self.client.save_text(formatted_data, "score_info.txt")
+            # 格式化成绩数据并直接写入文件
+            filepath, changed = export_files(
+                score_data, self.client.storage.directory, {"score_text": "score_info.txt"}
+            )["score_text"]
+            if changed:
+                self.logger.info(f"保存文本成功，已保存到 {filepath} 文件中")
+            else:
+                self.logger.info(f"文本未变化，跳过写入 {filepath}")
+            self.archive_scores(score_data)
 
             self.logger.info("成绩数据解析完成")
             self.logger.info("成绩数据程序运行结束")
@@ -50,23 +67,18 @@ class ScoreManager:
             self.logger.error("成绩数据获取失败")
             return False
 
+    def archive_scores(self, score_data):
+        """将成绩快照追加到归档，与上次相同时不追加"""
+        try:
+            if self.archive.append_course_data(score_data):
+                self.logger.info(f"成绩快照已归档，共 {len(self.archive)} 个变化点")
+            else:
+                self.logger.info("成绩未变化，不追加归档")
+        except (OSError, ValueError) as e:
+            self.logger.error(f"成绩快照归档失败: {e}")
+
     def _format_score_data(self, score_data):
         """将成绩数据格式化为文本格式"""
-        formatted_text = ""
-
-        for course in score_data["data"]:
-            for homework in course["homework"]:
-                formatted_text += f"课程名称: {course['course']['name']}\n"
-                formatted_text += f"作业标题: {homework['title']}\n"
-                formatted_text += f"课程老师: {course['teacher']['user']['nickname']}\n"
-
-                if homework["studenthomework"]:
-                    formatted_text += f"最终得分: {homework['studenthomework'][0]['finalScore']}（若已提交显示0分可能是教师未评分）\n"
-                else:
-                    formatted_text += "暂未作答，无相关成绩数据\n"
-
-                formatted_text += (
-                    "----------------------------------------------------------------\n"
-                )
-
-        return formatted_text
+        buffer = io.StringIO()
+        export_rows(iter_rows(score_data), [ScoreTextWriter(buffer)])
+        return buffer.getvalue()
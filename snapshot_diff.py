@@ -0,0 +1,224 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from enum import Enum
+
+from models import default_homework_id
+
+
+class ChangeType(str, Enum):
+    """作业变化类型"""
+
+    NEW_HOMEWORK = "new_homework"
+    DELETED_HOMEWORK = "deleted_homework"
+    DEADLINE_MOVED = "deadline_moved"
+    NEWLY_SUBMITTED = "newly_submitted"
+    SCORE_CHANGED = "score_changed"
+    PROGRESS_CHANGED = "progress_changed"
+
+
+@dataclass
+class ChangeEvent:
+    """一条作业变化事件"""
+
+    kind: ChangeType
+    homework_id: str
+    course_name: str
+    title: str
+    old: object = None
+    new: object = None
+
+    def to_dict(self):
+        return {
+            "kind": self.kind.value,
+            "homework_id": self.homework_id,
+            "course_name": self.course_name,
+            "title": self.title,
+            "old": self.old,
+            "new": self.new,
+        }
+
+
+def course_key(course):
+    """课程的唯一标识，优先使用课程ID"""
+    info = course.get("course") or {}
+    return str(info.get("id") or info.get("name", ""))
+
+
+def course_hash(course):
+    """课程内容的哈希值，课程及其作业的任一字段变化都会改变哈希"""
+    raw = json.dumps(course, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _homework_state(homework):
+    """提取用于比较的作业字段"""
+    student_hw = (homework.get("studenthomework") or [{}])[0]
+    return {
+        "title": homework.get("title", ""),
+        "endtime": homework.get("endtime"),
+        "submitted": bool(homework.get("studenthomework")),
+        "finalScore": student_hw.get("finalScore"),
+        "answerProgress": student_hw.get("answerProgress"),
+    }
+
+
+class SnapshotDiffer:
+    """
+    课程快照差异比较器
+
+    保存上一次解析后的课程状态和每门课程的内容哈希，哈希未变化的课程直接跳过，
+    只对变化的课程逐项比较作业并生成变化事件。
+    """
+
+    def __init__(self, state=None, id_func=default_homework_id):
+        """
+        Args:
+            state: 上一次保存的状态（to_dict() 的结果），为空时首次比较只建立基线
+            id_func: 作业ID生成函数，参数为 (homework, course_name)
+        """
+        self.courses = (state or {}).get("courses", {})
+        self.id_func = id_func
+        self.courses_changed = 0
+        self.courses_skipped = 0
+        # 最近一次比较中内容变化的课程和已消失的课程，用于增量持久化
+        self.changed_keys = []
+        self.removed_keys = []
+
+    def to_dict(self):
+        """导出当前状态，用于持久化"""
+        return {"courses": self.courses}
+
+    def diff(self, course_data):
+        """
+        比较新的课程数据与上次状态，并更新状态
+
+        Args:
+            course_data: getJoinedCourse2 接口的响应
+
+        Returns:
+            ChangeEvent 列表，首次比较（无历史状态）时返回空列表
+        """
+        self.begin()
+        for course in course_data.get("data", []):
+            self.feed(course)
+        return self.finish()
+
+    def begin(self):
+        """开始一次逐门课程的比较，配合 feed() 和 finish() 用于流式处理"""
+        self._baseline = not self.courses
+        self._events = []
+        self._new_courses = {}
+        self.courses_changed = 0
+        self.courses_skipped = 0
+        self.changed_keys = []
+
+    def feed(self, course):
+        """比较一门课程，课程数据处理完即可释放"""
+        key = course_key(course)
+        digest = course_hash(course)
+        previous = self.courses.get(key)
+        if previous and previous["hash"] == digest:
+            self._new_courses[key] = previous
+            self.courses_skipped += 1
+            return
+
+        self.courses_changed += 1
+        self.changed_keys.append(key)
+        course_name = (course.get("course") or {}).get("name", "")
+        homework_states = {}
+        for homework in course.get("homework", []):
+            homework_states[self.id_func(homework, course_name)] = _homework_state(
+                homework
+            )
+        self._new_courses[key] = {
+            "hash": digest,
+            "name": course_name,
+            "homework": homework_states,
+        }
+        if not self._baseline:
+            old_states = previous["homework"] if previous else {}
+            self._events.extend(
+                self._diff_course(course_name, old_states, homework_states)
+            )
+
+    def finish(self):
+        """结束比较并更新状态，返回 ChangeEvent 列表"""
+        events = self._events
+        # 整门课程消失时，其下的作业全部视为已删除
+        self.removed_keys = [
+            key for key in self.courses if key not in self._new_courses
+        ]
+        if not self._baseline:
+            for key in self.removed_keys:
+                previous = self.courses[key]
+                events.extend(
+                    self._diff_course(previous["name"], previous["homework"], {})
+                )
+
+        self.courses = self._new_courses
+        self._events, self._new_courses = [], {}
+        return events
+
+    @staticmethod
+    def _diff_course(course_name, old_states, new_states):
+        events = []
+        for homework_id, new in new_states.items():
+            old = old_states.get(homework_id)
+            title = new["title"]
+            if old is None:
+                events.append(
+                    ChangeEvent(ChangeType.NEW_HOMEWORK, homework_id, course_name, title)
+                )
+                continue
+            if old["endtime"] != new["endtime"]:
+                events.append(
+                    ChangeEvent(
+                        ChangeType.DEADLINE_MOVED,
+                        homework_id,
+                        course_name,
+                        title,
+                        old["endtime"],
+                        new["endtime"],
+                    )
+                )
+            if not old["submitted"] and new["submitted"]:
+                events.append(
+                    ChangeEvent(
+                        ChangeType.NEWLY_SUBMITTED, homework_id, course_name, title
+                    )
+                )
+            if old["finalScore"] != new["finalScore"]:
+                events.append(
+                    ChangeEvent(
+                        ChangeType.SCORE_CHANGED,
+                        homework_id,
+                        course_name,
+                        title,
+                        old["finalScore"],
+                        new["finalScore"],
+                    )
+                )
+            if old["answerProgress"] != new["answerProgress"]:
+                events.append(
+                    ChangeEvent(
+                        ChangeType.PROGRESS_CHANGED,
+                        homework_id,
+                        course_name,
+                        title,
+                        old["answerProgress"],
+                        new["answerProgress"],
+                    )
+                )
+
+        for homework_id, old in old_states.items():
+            if homework_id not in new_states:
+                events.append(
+                    ChangeEvent(
+                        ChangeType.DELETED_HOMEWORK,
+                        homework_id,
+                        course_name,
+                        old["title"],
+                    )
+                )
+        return events
@@ -0,0 +1,370 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    account TEXT NOT NULL,
+    course_key TEXT NOT NULL,
+    name TEXT,
+    content_hash TEXT,
+    updated_at REAL,
+    PRIMARY KEY (account, course_key)
+);
+CREATE TABLE IF NOT EXISTS homework (
+    account TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    course_key TEXT NOT NULL,
+    title TEXT,
+    endtime TEXT,
+    end_ts REAL,
+    submitted INTEGER NOT NULL DEFAULT 0,
+    final_score TEXT,
+    answer_progress TEXT,
+    first_seen REAL,
+    updated_at REAL,
+    deleted_at REAL,
+    PRIMARY KEY (account, homework_id)
+);
+CREATE INDEX IF NOT EXISTS idx_homework_course ON homework (account, course_key);
+CREATE INDEX IF NOT EXISTS idx_homework_deadline ON homework (account, end_ts);
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    homework_count INTEGER,
+    upcoming_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_scans_account ON scans (account, started_at);
+CREATE TABLE IF NOT EXISTS observations (
+    scan_id INTEGER NOT NULL,
+    account TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    seconds_remaining REAL,
+    submitted INTEGER,
+    PRIMARY KEY (scan_id, homework_id)
+);
+CREATE INDEX IF NOT EXISTS idx_observations_homework
+    ON observations (account, homework_id);
+CREATE TABLE IF NOT EXISTS notifications (
+    account TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    sent_at REAL,
+    PRIMARY KEY (account, homework_id, kind)
+);
+CREATE TABLE IF NOT EXISTS responses (
+    account TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    content_hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    updated_at REAL,
+    PRIMARY KEY (account, endpoint)
+);
+CREATE TABLE IF NOT EXISTS pending (
+    account TEXT NOT NULL,
+    homework_id TEXT NOT NULL,
+    end_ts REAL NOT NULL,
+    info TEXT,
+    PRIMARY KEY (account, homework_id)
+);
+CREATE INDEX IF NOT EXISTS idx_pending_deadline ON pending (account, end_ts);
+"""
+
+
+def _end_timestamp(endtime):
+    """将接口返回的截止时间转换为Unix时间戳，无法解析时返回 None"""
+    if not endtime:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(endtime.replace("Z", "+00:00")).timestamp()
+    except (ValueError, AttributeError):
+        return None
+
+
+class StateStore:
+    """
+    基于 SQLite（WAL 模式）的作业状态存储
+
+    保存课程、作业、每次扫描的观测记录和已发送的通知，按课程增量更新，
+    所有写入都在事务中完成，进程中途被终止也不会损坏已有数据。多个账号可共享同一个数据库。
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 数据库文件路径
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def known_homework_ids(self, account):
+        """获取账号下所有未删除的作业ID"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT homework_id FROM homework WHERE account = ? AND deleted_at IS NULL",
+                (account,),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def load_snapshot(self, account):
+        """
+        读取账号的课程快照，格式与 SnapshotDiffer.to_dict() 相同
+
+        Returns:
+            快照状态，数据库中没有该账号时返回 None
+        """
+        with self._lock:
+            courses = self._conn.execute(
+                "SELECT course_key, name, content_hash FROM courses WHERE account = ?",
+                (account,),
+            ).fetchall()
+            homework = self._conn.execute(
+                "SELECT course_key, homework_id, title, endtime, submitted, "
+                "final_score, answer_progress FROM homework "
+                "WHERE account = ? AND deleted_at IS NULL",
+                (account,),
+            ).fetchall()
+        if not courses:
+            return None
+
+        state = {
+            key: {"hash": content_hash, "name": name, "homework": {}}
+            for key, name, content_hash in courses
+        }
+        for key, homework_id, title, endtime, submitted, score, progress in homework:
+            if key in state:
+                state[key]["homework"][homework_id] = {
+                    "title": title,
+                    "endtime": endtime,
+                    "submitted": bool(submitted),
+                    "finalScore": json.loads(score) if score is not None else None,
+                    "answerProgress": (
+                        json.loads(progress) if progress is not None else None
+                    ),
+                }
+        return {"courses": state}
+
+    def save_snapshot(self, account, courses, changed_keys, removed_keys):
+        """
+        增量保存课程快照，只写入内容变化的课程及其作业
+
+        Args:
+            account: 账号
+            courses: SnapshotDiffer.courses
+            changed_keys: 内容变化的课程
+            removed_keys: 已消失的课程
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for key in changed_keys:
+                course = courses[key]
+                self._conn.execute(
+                    "INSERT INTO courses (account, course_key, name, content_hash, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (account, course_key) DO UPDATE SET "
+                    "name = excluded.name, content_hash = excluded.content_hash, "
+                    "updated_at = excluded.updated_at",
+                    (account, key, course["name"], course["hash"], now),
+                )
+                self._conn.executemany(
+                    "INSERT INTO homework (account, homework_id, course_key, title, endtime, "
+                    "end_ts, submitted, final_score, answer_progress, first_seen, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (account, homework_id) DO UPDATE SET "
+                    "course_key = excluded.course_key, title = excluded.title, "
+                    "endtime = excluded.endtime, end_ts = excluded.end_ts, "
+                    "submitted = excluded.submitted, final_score = excluded.final_score, "
+                    "answer_progress = excluded.answer_progress, "
+                    "updated_at = excluded.updated_at, deleted_at = NULL",
+                    [
+                        (
+                            account,
+                            homework_id,
+                            key,
+                            hw["title"],
+                            hw["endtime"],
+                            _end_timestamp(hw["endtime"]),
+                            int(hw["submitted"]),
+                            json.dumps(hw["finalScore"], ensure_ascii=False),
+                            json.dumps(hw["answerProgress"], ensure_ascii=False),
+                            now,
+                            now,
+                        )
+                        for homework_id, hw in course["homework"].items()
+                    ],
+                )
+                self._mark_deleted(account, key, list(course["homework"]), now)
+
+            for key in removed_keys:
+                self._mark_deleted(account, key, [], now)
+                self._conn.execute(
+                    "DELETE FROM courses WHERE account = ? AND course_key = ?",
+                    (account, key),
+                )
+
+    def _mark_deleted(self, account, course_key, keep_ids, now):
+        """将课程下不在 keep_ids 中的作业标记为已删除"""
+        placeholders = ",".join("?" * len(keep_ids))
+        condition = f"AND homework_id NOT IN ({placeholders})" if keep_ids else ""
+        self._conn.execute(
+            "UPDATE homework SET deleted_at = ? "
+            "WHERE account = ? AND course_key = ? AND deleted_at IS NULL "
+            f"{condition}",
+            (now, account, course_key, *keep_ids),
+        )
+
+    def record_scan(self, account, started_at, observations, upcoming_count):
+        """
+        记录一次扫描及其中每个作业的观测值
+
+        Args:
+            account: 账号
+            started_at: 扫描开始时间戳
+            observations: [(homework_id, seconds_remaining, is_submitted), ...]
+            upcoming_count: 即将截止的作业数
+
+        Returns:
+            扫描ID
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO scans (account, started_at, finished_at, homework_count, "
+                "upcoming_count) VALUES (?, ?, ?, ?, ?)",
+                (account, started_at, time.time(), len(observations), upcoming_count),
+            )
+            scan_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO observations (scan_id, account, homework_id, "
+                "seconds_remaining, submitted) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (scan_id, account, homework_id, seconds, int(submitted))
+                    for homework_id, seconds, submitted in observations
+                ],
+            )
+        return scan_id
+
+    def record_notifications(self, account, items):
+        """
+        记录已发送的通知
+
+        Args:
+            items: [(homework_id, kind), ...]
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO notifications (account, homework_id, kind, sent_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(account, homework_id, kind, now) for homework_id, kind in items],
+            )
+
+    def notified_keys(self, account, kinds):
+        """
+        批量读取已发送的通知
+
+        Returns:
+            {(作业ID, 类型), ...}
+        """
+        kinds = list(kinds)
+        if not kinds:
+            return set()
+        placeholders = ",".join("?" * len(kinds))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT homework_id, kind FROM notifications "
+                f"WHERE account = ? AND kind IN ({placeholders})",
+                (account, *kinds),
+            ).fetchall()
+        return {(homework_id, kind) for homework_id, kind in rows}
+
+    def load_fingerprint(self, account, endpoint):
+        """
+        读取上次成功处理的接口响应指纹
+
+        Returns:
+            {"hash", "etag", "last_modified"}，没有记录时返回 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, etag, last_modified FROM responses "
+                "WHERE account = ? AND endpoint = ?",
+                (account, endpoint),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"hash": row[0], "etag": row[1], "last_modified": row[2]}
+
+    def save_fingerprint(self, account, endpoint, fingerprint):
+        """保存接口响应指纹，应在响应内容全部处理并保存后调用"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (account, endpoint, content_hash, etag, "
+                "last_modified, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    account,
+                    endpoint,
+                    fingerprint.get("hash"),
+                    fingerprint.get("etag"),
+                    fingerprint.get("last_modified"),
+                    time.time(),
+                ),
+            )
+
+    def save_pending(self, account, items):
+        """
+        替换账号下未提交且未过期的作业，供课程数据未变化时检查截止时间
+
+        Args:
+            items: [(homework_id, end_ts, 作业信息字典), ...]
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pending WHERE account = ?", (account,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pending (account, homework_id, end_ts, info) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (account, homework_id, end_ts, json.dumps(info, ensure_ascii=False))
+                    for homework_id, end_ts, info in items
+                ],
+            )
+
+    def load_pending(self, account, since):
+        """
+        读取截止时间不早于 since 的未提交作业
+
+        Returns:
+            按截止时间排序的 [(homework_id, end_ts, 作业信息字典), ...]
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT homework_id, end_ts, info FROM pending "
+                "WHERE account = ? AND end_ts >= ? ORDER BY end_ts",
+                (account, since),
+            ).fetchall()
+        return [(homework_id, end_ts, json.loads(info)) for homework_id, end_ts, info in rows]
+
+    def was_notified(self, account, homework_id, kind):
+        """判断通知是否已发送过"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM notifications WHERE account = ? AND homework_id = ? AND kind = ?",
+                (account, homework_id, kind),
+            ).fetchone()
+        return row is not None
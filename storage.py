@@ -0,0 +1,330 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import metrics
+
+STORAGE_WRITES = metrics.REGISTRY.counter(
+    "zxin_storage_writes_total", "输出文件写入次数（written 为实际写入，unchanged 为内容未变跳过）", ("result",)
+)
+
+DEFAULT_FORMAT = "json"
+
+
+def _dump_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _dump_pretty(data):
+    return json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+
+
+def _dump_gzip(data):
+    # mtime 固定为 0，相同数据的压缩结果逐字节相同，才能按哈希跳过写入
+    return gzip.compress(_dump_json(data), compresslevel=6, mtime=0)
+
+
+def _load_json(raw):
+    return json.loads(raw)
+
+
+def _load_gzip(raw):
+    return json.loads(gzip.decompress(raw))
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("msgpack 格式需要安装 msgpack") from e
+    return msgpack
+
+
+def _dump_msgpack(data):
+    return _msgpack().packb(data, use_bin_type=True)
+
+
+def _load_msgpack(raw):
+    return _msgpack().unpackb(raw, raw=False, strict_map_key=False)
+
+
+# {格式名: (文件名后缀替换规则, 编码, 解码)}，后缀规则为 (原后缀, 新后缀)
+FORMATS = {
+    "json": ((".json", ".json"), _dump_json, _load_json),
+    "pretty": ((".json", ".json"), _dump_pretty, _load_json),
+    "gzip": ((".json", ".json.gz"), _dump_gzip, _load_gzip),
+    "msgpack": ((".json", ".msgpack"), _dump_msgpack, _load_msgpack),
+}
+
+
+def _format_path(path, format):
+    """按格式替换文件后缀，如 course_data.json -> course_data.json.gz"""
+    (old, new), _, _ = FORMATS[format]
+    if path.endswith(old):
+        return path[: -len(old)] + new
+    return path + new if old != new else path
+
+
+def _format_of(path):
+    """按文件后缀判断编码格式"""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".msgpack"):
+        return "msgpack"
+    return "json"
+
+
+_digests = {}  # {绝对路径: ((大小, 修改时间, inode), 计算时间, SHA-256)}
+_digests_lock = threading.Lock()
+
+# 文件系统修改时间的精度可能只有 1 秒（甚至 2 秒），计算摘要时修改时间距今不足该时长的文件，
+# 之后可能被其他进程以相同大小重写而修改时间不变，这类缓存下次使用前重新计算（与 git 处理 racy clean 的方式相同）
+MTIME_GRANULARITY_NS = 2 * 10**9
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _stat_key(stat):
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def file_digest(path):
+    """
+    文件内容的 SHA-256
+
+    大小、修改时间和 inode 都未变，且计算摘要时文件已有一段时间（MTIME_GRANULARITY_NS）未修改时使用缓存，
+    否则重新读取文件计算，其他进程在修改时间精度内以相同大小重写文件也能发现。
+
+    Returns:
+        SHA-256 摘要，文件不存在时返回 None
+    """
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = _stat_key(stat)
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached is not None:
+        cached_key, cached_at, digest = cached
+        if cached_key == key and stat.st_mtime_ns + MTIME_GRANULARITY_NS <= cached_at:
+            return digest
+    cached_at = time.time_ns()
+    digest = _hash_file(path)
+    with _digests_lock:
+        _digests[path] = (key, cached_at, digest)
+    return digest
+
+
+def _remember(path, digest):
+    stat = os.stat(path)
+    with _digests_lock:
+        _digests[os.path.abspath(path)] = (_stat_key(stat), time.time_ns(), digest)
+
+
+def _fsync_dir(directory):
+    """同步目录项，确保重命名在断电后仍然有效（不支持的平台忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _unchanged(tmp_path, path, digest=None):
+    """临时文件与目标文件内容是否相同，大小不同时不读取文件"""
+    try:
+        if os.path.getsize(tmp_path) != os.path.getsize(path):
+            return False
+    except FileNotFoundError:
+        return False
+    return (digest or _hash_file(tmp_path)) == file_digest(path)
+
+
+def replace_if_changed(tmp_path, path, digest=None):
+    """
+    用已写完的临时文件替换目标文件，内容与目标文件相同时删除临时文件
+
+    Args:
+        tmp_path: 临时文件，应与目标文件在同一目录
+        path: 目标文件
+        digest: 临时文件内容的 SHA-256，为空时读取文件计算
+
+    Returns:
+        是否实际替换了目标文件
+    """
+    if _unchanged(tmp_path, path, digest):
+        os.remove(tmp_path)
+        STORAGE_WRITES.inc(result="unchanged")
+        return False
+    fd = os.open(tmp_path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+    _remember(path, digest or _hash_file(path))
+    STORAGE_WRITES.inc(result="written")
+    return True
+
+
+def temp_file(path):
+    """
+    在目标文件所在目录创建唯一的临时文件，多个线程或进程同时写同一目标时不会共用临时文件
+
+    Returns:
+        (文件描述符, 临时文件路径)
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    return tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+
+
+def write_atomic(path, data, mode=None):
+    """
+    原子写入字节串：写入同目录下的临时文件、fsync 后重命名，内容与目标文件相同时不写入
+
+    Args:
+        path: 目标文件
+        data: 字节串
+        mode: 文件权限，默认为临时文件的 0600；需要被其他用户读取的文件（如指标文件）可传 0o644
+
+    Returns:
+        是否实际写入了目标文件
+    """
+    digest = hashlib.sha256(data).digest()
+    if os.path.exists(path) and os.path.getsize(path) == len(data) and file_digest(path) == digest:
+        STORAGE_WRITES.inc(result="unchanged")
+        return False
+    fd, tmp_path = temp_file(path)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        return replace_if_changed(tmp_path, path, digest)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def safe_name(name):
+    """将账号等名称转换为可用作目录名的字符串"""
+    return re.sub(r"[^\w.-]", "_", str(name))
+
+
+class Storage:
+    """
+    输出文件存储
+
+    - JSON 数据按 format 编码：json（紧凑JSON）、pretty（缩进JSON）、gzip、msgpack（需要安装 msgpack）
+    - 所有写入都是原子的，内容与磁盘上的文件相同时跳过写入
+    - namespace 不为空时文件保存在 root/namespace 下，多个账号共享同一输出根目录
+    """
+
+    def __init__(self, root="output", namespace=None, format=DEFAULT_FORMAT):
+        """
+        Args:
+            root: 输出根目录
+            namespace: 命名空间（如账号），为空时直接使用根目录
+            format: JSON 数据的编码格式
+        """
+        if format not in FORMATS:
+            raise ValueError(f"不支持的存储格式: {format}，可选 {', '.join(FORMATS)}")
+        if format == "msgpack":
+            _msgpack()
+        self.root = root
+        self.namespace = namespace
+        self.format = format
+        self.directory = os.path.join(root, safe_name(namespace)) if namespace else root
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, root="output", account=None, **overrides):
+        """
+        从环境变量读取配置：ZXIN_STORAGE_FORMAT 为编码格式，
+        ZXIN_STORAGE_NAMESPACE 为 account 时按账号分目录，为其他非空值时作为命名空间
+        """
+        options = {"format": os.getenv("ZXIN_STORAGE_FORMAT") or DEFAULT_FORMAT}
+        namespace = os.getenv("ZXIN_STORAGE_NAMESPACE")
+        if namespace:
+            options["namespace"] = account if namespace == "account" else namespace
+        options.update({name: value for name, value in overrides.items() if value is not None})
+        return cls(root, **options)
+
+    def path(self, filename):
+        """文件在存储目录中的路径"""
+        return os.path.join(self.directory, filename)
+
+    def data_path(self, filename):
+        """JSON 数据文件按当前格式保存的路径"""
+        return _format_path(self.path(filename), self.format)
+
+    def save(self, data, filename):
+        """
+        按当前格式保存 JSON 数据
+
+        Returns:
+            (文件路径, 是否实际写入)
+        """
+        path = self.data_path(filename)
+        _, dump, _ = FORMATS[self.format]
+        return path, write_atomic(path, dump(data))
+
+    def load(self, filename):
+        """
+        读取 JSON 数据，当前格式的文件不存在时依次尝试其他格式的文件，
+        切换格式后仍能读取之前保存的数据
+
+        Returns:
+            (文件路径, 数据)
+
+        Raises:
+            FileNotFoundError: 所有格式的文件都不存在
+            ValueError, OSError: 文件内容无法解码
+        """
+        candidates = [self.data_path(filename)]
+        for format in FORMATS:
+            path = _format_path(self.path(filename), format)
+            if path not in candidates:
+                candidates.append(path)
+        for path in candidates:
+            try:
+                with open(path, "rb") as file:
+                    raw = file.read()
+            except FileNotFoundError:
+                continue
+            _, _, load = FORMATS[_format_of(path)]
+            return path, load(raw)
+        raise FileNotFoundError(candidates[0])
+
+    def save_text(self, text, filename):
+        """
+        保存文本
+
+        Returns:
+            (文件路径, 是否实际写入)
+        """
+        path = self.path(filename)
+        return path, write_atomic(path, text.encode("utf-8"))
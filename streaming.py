@@ -0,0 +1,362 @@
+import codecs
+import gzip
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import replace_if_changed, temp_file
+
+# 每次从响应中读取的字节数
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+
+
+class StreamError(Exception):
+    """流式读取或解析失败"""
+
+
+class JSONArrayStream:
+    """
+    增量解析JSON对象中某个数组字段的迭代器
+
+    逐块读取响应内容，每解析出数组中的一个元素就立即产出，已产出的元素不再保留，
+    内存占用只与单个元素的大小有关。对象中的其他顶层字段（如 code、msg）保存在 meta 中，
+    遍历结束后完整可用。
+    """
+
+    def __init__(self, chunks, key="data"):
+        """
+        Args:
+            chunks: 字节块迭代器，如 response.iter_content()
+            key: 要流式解析的数组字段名
+        """
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.key = key
+        self.meta = {}
+        self.count = 0
+
+    def _fill(self):
+        """读取下一块数据，没有更多数据时返回 False"""
+        if self._eof:
+            return False
+        # 丢弃已解析的部分，避免缓冲区无限增长
+        if self._pos:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._buf += self._decoder.decode(b"", final=True)
+            self._eof = True
+            return False
+        self._buf += self._decoder.decode(chunk)
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def _peek(self):
+        self._skip_whitespace()
+        if self._pos >= len(self._buf):
+            raise StreamError("JSON数据意外结束")
+        return self._buf[self._pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise StreamError(f"JSON格式错误：期望 '{char}'，位置 {self._pos}")
+        self._pos += 1
+
+    def _decode_value(self):
+        """解析一个完整的JSON值，数据不完整时继续读取"""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+                # 值恰好在缓冲区末尾时（如数字）可能尚未读完，需确认后面还有字符
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    raise StreamError(f"JSON解析失败: {e}") from e
+            self._fill()
+
+    def __iter__(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            name = self._decode_value()
+            self._expect(":")
+            if name == self.key and self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        item = self._decode_value()
+                        self.count += 1
+                        yield item
+                        separator = self._peek()
+                        self._pos += 1
+                        if separator == "]":
+                            break
+                        if separator != ",":
+                            raise StreamError(f"JSON格式错误：数组中出现 '{separator}'")
+            else:
+                self.meta[name] = self._decode_value()
+
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise StreamError(f"JSON格式错误：对象中出现 '{separator}'")
+
+
+class PageIterator:
+    """
+    逐页请求列表接口并逐项产出，处理当前页时在后台预取后续页
+
+    已请求但尚未处理的页数不超过 prefetch。遇到不足一页、达到 total 或空页时结束；
+    如果第一页返回的条目多于 page_size，说明上游忽略了分页参数，产出后直接结束。
+    提前停止遍历（break 或 close()）时取消尚未开始的预取。
+    """
+
+    def __init__(self, fetch_page, page_size=50, prefetch=2, start_page=1, max_pages=None):
+        """
+        Args:
+            fetch_page: fetch_page(page, page_size) -> (条目列表, 总条目数或 None)，失败时抛出异常
+            page_size: 每页条目数
+            prefetch: 已请求但尚未处理的最多页数，0 表示处理完当前页后才请求下一页
+            start_page: 起始页码
+            max_pages: 最多请求的页数
+        """
+        self._fetch_page = fetch_page
+        self.page_size = page_size
+        self.prefetch = max(0, prefetch)
+        self.start_page = start_page
+        self.max_pages = max_pages
+        self.pages = 0
+        self.count = 0
+        self.total = None
+        self._iterator = None
+
+    def __iter__(self):
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    def close(self):
+        """停止遍历并取消预取"""
+        if self._iterator is not None:
+            self._iterator.close()
+
+    def _last_page(self, page):
+        """page 之后是否已确定没有更多页"""
+        if self.max_pages is not None and page - self.start_page + 1 >= self.max_pages:
+            return True
+        return self.total is not None and (page - self.start_page + 1) * self.page_size >= self.total
+
+    def _iterate(self):
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, self.prefetch), thread_name_prefix="page"
+        )
+        pending = deque()
+        next_page = self.start_page
+
+        def submit():
+            nonlocal next_page
+            pending.append(
+                (next_page, executor.submit(self._fetch_page, next_page, self.page_size))
+            )
+            next_page += 1
+
+        try:
+            submit()
+            while pending:
+                page, future = pending.popleft()
+                try:
+                    items, total = future.result()
+                except Exception as e:
+                    raise StreamError(f"第 {page} 页读取失败: {e}") from e
+                self.pages += 1
+                if total is not None:
+                    self.total = total
+                last = (
+                    not items
+                    or len(items) != self.page_size
+                    or self._last_page(page)
+                )
+                if last:
+                    for _, other in pending:
+                        other.cancel()
+                    pending.clear()
+                else:
+                    # 总数已知时不预取超出范围的页
+                    while len(pending) < self.prefetch and not self._last_page(next_page - 1):
+                        submit()
+                for item in items:
+                    self.count += 1
+                    yield item
+                if not last and not pending:
+                    submit()
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _AtomicWriter:
+    """
+    先写入临时文件，关闭时替换目标文件，中途失败不会留下半个文件；
+    内容与目标文件相同时不替换，changed 为 False。compress 为 True 时以 gzip 压缩写入
+    """
+
+    def __init__(self, filepath, compress=False):
+        self.filepath = filepath
+        fd, self._tmp_path = temp_file(filepath)
+        if compress:
+            self._raw = open(fd, "wb")
+            # 不写入文件名和修改时间，相同内容的压缩结果逐字节相同，才能按哈希跳过写入
+            gzip_file = gzip.GzipFile(
+                filename="", mode="wb", compresslevel=6, fileobj=self._raw, mtime=0
+            )
+            self._file = io.TextIOWrapper(gzip_file, encoding="utf-8")
+        else:
+            self._raw = None
+            self._file = open(fd, "w", encoding="utf-8")
+        self.count = 0
+        self.changed = None
+
+    def _close_file(self):
+        if not self._file.closed:
+            self._file.close()
+        if self._raw is not None and not self._raw.closed:
+            self._raw.close()
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        """写入结尾并替换目标文件"""
+        if self._file.closed:
+            return
+        self._finish()
+        self._close_file()
+        self.changed = replace_if_changed(self._tmp_path, self.filepath)
+
+    def abort(self):
+        """放弃写入，删除临时文件"""
+        self._close_file()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+class NDJSONWriter(_AtomicWriter):
+    """逐行写入JSON对象（NDJSON）"""
+
+    def write(self, item):
+        self._file.write(json.dumps(item, ensure_ascii=False))
+        self._file.write("\n")
+        self.count += 1
+
+
+class JSONArrayWriter(_AtomicWriter):
+    """逐项写入JSON数组，key 不为空时写为 {key: [...]}"""
+
+    def __init__(self, filepath, key=None, compress=False):
+        super().__init__(filepath, compress)
+        self.key = key
+        self._file.write(f"{{{json.dumps(key, ensure_ascii=False)}: [" if key else "[")
+
+    def write(self, item):
+        self._file.write(",\n" if self.count else "\n")
+        self._file.write(json.dumps(item, ensure_ascii=False))
+        self.count += 1
+
+    def _finish(self):
+        self._file.write("\n]}" if self.key else "\n]")
+
+
+class _EncodedArrayWriter:
+    """
+    收集全部数组项，关闭时按存储格式一次编码写入
+
+    用于 msgpack 等需要预先知道数组长度、无法逐项写入的格式，接口与 JSONArrayWriter 相同
+    """
+
+    def __init__(self, storage, filename, key=None):
+        self.storage = storage
+        self.filename = filename
+        self.filepath = storage.data_path(filename)
+        self.key = key
+        self.items = []
+        self.count = 0
+        self.changed = None
+
+    def write(self, item):
+        self.items.append(item)
+        self.count += 1
+
+    def close(self):
+        if self.items is None:
+            return
+        data = {self.key: self.items} if self.key else self.items
+        self.items = None
+        self.filepath, self.changed = self.storage.save(data, self.filename)
+
+    def abort(self):
+        self.items = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+def array_writer(storage, filename, key=None):
+    """
+    按存储格式逐项写入JSON数组
+
+    json/pretty 逐项写为JSON文本，gzip 逐项压缩写入 *.json.gz；
+    msgpack 需要预先知道数组长度，在内存中收集后关闭时一次编码
+
+    Args:
+        storage: storage.Storage
+        filename: 文件名（如 all_homework.json），后缀按格式替换
+        key: 不为空时写为 {key: [...]}
+    """
+    if storage.format in ("json", "pretty"):
+        return JSONArrayWriter(storage.data_path(filename), key)
+    if storage.format == "gzip":
+        return JSONArrayWriter(storage.data_path(filename), key, compress=True)
+    return _EncodedArrayWriter(storage, filename, key)
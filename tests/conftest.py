@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# 测试直接导入仓库根目录下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 日志写入临时目录，不在仓库中生成 logs/
+os.environ.setdefault("ZXIN_LOG_DIR", tempfile.mkdtemp(prefix="zxin-test-logs-"))
@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+from benchmarks.mock_server import MockZXinServer
+from benchmarks.payloads import generate_course_data, generate_homework_list, split_size
+from token_cache import TokenCache
+from zxin_client import ZXinClient
+
+COURSES = "/stu/course/getJoinedCourse2"
+NOW = datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc)
+
+
+def test_generated_payload_is_deterministic():
+    data = generate_course_data(courses=3, homework_per_course=4, seed=7, now=NOW)
+    assert data == generate_course_data(courses=3, homework_per_course=4, seed=7, now=NOW)
+    assert data != generate_course_data(courses=3, homework_per_course=4, seed=8, now=NOW)
+    assert [len(course["homework"]) for course in data["data"]] == [4, 4, 4]
+    ids = [hw["id"] for course in data["data"] for hw in course["homework"]]
+    assert ids == list(range(1, 13))
+    assert len(generate_homework_list(data)["data"]) == 12
+
+
+@pytest.mark.parametrize("total, expected", [(1, (1, 1)), (50, (1, 50)), (51, (2, 50)), (1000, (20, 50))])
+def test_split_size(total, expected):
+    assert split_size(total) == expected
+
+
+@pytest.fixture
+def server():
+    course_data = generate_course_data(courses=2, homework_per_course=15, now=NOW)
+    with MockZXinServer(course_data=course_data) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server, tmp_path):
+    client = ZXinClient(
+        "bench",
+        "bench",
+        str(tmp_path / "output"),
+        token_cache=TokenCache(str(tmp_path / "token_cache.json")),
+    )
+    client.BASE_URL = server.url
+    yield client
+    client.transport.close()
+
+
+def test_client_against_mock_server(server, client):
+    data = client.api_request(COURSES)
+    assert [course["course"]["name"] for course in data["data"]] == ["课程1", "课程2"]
+    assert server.stats == {"/auth/login 200": 1, "/stu/course/getJoinedCourse2 200": 1}
+
+
+def test_mock_server_conditional_requests(client):
+    first = client.fetch_if_changed(COURSES)
+    assert first.data and not first.not_modified
+    second = client.fetch_if_changed(COURSES, first.fingerprint)
+    assert second.not_modified and second.data is None
+
+
+def test_mock_server_pagination(server, client):
+    items = list(client.iter_pages("/stu/homework/getHomeworkList", page_size=7))
+    assert len(items) == 30
+    endtimes = [item["endtime"] for item in items]
+    assert endtimes == sorted(endtimes, reverse=True)
+    assert server.stats["/stu/homework/getHomeworkList 200"] == 5
+
+
+def test_mock_server_revoked_token_triggers_relogin(server, client):
+    client.api_request("/stu/homework/getHomeworkList")
+    server.revoke_tokens()
+    assert client.api_request("/stu/homework/getHomeworkList")["code"] == 2000
+    assert server.stats["/auth/login 200"] == 2
+    assert server.stats["/stu/homework/getHomeworkList 401"] == 1
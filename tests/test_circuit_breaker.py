@@ -0,0 +1,124 @@
+from unittest import mock
+
+import pytest
+import requests
+
+import transport
+from transport import CircuitBreaker, CircuitOpenError, Transport
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(transport.time, "monotonic", clock)
+    return clock
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == 30
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    _open(breaker)
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    _open(breaker)
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_release_frees_probe_slot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    _open(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def _half_open_transport(clock):
+    client = Transport(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=30))
+    _open(client.breaker)
+    clock.now += 30
+    return client
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.exceptions.TooManyRedirects("redirects"),
+        requests.exceptions.ChunkedEncodingError("chunked"),
+        requests.exceptions.InvalidURL("url"),
+        requests.exceptions.ConnectionError("refused"),
+    ],
+)
+def test_probe_request_error_counts_as_failure(clock, error):
+    client = _half_open_transport(clock)
+    with mock.patch.object(client.session, "request", side_effect=error):
+        with pytest.raises(type(error)):
+            client.get("http://upstream.invalid/auth/user")
+    assert client.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        client.get("http://upstream.invalid/auth/user")
+
+
+def test_interrupted_probe_releases_slot(clock):
+    client = _half_open_transport(clock)
+    with mock.patch.object(client.session, "request", side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            client.get("http://upstream.invalid/auth/user")
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.allow()
+
+
+def test_successful_probe_closes(clock):
+    client = _half_open_transport(clock)
+    response = mock.Mock(status_code=200, headers={})
+    with mock.patch.object(client.session, "request", return_value=response):
+        assert client.get("http://upstream.invalid/auth/user") is response
+    assert client.breaker.state == CircuitBreaker.CLOSED
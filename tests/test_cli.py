@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cli
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("ZXIN_SCORE_ARCHIVE", "ZXIN_USERNAME", "ZXIN_METRICS_FILE"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_parsing_does_not_import_heavy_modules():
+    code = (
+        "import sys, cli\n"
+        "cli.build_parser().parse_args(['scan', '--days', '3'])\n"
+        "print([name for name in ('requests', 'colorlog', 'dotenv', 'zxin_client') if name in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_export_formats_are_validated(capsys):
+    args = cli.build_parser().parse_args(["export", "-f", "csv, markdown"])
+    assert args.format == ["csv", "markdown"]
+    assert cli.build_parser().parse_args(["export"]).format == cli.DEFAULT_EXPORT_FORMATS.split(",")
+
+    with pytest.raises(SystemExit) as excinfo:
+        cli.build_parser().parse_args(["export", "-f", "csv,xml"])
+    assert excinfo.value.code == 2
+    assert "不支持的导出格式: xml" in capsys.readouterr().err
+
+
+def test_history_of_empty_archive(tmp_path, capsys):
+    assert cli.main(["-o", str(tmp_path), "history"]) == 0
+    assert json.loads(capsys.readouterr().out)["entries"] == 0
+
+
+def test_expected_errors_are_reported_without_traceback(tmp_path, capsys):
+    assert cli.main(["-o", str(tmp_path), "history", "--since", "yesterday"]) == 1
+    err = capsys.readouterr().err
+    assert err.startswith("zxin history: 错误: ")
+    assert "Traceback" not in err
@@ -0,0 +1,73 @@
+import pytest
+
+from deadline_index import DeadlineIndex, ReminderTier, default_tiers, parse_tiers
+
+HOUR = 3600
+DAY = 86400
+NOW = 1_700_000_000
+
+
+def test_parse_tiers_sorted_and_deduplicated():
+    tiers = parse_tiers("2h, 1d,5d,24h,30m")
+    assert [tier.seconds for tier in tiers] == [5 * DAY, DAY, 2 * HOUR, 30 * 60]
+    assert tiers[0].label == "5天"
+    assert tiers[0].kind == f"tier:{5 * DAY}"
+    assert tiers[1].label == "1天"
+
+
+@pytest.mark.parametrize("spec", ["5x", "d", "1.5h", "-1d"])
+def test_parse_tiers_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_tiers(spec)
+
+
+def test_default_tiers_drop_tiers_beyond_threshold():
+    assert [tier.seconds for tier in default_tiers(5)] == [5 * DAY, DAY, 2 * HOUR]
+    assert [tier.seconds for tier in default_tiers(1)] == [DAY, 2 * HOUR]
+
+
+def test_due_within_and_next_due():
+    index = DeadlineIndex([(NOW + DAY, "b"), (NOW - HOUR, "past"), (NOW + HOUR, "a")])
+    assert index.due_within(NOW, 2 * HOUR) == [(NOW + HOUR, "a")]
+    assert index.due_within(NOW, DAY) == [(NOW + HOUR, "a"), (NOW + DAY, "b")]
+    assert index.next_due(NOW) == (NOW + HOUR, "a")
+    assert index.next_due(NOW + 2 * DAY) is None
+
+
+def test_assign_tiers_uses_smallest_tier():
+    tiers = parse_tiers("5d,1d,2h")
+    index = DeadlineIndex([(NOW + HOUR, "a"), (NOW + 12 * HOUR, "b"), (NOW + 3 * DAY, "c")])
+    assigned = index.assign_tiers(NOW, tiers)
+    assert {homework_id: tier.seconds for homework_id, tier in assigned.items()} == {
+        "a": 2 * HOUR,
+        "b": DAY,
+        "c": 5 * DAY,
+    }
+
+
+def test_next_crossing_is_earliest_tier_entry():
+    tiers = parse_tiers("1d,2h")
+    # a 在 NOW+10h 进入 1d 档，在 NOW+32h 进入 2h 档
+    index = DeadlineIndex([(NOW + 34 * HOUR, "a")])
+    assert index.next_crossing(NOW, tiers) == NOW + 10 * HOUR
+
+    crossing = index.next_crossing(NOW + 10 * HOUR, tiers)
+    assert crossing == NOW + 32 * HOUR
+    assert index.assign_tiers(crossing, tiers)["a"] == ReminderTier(2 * HOUR, "2小时")
+    assert index.next_crossing(crossing, tiers) is None
+
+
+def test_crossing_wakes_at_tier_boundary():
+    tiers = parse_tiers("1d")
+    index = DeadlineIndex([(NOW + DAY + 60, "a")])
+    crossing = index.next_crossing(NOW, tiers)
+
+    assert "a" not in index.assign_tiers(crossing - 1, tiers)
+    assert index.assign_tiers(crossing, tiers)["a"].seconds == DAY
+
+
+def test_empty_index():
+    index = DeadlineIndex()
+    assert len(index) == 0
+    assert index.next_due(NOW) is None
+    assert index.next_crossing(NOW, parse_tiers("1d")) is None
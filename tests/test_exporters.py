@@ -0,0 +1,79 @@
+import pytest
+
+import exporters
+from exporters import export_files
+
+COURSE_DATA = {
+    "code": 2000,
+    "data": [
+        {
+            "course": {"id": 1, "name": "高等数学"},
+            "teacher": {"user": {"nickname": "张老师"}},
+            "homework": [
+                {
+                    "id": 10,
+                    "title": "第一次作业",
+                    "category": "作业",
+                    "starttime": "2024-03-01T00:00:00Z",
+                    "endtime": "2024-03-08T15:59:59Z",
+                    "studenthomework": [{"answerProgress": 1, "finalScore": 95}],
+                },
+                {"id": 11, "title": "第二次作业", "endtime": "2024-03-15T15:59:59Z"},
+            ],
+        }
+    ],
+}
+
+TARGETS = {"text": None, "csv": None, "ndjson": None, "markdown": None}
+
+
+def test_export_files_writes_every_format_once(tmp_path):
+    result = export_files(COURSE_DATA, str(tmp_path), TARGETS)
+    assert {name: changed for name, (_, changed) in result.items()} == dict.fromkeys(TARGETS, True)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "course_data.csv",
+        "course_data.md",
+        "course_data.ndjson",
+        "course_data.txt",
+    ]
+    assert (tmp_path / "course_data.ndjson").read_text(encoding="utf-8").count("\n") == 2
+
+    result = export_files(COURSE_DATA, str(tmp_path), TARGETS)
+    assert not any(changed for _, changed in result.values())
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_failed_replace_removes_remaining_temp_files(tmp_path, monkeypatch):
+    replace = exporters.replace_if_changed
+    calls = []
+
+    def flaky_replace(tmp_path, path):
+        calls.append(path)
+        if len(calls) == 2:
+            raise OSError("磁盘已满")
+        return replace(tmp_path, path)
+
+    monkeypatch.setattr(exporters, "replace_if_changed", flaky_replace)
+    with pytest.raises(OSError):
+        export_files(COURSE_DATA, str(tmp_path), TARGETS)
+    # 第一个文件已替换，其余临时文件全部删除
+    assert [path.name for path in tmp_path.iterdir()] == ["course_data.txt"]
+
+
+def test_failed_export_leaves_no_files(tmp_path, monkeypatch):
+    iter_rows = exporters.iter_rows
+
+    def broken_rows(course_data):
+        yield from iter_rows(course_data)
+        raise KeyError("data")
+
+    monkeypatch.setattr(exporters, "iter_rows", broken_rows)
+    with pytest.raises(KeyError):
+        export_files(COURSE_DATA, str(tmp_path), TARGETS)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_files(COURSE_DATA, str(tmp_path), {"csv": None, "xml": None})
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+import gateway
+from gateway import AccountSession, Gateway, SingleFlight, UpstreamError
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(gateway.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    """替换回源请求，记录每个接口的请求次数"""
+    monkeypatch.setenv("ZXIN_TOKEN_CACHE", str(tmp_path / "token_cache.json"))
+    calls = []
+    state = {"fail": False, "version": 0}
+
+    def request(session, endpoint):
+        calls.append(endpoint)
+        if state["fail"]:
+            raise UpstreamError(f"{endpoint}: 请求失败")
+        return {"code": 2000, "data": {"version": state["version"]}}
+
+    monkeypatch.setattr(AccountSession, "request", request)
+    return calls, state
+
+
+def make_gateway(tmp_path, **kwargs):
+    accounts = [{"username": "alice", "password": "secret"}]
+    return Gateway(accounts, output_root=str(tmp_path / "output"), **kwargs)
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    flight = SingleFlight()
+    arrived = threading.Barrier(8)
+    calls = []
+    results = []
+
+    def fn():
+        calls.append(1)
+        # 等其他线程进入 do 后再返回
+        time.sleep(0.1)
+        return "value"
+
+    def worker():
+        arrived.wait()
+        results.append(flight.do("key", fn))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("value", False)] * 7 + [("value", True)]
+    assert not flight.in_flight("key")
+
+
+def test_single_flight_shares_error_and_clears_key():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert not flight.in_flight("key")
+    assert flight.do("key", lambda: 1) == (1, True)
+
+
+def test_fresh_entry_is_served_from_cache(tmp_path, clock, upstream):
+    calls, _ = upstream
+    gw = make_gateway(tmp_path, ttl=60, stale_ttl=600)
+    try:
+        entry, cache = gw.get("alice", "user")
+        assert cache == "MISS"
+        clock.now += 59
+        assert gw.get("alice", "user") == (entry, "HIT")
+        assert calls == ["/auth/user"]
+    finally:
+        gw.close()
+
+
+def test_stale_entry_is_returned_and_refreshed_in_background(tmp_path, clock, upstream):
+    calls, state = upstream
+    gw = make_gateway(tmp_path, ttl=60, stale_ttl=600)
+    try:
+        old, _ = gw.get("alice", "user")
+        state["version"] = 1
+        clock.now += 61
+        entry, cache = gw.get("alice", "user")
+        assert (entry, cache) == (old, "STALE")
+        gw._refresher.shutdown(wait=True)
+        assert calls == ["/auth/user", "/auth/user"]
+        entry, cache = gw.get("alice", "user")
+        assert cache == "HIT"
+        assert entry.body != old.body
+    finally:
+        gw.close()
+
+
+def test_expired_entry_is_fetched_synchronously(tmp_path, clock, upstream):
+    calls, _ = upstream
+    gw = make_gateway(tmp_path, ttl=60, stale_ttl=600)
+    try:
+        gw.get("alice", "user")
+        clock.now += 601
+        assert gw.get("alice", "user")[1] == "MISS"
+        assert len(calls) == 2
+    finally:
+        gw.close()
+
+
+def test_upstream_failure_falls_back_to_expired_entry(tmp_path, clock, upstream):
+    _, state = upstream
+    gw = make_gateway(tmp_path, ttl=60, stale_ttl=600)
+    try:
+        state["fail"] = True
+        with pytest.raises(UpstreamError):
+            gw.get("alice", "user")
+        state["fail"] = False
+        old, _ = gw.get("alice", "user")
+        state["fail"] = True
+        clock.now += 601
+        assert gw.get("alice", "user") == (old, "STALE")
+    finally:
+        gw.close()
+
+
+def test_account_output_dir_uses_safe_name(tmp_path, upstream):
+    accounts = [{"username": "../evil/name", "password": "secret"}]
+    gw = Gateway(accounts, output_root=str(tmp_path / "output"))
+    try:
+        output_dir = gw.sessions["../evil/name"].client.output_dir
+        assert output_dir == str(tmp_path / "output" / ".._evil_name")
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["output"]
+    finally:
+        gw.close()
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from HomeworkReminder import HomeworkReminder
+from notifier import NotificationDispatcher
+from outbox import Outbox
+from token_cache import TokenCache
+
+
+def iso(delta):
+    moment = datetime.datetime.now(datetime.timezone.utc) + delta
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def course_data(*homework):
+    return {
+        "code": 2000,
+        "msg": "成功",
+        "data": [
+            {
+                "course": {"id": 1, "name": "高等数学"},
+                "teacher": {"user": {"nickname": "张老师"}},
+                "homework": list(homework),
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def reminder(tmp_path, monkeypatch):
+    for name in ("ZXIN_STATE_DB", "ZXIN_SCORE_ARCHIVE", "ZXIN_STORAGE_FORMAT", "ZXIN_REMINDER_TIERS"):
+        monkeypatch.delenv(name, raising=False)
+    output_dir = str(tmp_path / "output")
+    reminder = HomeworkReminder(
+        "alice",
+        "secret",
+        output_dir,
+        notifier=NotificationDispatcher(outbox=Outbox(str(tmp_path / "outbox.db")), channels=[]),
+        token_cache=TokenCache(str(tmp_path / "token_cache.json")),
+    )
+    yield reminder
+    reminder.state.close()
+
+
+def test_unparseable_deadline_is_kept_but_not_reminded(reminder):
+    data = course_data(
+        {"id": 1, "title": "时间无效", "endtime": "garbage"},
+        {"id": 2, "title": "明天截止", "endtime": iso(datetime.timedelta(days=1))},
+        {"id": 3, "title": "已过期", "endtime": iso(-datetime.timedelta(days=1))},
+    )
+    upcoming = reminder.scan_homework(days_threshold=5, course_data=data)
+
+    assert [item["title"] for item in upcoming] == ["明天截止"]
+    assert reminder.known_homework_ids == {"1", "2", "3"}
+    assert [homework_id for _, homework_id in reminder.pending_deadlines] == ["2"]
+
+    _, exported = reminder.storage.load("all_homework.json")
+    invalid = exported["all_homework"][0]
+    assert invalid["title"] == "时间无效"
+    assert invalid["end_time_utc"] == "garbage"
+    assert invalid["end_time_beijing"] is None
+    assert invalid["seconds_remaining"] is None
+
+    # 作业仍记录在状态中，下次扫描不会被当作已删除或新作业
+    assert reminder.state.known_homework_ids("alice") == {"1", "2", "3"}
+    reminder.scan_homework(days_threshold=5, course_data=data)
+    assert reminder.last_changes == []
@@ -0,0 +1,44 @@
+import json
+import logging
+import sys
+
+import log_config
+
+
+def make_record(exc_info=None):
+    return logging.LogRecord(
+        "test", logging.ERROR, __file__, 1, "请求 %s 失败", ("/auth/user",), exc_info
+    )
+
+
+def failed_record():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        return make_record(sys.exc_info())
+
+
+def test_prepare_keeps_exception_separate_from_message():
+    record = log_config._queue_handler.prepare(failed_record())
+    assert record.getMessage() == "请求 /auth/user 失败"
+    assert record.exc_info is None
+    assert "ValueError: boom" in record.exc_text
+
+
+def test_json_formatter_emits_exc_info_field_for_queued_records():
+    record = log_config._queue_handler.prepare(failed_record())
+    entry = json.loads(log_config.JSONFormatter().format(record))
+    assert entry["message"] == "请求 /auth/user 失败"
+    assert entry["exc_info"].startswith("Traceback")
+    assert "ValueError: boom" in entry["exc_info"]
+
+
+def test_text_formatter_still_appends_traceback():
+    record = log_config._queue_handler.prepare(failed_record())
+    text = logging.Formatter("%(levelname)s - %(message)s").format(record)
+    assert text.startswith("ERROR - 请求 /auth/user 失败\nTraceback")
+
+
+def test_record_without_exception_has_no_exc_info_field():
+    record = log_config._queue_handler.prepare(make_record())
+    assert "exc_info" not in json.loads(log_config.JSONFormatter().format(record))
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from response_cache import ResponseCache
+from zxin_client import Snapshot, SnapshotPart, ZXinClient
+
+COURSES = {"code": 2000, "data": []}
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(main.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def client():
+    return SimpleNamespace(cache=ResponseCache(ttls=ZXinClient.CACHE_TTLS))
+
+
+def make_snapshot(started_at, error=""):
+    endpoint = ZXinClient.SNAPSHOT_ENDPOINTS["courses"]
+    part = SnapshotPart(endpoint, data=None if error else COURSES, error=error)
+    return Snapshot(parts={"courses": part}, started_at=started_at)
+
+
+def test_prefetched_courses_are_used_within_cache_ttl(clock, client):
+    snapshot = make_snapshot(clock.now)
+    clock.now += 59
+    assert main.fresh_courses(client, snapshot) == COURSES
+
+
+def test_prefetched_courses_expire_with_cache_ttl(clock, client):
+    snapshot = make_snapshot(clock.now)
+    clock.now += 60
+    assert main.fresh_courses(client, snapshot) is None
+
+
+def test_missing_or_failed_prefetch_is_refetched(clock, client):
+    assert main.fresh_courses(client, None) is None
+    assert main.fresh_courses(client, make_snapshot(clock.now, error="请求失败")) is None
@@ -0,0 +1,33 @@
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+import metrics
+
+
+def test_concurrent_export_run_writes_valid_files(tmp_path, monkeypatch):
+    textfile = tmp_path / "zxin.prom"
+    monkeypatch.setenv("ZXIN_METRICS_FILE", str(textfile))
+    metrics.REQUESTS.inc(endpoint="/auth/user", method="GET", status=200)
+
+    threads = [
+        threading.Thread(target=metrics.export_run, args=(str(tmp_path),)) for _ in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["metrics_summary.json", "zxin.prom"]
+    with open(tmp_path / "metrics_summary.json", encoding="utf-8") as file:
+        assert isinstance(json.load(file), dict)
+    assert "zxin_requests_total" in textfile.read_text(encoding="utf-8")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查文件权限")
+def test_textfile_is_world_readable(tmp_path):
+    path = metrics.write_textfile(str(tmp_path / "zxin.prom"))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
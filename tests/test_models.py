@@ -0,0 +1,62 @@
+import datetime
+
+from models import BEIJING_TZ, parse_courses, parse_time
+
+
+def test_parse_time_handles_utc_suffix_and_offsets():
+    assert parse_time("2024-03-08T15:59:59Z") == datetime.datetime(
+        2024, 3, 8, 15, 59, 59, tzinfo=datetime.timezone.utc
+    )
+    parsed = parse_time("2024-03-08T23:59:59+08:00")
+    assert parsed.astimezone(datetime.timezone.utc).hour == 15
+
+
+def test_parse_time_treats_naive_values_as_utc():
+    assert parse_time("2024-03-08T15:59:59").tzinfo == datetime.timezone.utc
+
+
+def test_parse_time_returns_none_for_missing_or_invalid_values():
+    assert parse_time(None) is None
+    assert parse_time("") is None
+    assert parse_time("garbage") is None
+    assert parse_time(12345) is None
+
+
+def test_parse_courses_builds_models():
+    course_data = {
+        "code": 2000,
+        "data": [
+            {
+                "course": {"id": 1, "name": "高等数学"},
+                "teacher": {"user": {"nickname": "张老师"}},
+                "homework": [
+                    {
+                        "id": 10,
+                        "title": "第一次作业",
+                        "endtime": "2024-03-08T15:59:59Z",
+                        "studenthomework": [{"answerProgress": 1, "finalScore": 95}],
+                    },
+                    {"title": "第二次作业", "endtime": "garbage"},
+                ],
+            }
+        ],
+    }
+    [course] = parse_courses(course_data)
+    assert (course.id, course.name, course.teacher.nickname) == ("1", "高等数学", "张老师")
+
+    first, second = course.homework
+    assert first.key == "10"
+    assert first.submitted and first.student.final_score == 95
+    assert first.end_time_beijing == datetime.datetime(2024, 3, 8, 23, 59, 59, tzinfo=BEIJING_TZ)
+    assert first.end_ts == int(first.end_time.timestamp())
+
+    # 没有 id 时使用合成ID，无法解析的截止时间保留原文
+    assert second.key == "高等数学_第二次作业_garbage"
+    assert not second.submitted
+    assert (second.endtime, second.end_time, second.end_ts) == ("garbage", None, None)
+
+
+def test_parse_courses_accepts_missing_fields_and_iterables():
+    assert list(parse_courses({"code": 2000, "data": None})) == []
+    [course] = parse_courses(iter([{}]))
+    assert (course.id, course.name, course.teacher.nickname, course.homework) == (None, "", "", [])
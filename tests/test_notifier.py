@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from channels import Channel
+from notifier import NotificationDispatcher
+from outbox import Outbox
+
+
+class FakeChannel(Channel):
+    name = "fake"
+
+    def __init__(self):
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, message, key):
+        with self._lock:
+            self.sent.append(message)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    yield outbox
+    outbox.close()
+
+
+def make_dispatcher(outbox, channel, **kwargs):
+    return NotificationDispatcher(outbox=outbox, channels=[channel], min_interval=0, **kwargs)
+
+
+def test_digest_coalesces_events_into_one_message(outbox):
+    channel = FakeChannel()
+    dispatcher = make_dispatcher(outbox, channel)
+    digest = dispatcher.digest("作业提醒")
+    for i in range(40):
+        digest.add("发现新作业", f"作业：《第{i}次作业》", f"alice:{i}:new")
+    digest.add("即将截止", "作业：《第0次作业》", "alice:0:1d")
+    assert len(digest) == 41
+
+    assert digest.flush() == 1
+    dispatcher.close()
+    [message] = channel.sent
+    assert message["title"] == "作业提醒"
+    headers = [paragraph[0]["text"] for paragraph in message["content"] if "共" in paragraph[0]["text"]]
+    assert headers == ["【发现新作业】共 40 项", "【即将截止】共 1 项"]
+
+
+def test_large_digest_is_split_within_size_limit(outbox):
+    channel = FakeChannel()
+    dispatcher = make_dispatcher(outbox, channel, max_bytes=500)
+    digest = dispatcher.digest("作业提醒")
+    for i in range(20):
+        digest.add("发现新作业", f"作业：《第{i}次作业》", f"alice:{i}:new")
+
+    total = digest.flush()
+    dispatcher.close()
+    assert total > 1
+    assert sorted(message["title"] for message in channel.sent) == sorted(
+        f"作业提醒 ({i}/{total})" for i in range(1, total + 1)
+    )
+    texts = [paragraph[0]["text"] for message in channel.sent for paragraph in message["content"]]
+    assert sum(text.startswith("作业：") for text in texts) == 20
+
+
+def test_same_events_are_sent_only_once(outbox):
+    channel = FakeChannel()
+    dispatcher = make_dispatcher(outbox, channel)
+    for _ in range(2):
+        digest = dispatcher.digest()
+        digest.add("发现新作业", "作业：《第1次作业》", "alice:1:new")
+        digest.flush()
+    dispatcher.close()
+    assert len(channel.sent) == 1
+
+
+def test_empty_digest_sends_nothing(outbox):
+    channel = FakeChannel()
+    dispatcher = make_dispatcher(outbox, channel)
+    assert dispatcher.digest().flush() == 0
+    dispatcher.close()
+    assert channel.sent == []
@@ -0,0 +1,148 @@
+import pytest
+
+from channels import Channel, DeliveryError
+from outbox import FAILED, PENDING, SENT, ChannelWorker, Outbox
+
+
+def _message(title="作业提醒"):
+    return {"title": title, "content": [[{"tag": "text", "text": title}]]}
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    yield outbox
+    outbox.close()
+
+
+class FakeChannel(Channel):
+    name = "fake"
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send(self, message, key):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(key)
+
+
+def test_enqueue_ignores_duplicate_keys(outbox):
+    assert outbox.enqueue([("k1", _message()), ("k2", _message())], ["feishu", "webhook"]) == 2
+    assert outbox.enqueue([("k1", _message()), ("k3", _message())], ["feishu", "webhook"]) == 1
+    assert outbox.stats() == {"feishu": {PENDING: 3}, "webhook": {PENDING: 3}}
+
+
+def test_claim_holds_lease(outbox):
+    outbox.enqueue([("k1", _message("a"))], ["feishu"])
+
+    message_id, key, message, attempts = outbox.claim("feishu", lease=60)
+    assert (key, message["title"], attempts) == ("k1", "a", 1)
+    # 租约期内不会被再次认领，其他渠道互不影响
+    assert outbox.claim("feishu", lease=60) is None
+    assert outbox.claim("webhook", lease=60) is None
+    assert outbox.pending_count(["feishu"]) == 1
+    assert outbox.pending_count(["feishu"], due_only=True) == 0
+
+
+def test_expired_lease_is_claimed_again(outbox):
+    outbox.enqueue([("k1", _message())], ["feishu"])
+    outbox.claim("feishu", lease=0)
+    job = outbox.claim("feishu", lease=60)
+    assert job is not None and job[3] == 2
+
+
+def test_retry_and_sent(outbox):
+    outbox.enqueue([("k1", _message())], ["feishu"])
+    message_id = outbox.claim("feishu", lease=60)[0]
+
+    outbox.mark_retry(message_id, "feishu", 0, "HTTP 503")
+    assert outbox.deliveries(PENDING)[0]["last_error"] == "HTTP 503"
+    message_id = outbox.claim("feishu", lease=60)[0]
+    outbox.mark_sent(message_id, "feishu")
+
+    assert outbox.stats() == {"feishu": {SENT: 1}}
+    assert outbox.next_due("feishu") is None
+
+
+def test_failed_messages_can_be_requeued(outbox):
+    outbox.enqueue([("k1", _message())], ["feishu", "webhook"])
+    for channel in ("feishu", "webhook"):
+        message_id = outbox.claim(channel, lease=60)[0]
+        outbox.mark_failed(message_id, channel, "签名错误")
+
+    assert outbox.requeue("feishu") == 1
+    assert outbox.stats() == {"feishu": {PENDING: 1}, "webhook": {FAILED: 1}}
+    assert outbox.claim("feishu", lease=60)[3] == 1
+
+
+def test_orphans_are_adopted_by_configured_channels(outbox):
+    outbox.enqueue([("k1", _message())], [])
+    assert outbox.orphan_count() == 1
+    # 没有送达记录的消息不会被清理
+    outbox.prune(float("inf"))
+    assert outbox.orphan_count() == 1
+
+    assert outbox.adopt_orphans(["webhook"]) == 1
+    assert outbox.orphan_count() == 0
+    assert outbox.claim("webhook", lease=60)[1] == "k1"
+
+
+def test_prune_keeps_dedupe_until_all_channels_sent(outbox):
+    outbox.enqueue([("k1", _message())], ["feishu", "webhook"])
+    message_id = outbox.claim("feishu", lease=60)[0]
+    outbox.mark_sent(message_id, "feishu")
+
+    outbox.prune(float("inf"))
+    assert outbox.stats()["webhook"] == {PENDING: 1}
+
+    outbox.mark_sent(outbox.claim("webhook", lease=60)[0], "webhook")
+    outbox.prune(float("inf"))
+    assert outbox.stats() == {}
+    assert outbox.enqueue([("k1", _message())], ["feishu"]) == 1
+
+
+def test_worker_retries_then_marks_sent(outbox):
+    channel = FakeChannel([DeliveryError("HTTP 429", retry_after=0)])
+    worker = ChannelWorker(outbox, channel)
+    outbox.enqueue([("k1", _message())], [channel.name])
+
+    assert worker._deliver(*outbox.claim(channel.name, worker.lease)) is False
+    assert outbox.deliveries(PENDING)[0]["last_error"] == "HTTP 429"
+    assert worker._deliver(*outbox.claim(channel.name, worker.lease)) is True
+    assert channel.sent == ["k1"]
+    assert outbox.stats() == {channel.name: {SENT: 1}}
+
+
+def test_worker_marks_non_retryable_error_failed(outbox):
+    channel = FakeChannel([DeliveryError("签名错误", retryable=False)])
+    worker = ChannelWorker(outbox, channel)
+    outbox.enqueue([("k1", _message())], [channel.name])
+
+    worker._deliver(*outbox.claim(channel.name, worker.lease))
+    assert outbox.stats() == {channel.name: {FAILED: 1}}
+    assert worker.failed == 1
+
+
+def test_worker_gives_up_after_max_retries(outbox):
+    channel = FakeChannel([DeliveryError("HTTP 503", retry_after=0)] * 3)
+    worker = ChannelWorker(outbox, channel, max_retries=2)
+    outbox.enqueue([("k1", _message())], [channel.name])
+
+    for _ in range(3):
+        worker._deliver(*outbox.claim(channel.name, worker.lease))
+    assert outbox.stats() == {channel.name: {FAILED: 1}}
+    assert channel.sent == []
+
+
+def test_worker_thread_delivers_pending_messages(outbox):
+    channel = FakeChannel()
+    worker = ChannelWorker(outbox, channel, poll_interval=0.05)
+    outbox.enqueue([("k1", _message()), ("k2", _message())], [channel.name])
+
+    worker.start()
+    with worker.progress:
+        worker.progress.wait_for(lambda: worker.sent == 2, timeout=5)
+    worker.stop()
+    assert sorted(channel.sent) == ["k1", "k2"]
@@ -0,0 +1,33 @@
+import json
+import os
+import stat
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from reminder_daemon import ReminderDaemon
+
+
+def make_daemon(tmp_path):
+    return ReminderDaemon(reminder=SimpleNamespace(output_dir=str(tmp_path)))
+
+
+def test_concurrent_status_writes_leave_valid_file(tmp_path):
+    daemons = [make_daemon(tmp_path) for _ in range(8)]
+    threads = [threading.Thread(target=daemon._write_status) for daemon in daemons for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["reminder_status.json"]
+    with open(tmp_path / "reminder_status.json", encoding="utf-8") as file:
+        assert json.load(file)["state"] == "starting"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查文件权限")
+def test_status_file_is_world_readable(tmp_path):
+    make_daemon(tmp_path)._write_status()
+    mode = stat.S_IMODE(os.stat(tmp_path / "reminder_status.json").st_mode)
+    assert mode == 0o644
@@ -0,0 +1,133 @@
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+import response_cache
+import storage
+from response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def test_hit_until_ttl_expires(clock):
+    cache = ResponseCache(ttls={"/auth/user": 300})
+    key = cache.make_key("/auth/user")
+    cache.set(key, "/auth/user", {"code": 2000})
+
+    clock.now += 299
+    assert cache.get(key, "/auth/user") == {"code": 2000}
+    clock.now += 2
+    assert cache.get(key, "/auth/user") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_endpoint_without_ttl_is_not_cached(clock):
+    cache = ResponseCache(ttls={"/auth/user": 300})
+    key = cache.make_key("/stu/homework/getHomeworkList")
+    cache.set(key, "/stu/homework/getHomeworkList", {"data": []})
+    assert cache.get(key, "/stu/homework/getHomeworkList") is None
+
+
+def test_key_depends_on_scope_method_and_body():
+    keys = {
+        ResponseCache.make_key("/auth/user"),
+        ResponseCache.make_key("/auth/user", scope="alice"),
+        ResponseCache.make_key("/auth/user", method="POST"),
+        ResponseCache.make_key("/auth/user", data={"page": 1}),
+    }
+    assert len(keys) == 4
+    assert ResponseCache.make_key("/x", data={"a": 1, "b": 2}) == ResponseCache.make_key(
+        "/x", data={"b": 2, "a": 1}
+    )
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = ResponseCache(default_ttl=60, max_entries=2)
+    cache.set("a", "/a", 1)
+    cache.set("b", "/b", 2)
+    assert cache.get("a", "/a") == 1
+    cache.set("c", "/c", 3)
+
+    assert cache.get("b", "/b") is None
+    assert cache.get("a", "/a") == 1
+    assert cache.get("c", "/c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_layer_survives_new_instance(clock, tmp_path):
+    ResponseCache(default_ttl=60, disk_dir=str(tmp_path)).set("k", "/a", {"v": 1})
+
+    cache = ResponseCache(default_ttl=60, disk_dir=str(tmp_path))
+    assert cache.get("k", "/a") == {"v": 1}
+    assert cache.stats()["disk_hits"] == 1
+
+    clock.now += 61
+    assert ResponseCache(default_ttl=60, disk_dir=str(tmp_path)).get("k", "/a") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_invalidate_single_endpoint(clock, tmp_path):
+    cache = ResponseCache(default_ttl=60, disk_dir=str(tmp_path))
+    cache.set("a", "/a", 1)
+    cache.set("b", "/b", 2)
+
+    cache.invalidate("/a")
+    assert cache.get("a", "/a") is None
+    assert cache.get("b", "/b") == 2
+
+    cache.invalidate()
+    assert cache.get("b", "/b") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查文件权限")
+def test_disk_entries_are_owner_only(clock, tmp_path):
+    cache = ResponseCache(default_ttl=60, disk_dir=str(tmp_path))
+    cache.set("k", "/auth/user", {"nickname": "张三"})
+    (path,) = tmp_path.iterdir()
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_failed_disk_write_leaves_no_temp_file(clock, tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage.os, "replace", fail)
+    cache = ResponseCache(default_ttl=60, disk_dir=str(tmp_path))
+    cache.set("k", "/a", {"v": 1})
+    assert list(tmp_path.iterdir()) == []
+    assert cache.get("k", "/a") == {"v": 1}
+
+
+def test_concurrent_disk_writes_stay_valid(clock, tmp_path):
+    cache = ResponseCache(default_ttl=60, disk_dir=str(tmp_path))
+    payloads = [{"v": i, "pad": "x" * 10000 * (i + 1)} for i in range(8)]
+    threads = [
+        threading.Thread(target=cache._write_disk, args=("k", "/a", payload, 2000.0))
+        for payload in payloads
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    (path,) = tmp_path.iterdir()
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file)["value"] in payloads
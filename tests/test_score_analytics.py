@@ -0,0 +1,138 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from score_analytics import ScoreTable  # noqa: E402
+from score_archive import open_archive  # noqa: E402
+
+
+def _record(course, score, submitted=True):
+    return {
+        "course_name": course,
+        "title": "作业",
+        "submitted": submitted,
+        "final_score": score,
+        "correct_progress": None,
+    }
+
+
+SNAPSHOTS = {
+    "alice": {
+        "a1": _record("数学", 90),
+        "a2": _record("数学", 80),
+        "a3": _record("英语", 70),
+    },
+    "bob": {
+        "b1": _record("数学", 100),
+        "b2": _record("数学", 0),
+        "b3": _record("英语", None, submitted=False),
+    },
+    "carol": {
+        "c1": _record("数学", "85"),
+        "c2": _record("英语", 85),
+    },
+    "dave": {"d1": _record("数学", None, submitted=False)},
+}
+
+
+@pytest.fixture
+def table():
+    return ScoreTable.from_snapshots(SNAPSHOTS)
+
+
+def _by(records, *keys):
+    return {tuple(record[key] for key in keys): record for record in records}
+
+
+def test_course_stats(table):
+    stats = _by(table.course_stats().records(), "course")
+    math_ = stats[("数学",)]
+    assert (math_["homework"], math_["submitted"], math_["unsubmitted"]) == (6, 5, 1)
+    assert math_["zero_score"] == 1
+    assert math_["completion_rate"] == pytest.approx(5 / 6)
+    assert math_["mean"] == pytest.approx((90 + 80 + 100 + 0 + 85) / 5)
+    assert math_["median"] == 85
+    assert (math_["min"], math_["max"]) == (0, 100)
+
+    english = stats[("英语",)]
+    assert english["median"] == pytest.approx(77.5)
+
+
+def test_zero_as_ungraded(table):
+    stats = _by(table.course_stats(zero_as_ungraded=True).records(), "course")
+    assert stats[("数学",)]["scored"] == 4
+    assert stats[("数学",)]["min"] == 80
+
+
+def test_course_stats_by_account(table):
+    stats = _by(table.course_stats(by_account=True).records(), "account", "course")
+    assert ("dave", "英语") not in stats
+    assert stats[("bob", "英语")]["mean"] is None
+    assert stats[("alice", "数学")]["mean"] == 85
+
+
+def test_account_ranking(table):
+    ranking = table.account_ranking().records()
+    assert [(row["rank"], row["account"]) for row in ranking] == [
+        (1, "carol"),
+        (2, "alice"),
+        (3, "bob"),
+        (0, "dave"),
+    ]
+    assert ranking[-1]["mean"] is None
+    assert ranking[2]["completion_rate"] == pytest.approx(2 / 3)
+
+
+def test_ranking_ties_share_rank():
+    table = ScoreTable.from_snapshots(
+        {
+            "alice": {"a": _record("数学", 90)},
+            "bob": {"b": _record("数学", 90)},
+            "carol": {"c": _record("数学", 60)},
+        }
+    )
+    ranking = table.account_ranking().records()
+    assert [(row["rank"], row["account"]) for row in ranking] == [
+        (1, "alice"),
+        (1, "bob"),
+        (3, "carol"),
+    ]
+
+
+def test_ranking_for_single_course(table):
+    ranking = _by(table.account_ranking(course="英语").records(), "account")
+    assert set(ranking) == {("alice",), ("bob",), ("carol",)}
+    assert ranking[("carol",)]["rank"] == 1
+    assert ranking[("alice",)]["rank"] == 2
+    assert ranking[("bob",)]["rank"] == 0
+
+
+def test_overview(table):
+    overview = table.overview()
+    assert (overview["accounts"], overview["courses"], overview["homework"]) == (4, 2, 9)
+    assert (overview["submitted"], overview["unsubmitted"], overview["zero_score"]) == (7, 2, 1)
+    assert math.isclose(overview["mean"], (90 + 80 + 70 + 100 + 0 + 85 + 85) / 7)
+
+
+def test_from_archives_uses_latest_or_point_in_time(tmp_path):
+    root = str(tmp_path)
+    open_archive(root, "alice").append({"a1": _record("数学", 60)}, 100)
+    open_archive(root, "alice").append({"a1": _record("数学", 90)}, 200)
+    open_archive(root, "bob").append({"b1": _record("数学", 70)}, 150)
+
+    latest = _by(ScoreTable.from_archives(root).account_ranking().records(), "account")
+    assert latest[("alice",)]["mean"] == 90
+
+    earlier = ScoreTable.from_archives(root, at=120)
+    assert list(earlier.accounts) == ["alice"]
+    assert earlier.account_ranking().records()[0]["mean"] == 60
+
+
+def test_empty_table():
+    table = ScoreTable.from_snapshots({})
+    assert len(table) == 0
+    assert table.course_stats().records() == []
+    assert table.account_ranking().records() == []
+    assert table.overview()["mean"] is None
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+
+import pytest
+
+import score_archive
+from score_archive import INDEX_FILE, RECORD, ScoreArchive, open_archive
+
+
+def _record(score, submitted=True):
+    return {
+        "course_name": "高等数学",
+        "title": "第1次作业",
+        "submitted": submitted,
+        "final_score": score,
+        "correct_progress": 100 if submitted else None,
+    }
+
+
+A = {"hw1": _record(None, submitted=False)}
+B = {"hw1": _record(90)}
+C = {"hw1": _record(95), "hw2": _record(None, submitted=False)}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ScoreArchive(str(tmp_path / "alice"))
+    yield archive
+    archive.close()
+
+
+def test_round_trip_after_reopen(archive):
+    assert archive.append(A, 100)
+    assert archive.append(B, 200)
+    assert archive.append(C, 300)
+    archive.close()
+
+    reopened = ScoreArchive(archive.directory)
+    try:
+        assert len(reopened) == 3
+        assert reopened.latest() == C
+        assert reopened.state_at(99) is None
+        assert reopened.state_at(100) == A
+        assert reopened.state_at(250) == B
+        assert [timestamp for timestamp, _ in reopened.entries()] == [100, 200, 300]
+    finally:
+        reopened.close()
+
+
+def test_unchanged_snapshot_is_not_appended(archive):
+    assert archive.append(A, 100)
+    assert not archive.append(dict(A), 200)
+    assert len(archive) == 1
+
+
+def test_identical_snapshots_share_one_blob(archive):
+    archive.append(A, 100)
+    archive.append(B, 200)
+    archive.append(A, 300)
+    stats = archive.stats()
+    assert (stats["entries"], stats["unique_snapshots"]) == (3, 2)
+    assert archive.state_at(300) == A
+
+
+def test_rejects_out_of_order_timestamp(archive):
+    archive.append(A, 200)
+    with pytest.raises(ValueError):
+        archive.append(B, 100)
+
+
+def test_changes_and_history(archive):
+    archive.append(A, 100)
+    archive.append(B, 200)
+    archive.append(C, 300)
+
+    changes = archive.changes(since=100)
+    assert [(change.timestamp, change.homework_id, change.kind) for change in changes] == [
+        (200, "hw1", "changed"),
+        (300, "hw1", "changed"),
+        (300, "hw2", "added"),
+    ]
+    assert archive.history("hw1") == [(100, None), (200, 90), (300, 95)]
+    assert archive.history("hw1", since=250) == [(250, 90), (300, 95)]
+    assert archive.history("hw2") == [(300, None)]
+
+
+def test_truncated_index_record_is_recovered(archive):
+    archive.append(A, 100)
+    archive.append(B, 200)
+    archive.close()
+    index_path = os.path.join(archive.directory, INDEX_FILE)
+    with open(index_path, "ab") as file:
+        file.write(b"\0" * (RECORD.size // 2))
+
+    reopened = ScoreArchive(archive.directory)
+    try:
+        assert len(reopened) == 2
+        assert reopened.append(C, 300)
+        assert reopened.latest() == C
+    finally:
+        reopened.close()
+
+
+def test_open_archive_shares_instance_and_sanitizes_name(tmp_path):
+    first = open_archive(str(tmp_path), "a b/c")
+    assert open_archive(str(tmp_path), "a b/c") is first
+    assert os.path.basename(first.directory) == "a_b_c"
+    assert os.path.basename(open_archive(str(tmp_path), None).directory) == "default"
+
+
+def _append_many(directory, worker, count):
+    archive = ScoreArchive(directory)
+    for i in range(count):
+        archive.append({"hw": _record(i), "worker": worker})
+    archive.close()
+
+
+@pytest.mark.skipif(score_archive.fcntl is None, reason="跨进程加锁需要 fcntl")
+def test_concurrent_processes_keep_index_sorted(tmp_path):
+    directory = str(tmp_path / "alice")
+    ScoreArchive(directory).close()
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_append_many, args=(directory, worker, 10)) for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    archive = ScoreArchive(directory)
+    try:
+        timestamps = [timestamp for timestamp, _ in archive.entries()]
+        assert len(timestamps) == len(archive) == 40
+        assert timestamps == sorted(timestamps)
+        # 每条记录引用的快照都能正确解码
+        assert archive.stats()["unique_snapshots"] == 40
+        assert all(archive.state_at(t) is not None for t in timestamps)
+    finally:
+        archive.close()
+
+
+def test_sees_records_appended_by_another_instance(tmp_path):
+    directory = str(tmp_path / "alice")
+    first = ScoreArchive(directory)
+    second = ScoreArchive(directory)
+    try:
+        first.append(A, 100)
+        assert second.latest() == A
+        # 另一个实例已追加更晚的记录，早于它的时间被拒绝，相同内容不重复追加
+        with pytest.raises(ValueError):
+            second.append(B, 50)
+        assert not second.append(A, 200)
+        assert second.append(B, 200)
+        assert len(first) == 2
+        assert first.state_at(250) == B
+    finally:
+        first.close()
+        second.close()
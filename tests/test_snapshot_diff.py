@@ -0,0 +1,111 @@
+import copy
+
+from snapshot_diff import ChangeType, SnapshotDiffer
+
+
+def _homework(homework_id, title, endtime="2024-06-01T00:00:00Z", score=None, progress=None):
+    homework = {"id": homework_id, "title": title, "endtime": endtime}
+    if score is not None or progress is not None:
+        homework["studenthomework"] = [{"finalScore": score, "answerProgress": progress}]
+    return homework
+
+
+def _course_data(*courses):
+    return {
+        "data": [
+            {"course": {"id": course_id, "name": name}, "homework": homework}
+            for course_id, name, homework in courses
+        ]
+    }
+
+
+BASE = _course_data(
+    (1, "高等数学", [_homework(11, "第1次作业"), _homework(12, "第2次作业")]),
+    (2, "大学英语", [_homework(21, "阅读")]),
+)
+
+
+def _kinds(events):
+    return sorted((event.kind, event.homework_id) for event in events)
+
+
+def test_first_diff_builds_baseline_only():
+    differ = SnapshotDiffer()
+    assert differ.diff(BASE) == []
+    assert differ.courses_changed == 2
+    assert set(differ.to_dict()["courses"]) == {"1", "2"}
+
+
+def test_unchanged_courses_are_skipped():
+    differ = SnapshotDiffer()
+    differ.diff(BASE)
+    assert differ.diff(copy.deepcopy(BASE)) == []
+    assert (differ.courses_changed, differ.courses_skipped) == (0, 2)
+    assert differ.changed_keys == []
+
+
+def test_homework_changes():
+    differ = SnapshotDiffer()
+    differ.diff(BASE)
+    changed = _course_data(
+        (
+            1,
+            "高等数学",
+            [
+                _homework(11, "第1次作业", "2024-06-08T00:00:00Z"),
+                _homework(13, "第3次作业"),
+            ],
+        ),
+        (2, "大学英语", [_homework(21, "阅读", score=90, progress=100)]),
+    )
+
+    events = differ.diff(changed)
+    assert _kinds(events) == sorted(
+        [
+            (ChangeType.DEADLINE_MOVED, "11"),
+            (ChangeType.NEW_HOMEWORK, "13"),
+            (ChangeType.DELETED_HOMEWORK, "12"),
+            (ChangeType.NEWLY_SUBMITTED, "21"),
+            (ChangeType.SCORE_CHANGED, "21"),
+            (ChangeType.PROGRESS_CHANGED, "21"),
+        ]
+    )
+    moved = next(event for event in events if event.kind == ChangeType.DEADLINE_MOVED)
+    assert (moved.old, moved.new) == ("2024-06-01T00:00:00Z", "2024-06-08T00:00:00Z")
+    assert sorted(differ.changed_keys) == ["1", "2"]
+
+
+def test_removed_course_deletes_its_homework():
+    differ = SnapshotDiffer()
+    differ.diff(BASE)
+    events = differ.diff(_course_data((1, "高等数学", BASE["data"][0]["homework"])))
+    assert _kinds(events) == [(ChangeType.DELETED_HOMEWORK, "21")]
+    assert differ.removed_keys == ["2"]
+
+
+def test_state_round_trip():
+    differ = SnapshotDiffer()
+    differ.diff(BASE)
+    restored = SnapshotDiffer(copy.deepcopy(differ.to_dict()))
+    changed = copy.deepcopy(BASE)
+    changed["data"][1]["homework"][0]["title"] = "阅读（修订）"
+
+    events = restored.diff(changed)
+    assert restored.courses_skipped == 1
+    assert events == []
+    assert restored.to_dict()["courses"]["2"]["homework"]["21"]["title"] == "阅读（修订）"
+
+
+def test_streaming_feed_matches_diff():
+    differ = SnapshotDiffer()
+    differ.diff(BASE)
+    changed = _course_data((1, "高等数学", [_homework(11, "第1次作业")]))
+
+    differ.begin()
+    for course in changed["data"]:
+        differ.feed(course)
+    events = differ.finish()
+    assert _kinds(events) == [
+        (ChangeType.DELETED_HOMEWORK, "12"),
+        (ChangeType.DELETED_HOMEWORK, "21"),
+    ]
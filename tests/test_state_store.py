@@ -0,0 +1,81 @@
+import pytest
+
+from state_store import StateStore
+
+
+def homework(title, endtime="2024-03-08T15:59:59Z", submitted=False):
+    return {
+        "title": title,
+        "endtime": endtime,
+        "submitted": submitted,
+        "finalScore": 95 if submitted else None,
+        "answerProgress": None,
+    }
+
+
+def course(name, **homework_items):
+    return {"hash": str(sorted(homework_items)), "name": name, "homework": homework_items}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+def test_removed_homework_is_marked_deleted(store):
+    courses = {"c1": course("高等数学", h1=homework("作业1"), h2=homework("作业2"))}
+    store.save_snapshot("alice", courses, ["c1"], [])
+    assert store.known_homework_ids("alice") == {"h1", "h2"}
+
+    courses = {"c1": course("高等数学", h1=homework("作业1", submitted=True))}
+    store.save_snapshot("alice", courses, ["c1"], [])
+    assert store.known_homework_ids("alice") == {"h1"}
+    snapshot = store.load_snapshot("alice")
+    assert snapshot["courses"]["c1"]["homework"] == {"h1": homework("作业1", submitted=True)}
+
+
+def test_reappearing_homework_is_restored(store):
+    store.save_snapshot("alice", {"c1": course("高等数学", h1=homework("作业1"))}, ["c1"], [])
+    store.save_snapshot("alice", {"c1": course("高等数学")}, ["c1"], [])
+    assert store.known_homework_ids("alice") == set()
+
+    store.save_snapshot("alice", {"c1": course("高等数学", h1=homework("作业1"))}, ["c1"], [])
+    assert store.known_homework_ids("alice") == {"h1"}
+
+
+def test_removed_course_deletes_only_its_own_homework(store):
+    courses = {
+        "c1": course("高等数学", h1=homework("作业1")),
+        "c2": course("大学英语", h2=homework("作业2")),
+    }
+    store.save_snapshot("alice", courses, ["c1", "c2"], [])
+    store.save_snapshot("bob", courses, ["c1", "c2"], [])
+
+    store.save_snapshot("alice", {"c2": courses["c2"]}, [], ["c1"])
+    assert store.known_homework_ids("alice") == {"h2"}
+    assert list(store.load_snapshot("alice")["courses"]) == ["c2"]
+    # 其他账号的同名课程不受影响
+    assert store.known_homework_ids("bob") == {"h1", "h2"}
+
+
+def test_unchanged_courses_are_not_touched(store):
+    store.save_snapshot("alice", {"c1": course("高等数学", h1=homework("作业1"))}, ["c1"], [])
+    # 只有变化的课程会重写，未列入 changed_keys 的课程即使数据不同也保持原样
+    store.save_snapshot("alice", {"c1": course("高等数学")}, [], [])
+    assert store.known_homework_ids("alice") == {"h1"}
+
+
+def test_unparseable_endtime_is_stored_without_deadline(store):
+    store.save_snapshot("alice", {"c1": course("高等数学", h1=homework("作业1", "garbage"))}, ["c1"], [])
+    snapshot = store.load_snapshot("alice")
+    assert snapshot["courses"]["c1"]["homework"]["h1"]["endtime"] == "garbage"
+
+
+def test_notifications_are_recorded_once(store):
+    store.record_notifications("alice", [("h1", "1d"), ("h1", "1d"), ("h2", "1h")])
+    assert store.notified_keys("alice", ["1d", "1h"]) == {("h1", "1d"), ("h2", "1h")}
+    assert store.was_notified("alice", "h1", "1d")
+    assert not store.was_notified("bob", "h1", "1d")
+    assert store.notified_keys("alice", []) == set()
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+from storage import Storage, file_digest
+from streaming import array_writer
+
+DATA = {"code": 2000, "data": [{"title": "第1次作业", "score": 95.5, "tags": None}]}
+
+
+@pytest.mark.parametrize(
+    "format, filename",
+    [
+        ("json", "data.json"),
+        ("pretty", "data.json"),
+        ("gzip", "data.json.gz"),
+        ("msgpack", "data.msgpack"),
+    ],
+)
+def test_save_and_load_round_trip(tmp_path, format, filename):
+    if format == "msgpack":
+        pytest.importorskip("msgpack")
+    storage = Storage(str(tmp_path), format=format)
+    path, changed = storage.save(DATA, "data.json")
+    assert (path, changed) == (str(tmp_path / filename), True)
+    assert storage.load("data.json") == (path, DATA)
+
+
+def test_unchanged_save_skips_write(tmp_path):
+    storage = Storage(str(tmp_path), format="gzip")
+    path, _ = storage.save(DATA, "data.json")
+    before = os.stat(path)
+
+    assert storage.save(DATA, "data.json") == (path, False)
+    after = os.stat(path)
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert storage.save({**DATA, "code": 2001}, "data.json") == (path, True)
+
+
+def test_load_falls_back_to_previous_format(tmp_path):
+    Storage(str(tmp_path), format="gzip").save(DATA, "data.json")
+    path, data = Storage(str(tmp_path), format="json").load("data.json")
+    assert (path, data) == (str(tmp_path / "data.json.gz"), DATA)
+
+    with pytest.raises(FileNotFoundError):
+        Storage(str(tmp_path)).load("missing.json")
+
+
+def test_namespace_is_sanitized(tmp_path):
+    storage = Storage(str(tmp_path), namespace="../alice")
+    assert storage.directory == str(tmp_path / ".._alice")
+    assert storage.save_text("文本", "note.txt") == (str(tmp_path / ".._alice" / "note.txt"), True)
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Storage(str(tmp_path), format="xml")
+
+
+def test_from_env_reads_format_and_account_namespace(tmp_path, monkeypatch):
+    monkeypatch.setenv("ZXIN_STORAGE_FORMAT", "pretty")
+    monkeypatch.setenv("ZXIN_STORAGE_NAMESPACE", "account")
+    storage = Storage.from_env(str(tmp_path), account="alice")
+    assert (storage.format, storage.directory) == ("pretty", str(tmp_path / "alice"))
+
+
+def test_file_digest_detects_same_size_rewrite_with_same_mtime(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"aaaa")
+    stat = os.stat(path)
+    digest = file_digest(path)
+
+    # 修改时间精度内以相同大小重写，修改时间不变
+    path.write_bytes(b"bbbb")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert file_digest(path) != digest
+
+
+@pytest.mark.parametrize(
+    "format, filename", [("json", "all.json"), ("pretty", "all.json"), ("gzip", "all.json.gz")]
+)
+def test_array_writer_follows_storage_format(tmp_path, format, filename):
+    storage = Storage(str(tmp_path), format=format)
+    with array_writer(storage, "all.json", "items") as writer:
+        writer.write({"title": "第1次作业"})
+        writer.write({"title": "第2次作业"})
+
+    assert writer.filepath == str(tmp_path / filename)
+    assert writer.changed
+    assert storage.load("all.json")[1] == {"items": [{"title": "第1次作业"}, {"title": "第2次作业"}]}
+
+    with array_writer(storage, "all.json", "items") as writer:
+        writer.write({"title": "第1次作业"})
+        writer.write({"title": "第2次作业"})
+    assert not writer.changed
+
+
+def test_array_writer_msgpack(tmp_path):
+    pytest.importorskip("msgpack")
+    storage = Storage(str(tmp_path), format="msgpack")
+    with array_writer(storage, "all.json", "items") as writer:
+        writer.write({"title": "第1次作业"})
+
+    assert writer.filepath == str(tmp_path / "all.msgpack")
+    assert storage.load("all.json")[1] == {"items": [{"title": "第1次作业"}]}
+
+
+def test_aborted_array_writer_leaves_nothing(tmp_path):
+    storage = Storage(str(tmp_path), format="gzip")
+    with pytest.raises(RuntimeError):
+        with array_writer(storage, "all.json") as writer:
+            writer.write({"title": "第1次作业"})
+            raise RuntimeError("中断")
+    assert list(tmp_path.iterdir()) == []
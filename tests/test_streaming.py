@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+
+import pytest
+
+from streaming import JSONArrayStream, PageIterator, StreamError
+
+RESPONSE = {
+    "code": 2000,
+    "data": [{"title": "第一次作业", "score": 95.5}, 12345, "字符串", None, [1, 2]],
+    "msg": "成功",
+}
+
+
+def split(raw, size):
+    return [raw[i : i + size] for i in range(0, len(raw), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 1024])
+def test_json_array_stream_on_split_chunks(size):
+    raw = json.dumps(RESPONSE, ensure_ascii=False, indent=2).encode("utf-8")
+    stream = JSONArrayStream(split(raw, size))
+    assert list(stream) == RESPONSE["data"]
+    assert stream.meta == {"code": 2000, "msg": "成功"}
+    assert stream.count == 5
+
+
+def test_json_array_stream_splits_inside_multibyte_characters():
+    raw = '{"data":["知新","作业提醒"]}'.encode("utf-8")
+    # 每个汉字 3 个字节，按 1、2 字节切分时字符会被拆到两个块中
+    for size in (1, 2, 4):
+        assert list(JSONArrayStream(split(raw, size))) == ["知新", "作业提醒"]
+
+
+def test_json_array_stream_number_at_chunk_boundary():
+    assert list(JSONArrayStream([b'{"data":[12', b"34,5", b"6]}"])) == [1234, 56]
+
+
+def test_json_array_stream_without_array_or_with_other_key():
+    stream = JSONArrayStream([b'{"code":2000,"data":[]}'])
+    assert list(stream) == []
+    assert stream.meta == {"code": 2000}
+
+    stream = JSONArrayStream([b'{"items":[1],"data":[2]}'], key="items")
+    assert list(stream) == [1]
+    assert stream.meta == {"data": [2]}
+
+    assert list(JSONArrayStream([b"{}"])) == []
+
+
+@pytest.mark.parametrize(
+    "raw", [b'{"data":[1,2', b'{"data":[1;2]}', b'[1,2]', b'{"data":[1,2]', b""]
+)
+def test_json_array_stream_rejects_truncated_or_malformed_data(raw):
+    with pytest.raises(StreamError):
+        list(JSONArrayStream(split(raw, 3)))
+
+
+def make_pages(total, page_size, requested=None, delay=0.0):
+    """模拟分页接口：条目为 (页码, 序号)，requested 记录请求过的页码"""
+
+    def fetch_page(page, size):
+        assert size == page_size
+        if requested is not None:
+            requested.append(page)
+        time.sleep(delay)
+        start = (page - 1) * size
+        return [(page, i) for i in range(start, min(start + size, total))], None
+
+    return fetch_page
+
+
+@pytest.mark.parametrize("total", [0, 1, 9, 10, 11, 25])
+def test_stops_after_short_or_empty_page(total):
+    requested = []
+    pages = PageIterator(make_pages(total, 10, requested), page_size=10, prefetch=0)
+    assert [i for _, i in pages] == list(range(total))
+    # 最后一页不足一页时立即结束；恰好整页时还要再请求一个空页
+    assert requested == list(range(1, total // 10 + 2))
+    assert pages.count == total
+
+
+def test_stops_at_total_without_requesting_extra_pages():
+    requested = []
+
+    def fetch_page(page, size):
+        requested.append(page)
+        items, _ = make_pages(30, size)(page, size)
+        return items, 30
+
+    pages = PageIterator(fetch_page, page_size=10, prefetch=3)
+    assert len(list(pages)) == 30
+    assert sorted(requested) == [1, 2, 3]
+    assert pages.total == 30
+
+
+def test_max_pages_limits_requests():
+    requested = []
+    pages = PageIterator(make_pages(100, 10, requested), page_size=10, max_pages=2)
+    assert len(list(pages)) == 20
+    assert sorted(requested) == [1, 2]
+
+
+def test_oversized_first_page_means_pagination_is_ignored():
+    requested = []
+
+    def fetch_page(page, size):
+        requested.append(page)
+        return list(range(25)), None
+
+    assert list(PageIterator(fetch_page, page_size=10)) == list(range(25))
+    assert requested == [1]
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_prefetch_bounds_pages_requested_ahead(prefetch):
+    requested = []
+    lock = threading.Lock()
+
+    def fetch_page(page, size):
+        with lock:
+            requested.append(page)
+        return make_pages(100, size)(page, size)
+
+    for page, _ in PageIterator(fetch_page, page_size=10, prefetch=prefetch):
+        with lock:
+            # 处理第 page 页时，已请求但未处理的页数不超过 prefetch
+            assert max(requested) <= page + max(prefetch, 1)
+            if prefetch == 0:
+                assert max(requested) == page
+
+
+def test_close_stops_prefetching():
+    requested = []
+    pages = PageIterator(make_pages(10**6, 10, requested, delay=0.01), page_size=10, prefetch=2)
+    for _ in pages:
+        break
+    pages.close()
+    time.sleep(0.05)
+    count = len(requested)
+    assert count <= 3
+    time.sleep(0.05)
+    assert len(requested) == count
+    assert list(pages) == []
+
+
+def test_fetch_error_is_raised_as_stream_error():
+    def fetch_page(page, size):
+        if page == 2:
+            raise ConnectionError("连接重置")
+        return list(range(size)), None
+
+    pages = PageIterator(fetch_page, page_size=10)
+    with pytest.raises(StreamError, match="第 2 页"):
+        list(pages)
+    assert pages.count == 10
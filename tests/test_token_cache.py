@@ -0,0 +1,83 @@
+import base64
+import json
+import multiprocessing
+import os
+import stat
+import threading
+
+import pytest
+
+import token_cache
+from token_cache import TokenCache, decode_token_expiry
+
+
+def _jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    return f"header.{payload}.signature"
+
+
+def test_decode_token_expiry():
+    assert decode_token_expiry(_jwt({"exp": 1700000000})) == 1700000000
+    assert decode_token_expiry(_jwt({"sub": "alice"})) is None
+    assert decode_token_expiry("not-a-jwt") is None
+    assert decode_token_expiry(None) is None
+
+
+def test_set_get_remove(tmp_path):
+    cache = TokenCache(str(tmp_path / "tokens.json"))
+    assert cache.get("alice") == (None, None)
+
+    cache.set("alice", "token-a", 123)
+    assert cache.get("alice") == ("token-a", 123)
+    assert TokenCache(cache.filepath).get("alice") == ("token-a", 123)
+
+    cache.remove("alice")
+    assert cache.get("alice") == (None, None)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="只在 POSIX 上检查文件权限")
+def test_cache_file_is_owner_only(tmp_path):
+    cache = TokenCache(str(tmp_path / "tokens.json"))
+    cache.set("alice", "token-a")
+    assert stat.S_IMODE(os.stat(cache.filepath).st_mode) == 0o600
+
+
+def test_concurrent_clients_keep_every_account(tmp_path):
+    # 每个线程使用独立的 TokenCache 实例，写入同一文件
+    path = str(tmp_path / "tokens.json")
+    barrier = threading.Barrier(32)
+
+    def save(i):
+        barrier.wait()
+        TokenCache(path).set(f"user{i}", f"token{i}")
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cache = TokenCache(path)
+    assert all(cache.get(f"user{i}")[0] == f"token{i}" for i in range(32))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def _save_many(path, worker, count):
+    cache = TokenCache(path)
+    for i in range(count):
+        cache.set(f"p{worker}-{i}", f"token{worker}-{i}")
+
+
+@pytest.mark.skipif(token_cache.fcntl is None, reason="跨进程加锁需要 fcntl")
+def test_concurrent_processes_keep_every_account(tmp_path):
+    path = str(tmp_path / "tokens.json")
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_save_many, args=(path, worker, 5)) for worker in range(8)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    with open(path, encoding="utf-8") as file:
+        assert len(json.load(file)) == 40
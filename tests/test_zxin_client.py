@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from token_cache import TokenCache
+from zxin_client import ZXinClient
+
+ENDPOINT = "/stu/homework/getHomeworkList"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = {}
+
+    def json(self):
+        return self.body
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeTransport:
+    """模拟服务端：登录较慢，只接受当前有效的 token"""
+
+    def __init__(self, login_delay=0.05):
+        self.login_delay = login_delay
+        self.logins = 0
+        self.valid = set()
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, idempotent=False, headers=None, json=None):
+        assert url.endswith("/auth/login")
+        time.sleep(self.login_delay)
+        with self._lock:
+            self.logins += 1
+            token = f"token-{self.logins}"
+            self.valid.add(token)
+        return FakeResponse(200, {"code": 2000, "msg": "ok", "data": {"token": token}})
+
+    def get(self, url, headers=None, stream=False):
+        token = headers["Authorization"].split(" ", 1)[1]
+        with self._lock:
+            if token not in self.valid:
+                return FakeResponse(401)
+        return FakeResponse(200, {"code": 2000, "data": []})
+
+    def revoke_tokens(self):
+        with self._lock:
+            self.valid.clear()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(tmp_path):
+    transport = FakeTransport()
+    return ZXinClient(
+        "alice",
+        "secret",
+        str(tmp_path / "output"),
+        transport=transport,
+        token_cache=TokenCache(str(tmp_path / "token_cache.json")),
+    )
+
+
+def run_concurrently(threads, func):
+    barrier = threading.Barrier(threads)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(func())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def request(client):
+    return client.api_request(ENDPOINT)
+
+
+def test_cold_start_logs_in_once(client):
+    results = run_concurrently(16, lambda: request(client))
+    assert client.transport.logins == 1
+    assert all(result == {"code": 2000, "data": []} for result in results)
+
+
+def test_expiring_token_logs_in_once(client):
+    request(client)
+    client.token_expires_at = time.time()
+    results = run_concurrently(16, lambda: request(client))
+    assert client.transport.logins == 2
+    assert all(result["code"] == 2000 for result in results)
+
+
+def test_revoked_token_logs_in_once_after_401(client):
+    request(client)
+    client.transport.revoke_tokens()
+    results = run_concurrently(16, lambda: request(client))
+    assert client.transport.logins == 2
+    assert all(result["code"] == 2000 for result in results)
+    assert client.token == "token-2"
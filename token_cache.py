@@ -0,0 +1,139 @@
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只做进程内加锁
+    fcntl = None
+
+DEFAULT_TOKEN_CACHE = ".zxin_token_cache.json"
+
+
+def decode_token_expiry(token):
+    """
+    从JWT格式的token中解析过期时间
+
+    Returns:
+        过期时间的Unix时间戳，token不是JWT或不含exp字段时返回None
+    """
+    if not token:
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    payload = parts[1]
+    payload += "=" * (-len(payload) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode("ascii")))
+        exp = claims.get("exp")
+        return int(exp) if exp is not None else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+_locks = {}  # {缓存文件绝对路径: 线程锁}，同一进程中的所有实例共享
+_locks_lock = threading.Lock()
+
+
+def _path_lock(filepath):
+    key = os.path.abspath(filepath)
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.Lock()
+        return lock
+
+
+class TokenCache:
+    """
+    按账号保存token的本地缓存文件，文件权限为仅所有者可读写
+
+    同一文件的读-合并-写在进程内按路径共享的线程锁、进程间用文件锁（fcntl.flock）串行化，
+    多个客户端和多个进程同时保存不同账号的token不会互相覆盖。
+    """
+
+    def __init__(self, filepath=None):
+        """
+        Args:
+            filepath: 缓存文件路径，默认读取 ZXIN_TOKEN_CACHE，否则为当前目录下的 .zxin_token_cache.json
+        """
+        self.filepath = filepath or os.getenv("ZXIN_TOKEN_CACHE", DEFAULT_TOKEN_CACHE)
+        self._lock = _path_lock(self.filepath)
+
+    @contextmanager
+    def _locked(self):
+        """持有进程内锁和跨进程的文件锁"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            directory = os.path.dirname(os.path.abspath(self.filepath))
+            os.makedirs(directory, exist_ok=True)
+            fd = os.open(f"{self.filepath}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+
+    def _read(self):
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.filepath))
+        os.makedirs(directory, exist_ok=True)
+        # mkstemp 创建的文件权限为 0600，文件名唯一
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(self.filepath)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(tmp_path, self.filepath)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def get(self, username):
+        """
+        读取账号的缓存token
+
+        Returns:
+            (token, expires_at) 元组，未缓存时返回 (None, None)
+        """
+        with self._lock:
+            entry = self._read().get(username)
+        if not entry or not entry.get("token"):
+            return None, None
+        return entry["token"], entry.get("expires_at")
+
+    def set(self, username, token, expires_at=None):
+        """保存账号的token"""
+        with self._locked():
+            data = self._read()
+            data[username] = {
+                "token": token,
+                "expires_at": expires_at,
+                "saved_at": int(time.time()),
+            }
+            self._write(data)
+
+    def remove(self, username):
+        """删除账号的缓存token"""
+        with self._locked():
+            data = self._read()
+            if data.pop(username, None) is not None:
+                self._write(data)
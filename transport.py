@@ -0,0 +1,315 @@
+import email.utils
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from log_config import setup_logger
+from metrics import REQUEST_LATENCY, REQUESTS
+
+logger = setup_logger("Transport")
+
+try:  # urllib3 只有在安装了 brotli 时才能解码 br 响应
+    import brotli  # noqa: F401
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+# 可重试的响应状态码
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# 重试时视为幂等的请求方法
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后打开，在 reset_timeout 秒内直接拒绝请求；
+    之后进入半开状态放行一个试探请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多少秒进入半开状态
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否放行请求"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            # 半开状态只放行一个试探请求
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("上游已恢复，熔断器关闭")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self):
+        """请求未产生结果（如被中断）时释放半开状态的试探名额，不计入成功或失败"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"连续失败 {self.failures} 次，熔断 {self.reset_timeout} 秒"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_in(self):
+        """距离进入半开状态还有多少秒"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 响应头（秒数或HTTP日期），无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed is None:
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+class Transport:
+    """
+    带超时、连接池、重试和熔断的HTTP传输层
+
+    - 每个请求都有连接/读取超时，不会无限等待
+    - 幂等请求遇到连接错误、超时或 429/5xx 时按指数退避加随机抖动重试，并遵守 Retry-After
+    - 连续失败后熔断，上游不可用期间直接失败而不占用线程
+    """
+
+    def __init__(
+        self,
+        connect_timeout=5,
+        read_timeout=30,
+        max_retries=3,
+        backoff_factor=0.5,
+        backoff_max=30,
+        pool_connections=10,
+        pool_maxsize=20,
+        breaker=None,
+        per_thread_session=False,
+    ):
+        """
+        Args:
+            connect_timeout: 连接超时（秒）
+            read_timeout: 读取超时（秒）
+            max_retries: 最多重试次数
+            backoff_factor: 退避基数，第 n 次重试前最多等待 backoff_factor * 2^n 秒
+            backoff_max: 单次退避（含 Retry-After）的最长等待秒数
+            pool_connections: 连接池缓存的主机数
+            pool_maxsize: 每个主机的最大连接数
+            breaker: 熔断器，多个传输层可共享同一个，默认新建
+            per_thread_session: 每个线程使用独立的 Session 和连接池，默认所有线程共享一个
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.per_thread_session = per_thread_session
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        self._local = threading.local()
+        self._session = None if per_thread_session else self._new_session()
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        with self._sessions_lock:
+            self._sessions.append(session)
+        return session
+
+    @property
+    def session(self):
+        """当前线程使用的 Session"""
+        if self._session is not None:
+            return self._session
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._new_session()
+        return session
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """从环境变量 ZXIN_CONNECT_TIMEOUT、ZXIN_READ_TIMEOUT、ZXIN_MAX_RETRIES 读取配置"""
+        options = {}
+        for name, env, cast in (
+            ("connect_timeout", "ZXIN_CONNECT_TIMEOUT", float),
+            ("read_timeout", "ZXIN_READ_TIMEOUT", float),
+            ("max_retries", "ZXIN_MAX_RETRIES", int),
+        ):
+            value = os.getenv(env)
+            if value:
+                options[name] = cast(value)
+        options.update(overrides)
+        return cls(**options)
+
+    def _backoff(self, attempt, retry_after=None):
+        """第 attempt 次重试前的等待秒数（full jitter），Retry-After 优先"""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * 2**attempt))
+
+    def request(self, method, url, idempotent=None, **kwargs):
+        """
+        发送请求
+
+        Args:
+            method: 请求方法
+            url: 请求地址
+            idempotent: 是否允许重试，默认按请求方法判断（GET 等幂等方法重试，POST 不重试）
+            **kwargs: 传给 requests 的其他参数，未指定 timeout 时使用默认超时
+
+        Returns:
+            requests.Response，重试耗尽后返回最后一次的响应
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+            requests.exceptions.RequestException: 重试耗尽后仍无法连接或超时
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retries = self.max_retries if idempotent else 0
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = urlsplit(url).path or "/"
+
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                REQUESTS.inc(endpoint=endpoint, method=method, status="circuit_open")
+                raise CircuitOpenError(
+                    f"上游服务不可用，{self.breaker.retry_in():.0f} 秒后重试: {url}"
+                )
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                REQUEST_LATENCY.observe(
+                    time.perf_counter() - start, endpoint=endpoint, method=method
+                )
+                status = (
+                    "timeout"
+                    if isinstance(e, requests.exceptions.Timeout)
+                    else "connection_error"
+                )
+                REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+                self.breaker.record_failure()
+                if attempt >= retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"请求失败: {e}，{delay:.1f} 秒后第 {attempt + 1} 次重试")
+                time.sleep(delay)
+                continue
+            except requests.exceptions.RequestException:
+                # 连接错误和超时以外的请求错误（重定向过多、无效URL、分块编码错误等）不重试，但同样计为失败
+                REQUEST_LATENCY.observe(
+                    time.perf_counter() - start, endpoint=endpoint, method=method
+                )
+                REQUESTS.inc(endpoint=endpoint, method=method, status="error")
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # 非请求错误（如 KeyboardInterrupt）也要释放试探名额，否则熔断器永远停在半开状态
+                self.breaker.release()
+                raise
+
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start, endpoint=endpoint, method=method
+            )
+            REQUESTS.inc(endpoint=endpoint, method=method, status=response.status_code)
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+
+            delay = self._backoff(
+                attempt, parse_retry_after(response.headers.get("Retry-After"))
+            )
+            logger.warning(
+                f"服务器返回 {response.status_code}，{delay:.1f} 秒后第 {attempt + 1} 次重试"
+            )
+            response.close()
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
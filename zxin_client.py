@@ -1,28 +1,165 @@
 import requests
 import base64
+import hashlib
 import json
 import os
+import threading
+import time
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from log_config import setup_logger
+from response_cache import ResponseCache
+from token_cache import TokenCache, decode_token_expiry
+from storage import Storage
+from streaming import CHUNK_SIZE, JSONArrayStream, PageIterator, StreamError
+from transport import Transport
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+# stream_array 在上游返回 304 时的返回值
+NOT_MODIFIED = object()
+
+
+@dataclass
+class ConditionalResponse:
+    """条件请求的结果：not_modified 为真时内容未变化；data 和 not_modified 都为空时表示请求失败"""
+
+    data: dict = None
+    fingerprint: dict = None
+    not_modified: bool = False
+
+
+@dataclass
+class SnapshotPart:
+    """快照中单个接口的结果"""
+
+    endpoint: str
+    data: dict = None
+    error: str = ""
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+@dataclass
+class Snapshot:
+    """并发获取的多个接口的组合结果"""
+
+    parts: dict = field(default_factory=dict)
+    started_at: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self):
+        return all(part.ok for part in self.parts.values())
+
+    def get(self, name):
+        """获取某个部分的数据，失败时返回 None"""
+        part = self.parts.get(name)
+        return part.data if part and part.ok else None
+
+    def errors(self):
+        return {name: part.error for name, part in self.parts.items() if part.error}
+
+    def timings(self):
+        return {name: part.elapsed for name, part in self.parts.items()}
+
+
 class ZXinClient:
-    """知新2.0客户端基类，处理认证和基本API请求"""
+    """
+    知新2.0客户端基类，处理认证和基本API请求
+
+    线程安全：同一个客户端可以在多个线程中共享。token 的加载、登录和刷新在锁内进行，
+    并发调用时只有一个线程登录，其余线程等待并使用其结果；响应缓存和 token 缓存自带锁。
+    在线程池中使用时可传入 workers 使连接池大小与线程数一致，或用 per_thread_session
+    让每个线程使用独立的 requests.Session。子类（如 HomeworkReminder）中扫描相关的状态
+    不在此保证范围内。
+    """
 
     BASE_URL = "https://v2.api.z-xin.net"
 
-    def __init__(self):
-        """初始化客户端，可以从环境变量读取"""
+    # 各接口响应的缓存时间（秒），未列出的接口不缓存
+    CACHE_TTLS = {
+        "/auth/user": 300,
+        "/stu/course/getJoinedCourse2": 60,
+    }
+
+    # token 过期前多少秒提前重新登录
+    TOKEN_REFRESH_MARGIN = 300
+
+    # 分页接口的页码和每页条目数参数名
+    PAGE_PARAM = "page"
+    SIZE_PARAM = "size"
+
+    # snapshot() 默认并发获取的接口，彼此没有依赖
+    SNAPSHOT_ENDPOINTS = {
+        "user": "/auth/user",
+        "courses": "/stu/course/getJoinedCourse2",
+        "homework": "/stu/homework/getHomeworkList",
+    }
+
+    def __init__(
+        self,
+        username=None,
+        password=None,
+        output_dir="output",
+        cache_dir=None,
+        transport=None,
+        workers=None,
+        per_thread_session=False,
+        storage=None,
+        token_cache=None,
+    ):
+        """
+        初始化客户端，未传入账号密码时从环境变量读取
+
+        Args:
+            username: 账号，默认读取 ZXIN_USERNAME
+            password: 密码，默认读取 ZXIN_PASSWORD
+            output_dir: 输出目录，多账号时每个账号使用独立目录
+            cache_dir: 响应缓存的磁盘目录，默认读取 ZXIN_CACHE_DIR，为空时只缓存在内存中
+            transport: HTTP传输层（超时、连接池、重试、熔断），默认按环境变量新建
+            workers: 共享该客户端的线程数，新建传输层时连接池大小与之一致
+            per_thread_session: 新建传输层时每个线程使用独立的 Session
+            storage: save_json/load_json/save_text 使用的存储，默认在输出目录下按环境变量
+                ZXIN_STORAGE_FORMAT、ZXIN_STORAGE_NAMESPACE 新建
+            token_cache: token 缓存，多个客户端可共享同一个，默认按 ZXIN_TOKEN_CACHE 新建
+        """
         self.logger = setup_logger(self.__class__.__name__)
-        self.session = requests.Session()  # 初始化 session
-        self.username = os.getenv("ZXIN_USERNAME")
-        self.password = os.getenv("ZXIN_PASSWORD")
+        if transport is None:
+            options = {"per_thread_session": per_thread_session}
+            if workers:
+                options["pool_maxsize"] = workers
+            transport = Transport.from_env(**options)
+        self.transport = transport
+        self.username = username or os.getenv("ZXIN_USERNAME")
+        self.password = password or os.getenv("ZXIN_PASSWORD")
         self.token = None
-        self.output_dir = "output"
+        self.token_expires_at = None
+        # 保护 token 的加载、登录和丢弃；每次尝试登录后 generation 加一，
+        # 等待锁的线程据此判断其他线程是否已经尝试过登录
+        self._token_lock = threading.RLock()
+        self._login_generation = 0
+        self.token_cache = token_cache or TokenCache()
+        self.output_dir = output_dir
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
+        # JSON数据和文本报告的存储，状态库、成绩归档等仍保存在输出目录下
+        self.storage = storage or Storage.from_env(self.output_dir, self.username)
+        # 响应缓存，CourseManager、ScoreManager 等共享同一客户端时复用
+        self.cache = ResponseCache(
+            ttls=self.CACHE_TTLS, disk_dir=cache_dir or os.getenv("ZXIN_CACHE_DIR")
+        )
+
+    @property
+    def session(self):
+        """当前线程使用的 requests.Session"""
+        return self.transport.session
 
     def _user_pass_base64(self, username, password):
         """将用户名和密码转换为base64编码"""
@@ -32,20 +169,30 @@ class ZXinClient:
 
     def login(self):
         """登录并获取token"""
+        with self._token_lock:
+            try:
+                return self._login()
+            finally:
+                self._login_generation += 1
+
+    def _login(self):
         try:
             url = f"{self.BASE_URL}/auth/login"
             base64_username, base64_password = self._user_pass_base64(
                 self.username, self.password
             )
             data = {"username": base64_username, "password": base64_password}
-            response = self.session.post(url, data=data).json()
+            # 登录可安全重试
+            response = self.transport.post(url, data=data, idempotent=True).json()
             code = response["code"]
             msg = response["msg"]
 
             if code == 2000:
                 self.logger.info("登录成功")
                 self.token = response["data"]["token"]
+                self.token_expires_at = decode_token_expiry(self.token)
                 self.logger.info("获取token成功")
+                self._save_cached_token()
                 self.logger.info("--------------------------------")
                 return self.token
             else:
@@ -60,36 +207,360 @@ class ZXinClient:
             self.logger.error(f"响应中缺少预期的键: {e}，请检查账号密码是否正确")
             return None
 
-    def get_headers(self):
-        """获取带有认证信息的请求头"""
-        if not self.token:
-            self.login()
+    def _token_fresh(self, expires_at):
+        """token 未设置过期时间，或距过期仍超过提前量时视为有效"""
+        if expires_at is None:
+            return True
+        return expires_at - self.TOKEN_REFRESH_MARGIN > time.time()
+
+    def _load_cached_token(self):
+        """从本地缓存加载token，缓存不存在或即将过期时返回 None"""
+        try:
+            token, expires_at = self.token_cache.get(self.username)
+        except Exception as e:
+            self.logger.warning(f"读取token缓存失败: {e}")
+            return None
+        if token and self._token_fresh(expires_at):
+            self.token = token
+            self.token_expires_at = expires_at
+            self.logger.info("使用缓存的token")
+            return token
+        return None
+
+    def _save_cached_token(self):
+        """将当前token写入本地缓存"""
+        try:
+            self.token_cache.set(self.username, self.token, self.token_expires_at)
+        except Exception as e:
+            self.logger.warning(f"保存token缓存失败: {e}")
+
+    def invalidate_token(self, token=None):
+        """
+        丢弃当前token及其缓存，下次请求时重新登录
+
+        Args:
+            token: 已失效的token，传入时只在当前token仍为该值时丢弃，
+                多个线程同时收到401时只会重新登录一次
+        """
+        with self._token_lock:
+            if token is not None and token != self.token:
+                return
+            self.token = None
+            self.token_expires_at = None
+            try:
+                self.token_cache.remove(self.username)
+            except Exception as e:
+                self.logger.warning(f"删除token缓存失败: {e}")
+
+    def ensure_token(self):
+        """
+        确保持有有效token：优先使用内存或本地缓存中的token，即将过期时重新登录
+
+        Returns:
+            有效的token，登录失败时返回 None
+        """
+        token, expires_at = self.token, self.token_expires_at
+        if token and self._token_fresh(expires_at):
+            return token
 
+        generation = self._login_generation
+        with self._token_lock:
+            # 等待锁期间其他线程已经尝试过登录，直接使用其结果（失败时为 None）
+            if self._login_generation != generation:
+                return self.token
+            if self.token and self._token_fresh(self.token_expires_at):
+                return self.token
+            if not self.token and self._load_cached_token():
+                return self.token
+            if self.token:
+                self.logger.info("token即将过期，重新登录")
+            return self.login()
+
+    @staticmethod
+    def _build_headers(token):
         return {
-            "Authorization": f"Bearer {self.token}",
+            "Authorization": f"Bearer {token}",
             "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
         }
 
-    def api_request(self, endpoint, method="GET", data=None):
-        """发送API请求并处理响应"""
-        try:
-            url = f"{self.BASE_URL}{endpoint}"
-            headers = self.get_headers()
+    def get_headers(self):
+        """获取带有认证信息的请求头"""
+        return self._build_headers(self.ensure_token())
+
+    def api_request(self, endpoint, method="GET", data=None, use_cache=True):
+        """
+        发送API请求并处理响应
+
+        Args:
+            endpoint: 接口路径
+            method: 请求方法
+            data: POST 请求体
+            use_cache: 是否读取缓存，为 False 时强制请求并更新缓存
+        """
+        cacheable = self.cache.ttl_for(endpoint) > 0
+        if cacheable:
+            cache_key = self.cache.make_key(endpoint, method, data, self.username)
+            if use_cache:
+                cached = self.cache.get(cache_key, endpoint)
+                if cached is not None:
+                    self.logger.info(f"命中缓存: {endpoint}")
+                    return cached
+
+        result = self._send_request(endpoint, method, data)
+        if cacheable and isinstance(result, dict) and result.get("code", 2000) == 2000:
+            self.cache.set(cache_key, endpoint, result)
+        return result
+
+    def refresh(self, endpoint, method="GET", data=None):
+        """跳过缓存重新请求接口，并用新结果更新缓存"""
+        return self.api_request(endpoint, method, data, use_cache=False)
+
+    def invalidate_cache(self, endpoint=None):
+        """使接口缓存失效，endpoint 为空时清空全部缓存"""
+        self.cache.invalidate(endpoint)
 
+    def cache_stats(self):
+        """获取缓存命中统计"""
+        return self.cache.stats()
+
+    def _send(self, endpoint, method="GET", data=None, headers=None, stream=False):
+        """发送请求并返回响应对象，收到401时重新登录并重试一次"""
+        url = f"{self.BASE_URL}{endpoint}"
+        for attempt in range(2):
+            token = self.ensure_token()
+            request_headers = self._build_headers(token)
+            if headers:
+                request_headers.update(headers)
             if method.upper() == "GET":
-                response = self.session.get(url, headers=headers)
+                response = self.transport.get(
+                    url, headers=request_headers, stream=stream
+                )
             elif method.upper() == "POST":
-                response = self.session.post(
-                    url, headers=headers, json=data if data else {}
+                response = self.transport.post(
+                    url, headers=request_headers, json=data if data else {}
                 )
             else:
                 raise ValueError(f"不支持的请求方法: {method}")
 
-            response.raise_for_status()
-            return response.json()
+            if response.status_code == 401 and attempt == 0:
+                response.close()
+                self.logger.warning("token已失效，重新登录后重试")
+                self.invalidate_token(token)
+                continue
+            break
+
+        response.raise_for_status()
+        return response
+
+    def _send_request(self, endpoint, method="GET", data=None):
+        """实际发送API请求并解析JSON"""
+        try:
+            return self._send(endpoint, method, data).json()
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"API请求失败: {e}")
+            return None
+
+    @staticmethod
+    def _conditional_headers(previous):
+        """根据上次响应的指纹生成条件请求头"""
+        headers = {}
+        if previous and previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous and previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+        return headers
+
+    @staticmethod
+    def _fingerprint(response, content_hash):
+        return {
+            "hash": content_hash,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    def fetch_if_changed(self, endpoint, previous=None):
+        """
+        条件请求GET接口：上游支持时发送 If-None-Match/If-Modified-Since，
+        并比较响应内容的哈希，内容未变化时不解析JSON
+
+        Args:
+            endpoint: 接口路径
+            previous: 上次响应的指纹 {"hash", "etag", "last_modified"}
+
+        Returns:
+            ConditionalResponse
+        """
+        try:
+            response = self._send(endpoint, headers=self._conditional_headers(previous))
+            if response.status_code == 304:
+                self.logger.info(f"{endpoint} 未变化（304 Not Modified）")
+                return ConditionalResponse(fingerprint=previous, not_modified=True)
+            content = response.content
+            fingerprint = self._fingerprint(response, hashlib.sha256(content).hexdigest())
+            if previous and previous.get("hash") == fingerprint["hash"]:
+                self.logger.info(f"{endpoint} 响应内容未变化")
+                return ConditionalResponse(fingerprint=fingerprint, not_modified=True)
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"API请求失败: {e}")
+            return ConditionalResponse()
+
+        if self.cache.ttl_for(endpoint) > 0 and data.get("code", 2000) == 2000:
+            key = self.cache.make_key(endpoint, "GET", None, self.username)
+            self.cache.set(key, endpoint, data)
+        return ConditionalResponse(data=data, fingerprint=fingerprint)
+
+    def _fetch_part(self, endpoint, use_cache):
+        start = time.perf_counter()
+        part = SnapshotPart(endpoint)
+        try:
+            part.data = self.api_request(endpoint, use_cache=use_cache)
+            if part.data is None:
+                part.error = "请求失败"
+            elif part.data.get("code", 2000) != 2000:
+                part.error = part.data.get("msg") or f"错误码 {part.data.get('code')}"
+        except Exception as e:
+            part.error = str(e)
+        part.elapsed = time.perf_counter() - start
+        return part
+
+    def snapshot(self, endpoints=None, use_cache=True):
+        """
+        并发获取多个互不依赖的接口
+
+        先确保已登录，避免多个线程同时登录；可缓存的接口结果会写入响应缓存，
+        之后 get_user_info、fetch_course_data 等直接命中缓存。
+
+        Args:
+            endpoints: {名称: 接口路径}，默认 SNAPSHOT_ENDPOINTS
+            use_cache: 是否读取缓存
+
+        Returns:
+            Snapshot，包含每个接口的数据、耗时和错误信息
+        """
+        endpoints = endpoints or self.SNAPSHOT_ENDPOINTS
+        snapshot = Snapshot(started_at=time.time())
+        start = time.perf_counter()
+        if not self.ensure_token():
+            snapshot.parts = {
+                name: SnapshotPart(endpoint, error="登录失败")
+                for name, endpoint in endpoints.items()
+            }
+            return snapshot
+
+        with ThreadPoolExecutor(
+            max_workers=len(endpoints), thread_name_prefix="snapshot"
+        ) as executor:
+            futures = {
+                name: executor.submit(self._fetch_part, endpoint, use_cache)
+                for name, endpoint in endpoints.items()
+            }
+            snapshot.parts = {name: future.result() for name, future in futures.items()}
+        snapshot.elapsed = time.perf_counter() - start
+
+        timings = "，".join(
+            f"{name} {part.elapsed * 1000:.0f}ms" for name, part in snapshot.parts.items()
+        )
+        self.logger.info(f"并发获取完成，共耗时 {snapshot.elapsed * 1000:.0f}ms（{timings}）")
+        for name, error in snapshot.errors().items():
+            self.logger.error(f"{name} 获取失败: {error}")
+        return snapshot
+
+    def prefetch(self, endpoints=None):
+        """
+        在后台线程中执行 snapshot()
+
+        Returns:
+            concurrent.futures.Future，结果为 Snapshot
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        future = executor.submit(self.snapshot, endpoints)
+        executor.shutdown(wait=False)
+        return future
+
+    def stream_array(self, endpoint, key="data", previous=None):
+        """
+        以流式方式请求GET接口，逐项解析响应中的数组字段
+
+        Args:
+            endpoint: 接口路径
+            key: 要流式解析的数组字段名
+            previous: 上次响应的指纹，传入时发送条件请求
+
+        Returns:
+            JSONArrayStream 迭代器，其他顶层字段在遍历结束后保存在 meta 中，响应指纹保存在
+            fingerprint 中；上游返回 304 时返回 NOT_MODIFIED；请求失败时返回 None
+        """
+        try:
+            response = self._send(
+                endpoint, headers=self._conditional_headers(previous), stream=True
+            )
         except requests.exceptions.RequestException as e:
             self.logger.error(f"API请求失败: {e}")
             return None
+        if response.status_code == 304:
+            response.close()
+            self.logger.info(f"{endpoint} 未变化（304 Not Modified）")
+            return NOT_MODIFIED
+
+        digest = hashlib.sha256()
+
+        def chunks():
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    yield chunk
+                stream.fingerprint = self._fingerprint(response, digest.hexdigest())
+            except requests.exceptions.RequestException as e:
+                raise StreamError(f"读取响应失败: {e}") from e
+            finally:
+                response.close()
+
+        stream = JSONArrayStream(chunks(), key)
+        stream.fingerprint = None
+        return stream
+
+    @staticmethod
+    def _page_items(data):
+        """
+        从分页响应中取出条目和总数
+
+        data 字段为条目列表，或为包含 records/list/rows 和 total 的对象；total 也可以在顶层。
+        """
+        items = data.get("data")
+        total = data.get("total")
+        if isinstance(items, dict):
+            total = items.get("total", total)
+            items = items.get("records") or items.get("list") or items.get("rows")
+        return items or [], int(total) if total is not None else None
+
+    def _fetch_page(self, endpoint, params, page, page_size):
+        query = urlencode({**params, self.PAGE_PARAM: page, self.SIZE_PARAM: page_size})
+        data = self._send(f"{endpoint}?{query}").json()
+        if data.get("code", 2000) != 2000:
+            raise StreamError(data.get("msg") or f"错误码 {data.get('code')}")
+        return self._page_items(data)
+
+    def iter_pages(self, endpoint, page_size=50, prefetch=2, params=None, max_pages=None):
+        """
+        逐页请求GET列表接口并逐项遍历，处理当前页时在后台预取后续页
+
+        Args:
+            endpoint: 接口路径
+            page_size: 每页条目数
+            prefetch: 同时在途的最多页数
+            params: 其他查询参数
+            max_pages: 最多请求的页数
+
+        Returns:
+            PageIterator，读取失败时在遍历中抛出 StreamError
+        """
+        return PageIterator(
+            lambda page, size: self._fetch_page(endpoint, params or {}, page, size),
+            page_size=page_size,
+            prefetch=prefetch,
+            max_pages=max_pages,
+        )
 
     def get_user_info(self):
         """获取用户信息"""
@@ -147,35 +618,35 @@ class ZXinClient:
             return None
 
     def save_json(self, data, filename):
-        """保存数据为JSON文件"""
-        filepath = os.path.join(self.output_dir, filename)
-        with open(filepath, "w", encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
-        self.logger.info(f"保存数据成功，数据已保存到 {filepath} 文件中")
+        """按存储格式保存数据，内容与已有文件相同时不写入"""
+        filepath, written = self.storage.save(data, filename)
+        if written:
+            self.logger.info(f"保存数据成功，数据已保存到 {filepath} 文件中")
+        else:
+            self.logger.info(f"数据未变化，跳过写入 {filepath}")
         return filepath
 
     def load_json(self, filename):
-        """从JSON文件加载数据"""
-        filepath = os.path.join(self.output_dir, filename)
+        """从存储加载数据，兼容其他格式保存的同名文件"""
         try:
-            with open(filepath, "r", encoding="utf-8") as file:
-                data = json.load(file)
+            filepath, data = self.storage.load(filename)
             self.logger.info(f"从 {filepath} 加载数据成功")
             return data
         except FileNotFoundError:
-            self.logger.info(f"文件 {filepath} 未找到")
+            self.logger.info(f"文件 {self.storage.data_path(filename)} 未找到")
             return None
         except json.JSONDecodeError:
-            self.logger.error(f"文件 {filepath} 内容不是有效的JSON格式")
+            self.logger.error(f"文件 {self.storage.data_path(filename)} 内容不是有效的JSON格式")
             return None
         except Exception as e:
-            self.logger.error(f"从 {filepath} 加载数据失败: {e}")
+            self.logger.error(f"从 {self.storage.data_path(filename)} 加载数据失败: {e}")
             return None
 
     def save_text(self, text, filename):
-        """保存文本到文件"""
-        filepath = os.path.join(self.output_dir, filename)
-        with open(filepath, "w", encoding="utf-8") as file:
-            file.write(text)
-        self.logger.info(f"保存文本成功，已保存到 {filepath} 文件中")
+        """保存文本到文件，内容与已有文件相同时不写入"""
+        filepath, written = self.storage.save_text(text, filename)
+        if written:
+            self.logger.info(f"保存文本成功，已保存到 {filepath} 文件中")
+        else:
+            self.logger.info(f"文本未变化，跳过写入 {filepath}")
         return filepath